@@ -0,0 +1,104 @@
+"""
+A persistent cache of the sentences extracted from each M-XML file.
+
+Entries are addressed by the CRC-32 and the size of the zip members
+recorded in the central directory of the archive,
+so that a member is parsed again only when its content changes.
+Each entry is a sentence store file (see `abctk.utils.comparative.BCCWJ.store`).
+"""
+
+import os
+from pathlib import Path
+import tempfile
+import zipfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.BCCWJ.store import (
+    BCCWJSentStore,
+    InvalidStoreError,
+    write_store,
+)
+
+CACHE_VERSION = 1
+"""
+The version of the extraction results.
+Bump it when the extraction changes so that the old entries are no longer used.
+"""
+
+_SUFFIX = ".bin"
+
+
+class MemberCache:
+    def __init__(self, cache_dir: Path | str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_of(self, member: zipfile.ZipInfo) -> Path:
+        return self.cache_dir / (
+            f"v{CACHE_VERSION}-{member.CRC:08x}-{member.file_size}{_SUFFIX}"
+        )
+
+    def get(self, member: zipfile.ZipInfo) -> dict[BCCWJSentIndex, str] | None:
+        path = self.path_of(member)
+        try:
+            with BCCWJSentStore(path) as store:
+                sentences = dict(store.items())
+        except FileNotFoundError:
+            return None
+        except InvalidStoreError:
+            logger.warning(f"Ignoring the broken cache entry {path}")
+            return None
+
+        # Mark the entry as recently used for pruning.
+        os.utime(path)
+        return sentences
+
+    def put(
+        self,
+        member: zipfile.ZipInfo,
+        sentences: dict[BCCWJSentIndex, str],
+    ) -> None:
+        path = self.path_of(member)
+        fd, path_temp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write_store(sentences, f)
+            os.replace(path_temp, path)
+        except BaseException:
+            os.unlink(path_temp)
+            raise
+
+    def prune(self, max_size: int) -> int:
+        """
+        Delete the least recently used entries
+        until the total size of the cache is at most `max_size` bytes.
+
+        Returns
+        -------
+        The number of the deleted entries.
+        """
+        entries = sorted(
+            (
+                (stat.st_mtime, stat.st_size, path)
+                for path in self.cache_dir.glob(f"*{_SUFFIX}")
+                for stat in (path.stat(),)
+            ),
+        )
+        total_size = sum(size for _, size, _ in entries)
+
+        deleted = 0
+        for _, size, path in entries:
+            if total_size <= max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+            deleted += 1
+
+        logger.info(
+            f"Pruned {deleted} entries from the cache {self.cache_dir}; "
+            f"now {total_size} bytes in total."
+        )
+        return deleted
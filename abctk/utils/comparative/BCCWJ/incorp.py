@@ -1,9 +1,12 @@
+from typing import Iterable, Mapping, Sequence
 import logging
 
 logger = logging.getLogger(__name__)
 
 from abctk.obj.comparative import ABCTComp_BCCWJ_ID
 from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.BCCWJ.stack import BCCWJSentStack
+from abctk.utils.comparative.BCCWJ.store import BCCWJSentStore
 
 IDX_READ_ALSO: dict[BCCWJSentIndex, tuple[BCCWJSentIndex]] = {
     BCCWJSentIndex("LBf9_00090", 18640): (BCCWJSentIndex("LBf9_00090", 18760),),
@@ -11,9 +14,24 @@ IDX_READ_ALSO: dict[BCCWJSentIndex, tuple[BCCWJSentIndex]] = {
 }
 
 
+def get_required_sampleIDs(IDs: Iterable[ABCTComp_BCCWJ_ID]) -> set[str]:
+    """
+    Collect the samples needed to get the real texts of the given records,
+    including the ones of the texts read along with them.
+    """
+    sampleIDs: set[str] = set()
+    for ID in IDs:
+        sampleIDs.add(ID.sampleID)
+        for idx_next in IDX_READ_ALSO.get(
+            BCCWJSentIndex(ID.sampleID, ID.start_pos), ()
+        ):
+            sampleIDs.add(idx_next.sampleID)
+    return sampleIDs
+
+
 def get_real_text(
     idx: BCCWJSentIndex,
-    real_texts: dict[BCCWJSentIndex, str],
+    real_texts: Mapping[BCCWJSentIndex, str],
     corpus_id: ABCTComp_BCCWJ_ID | str | None = None,
 ) -> str | None:
     corpus_id_str = str(corpus_id) or "[UNKNOWN]"
@@ -24,27 +42,71 @@ def get_real_text(
             idx.sent_start_pos,
         )
     ):
-        result = real_text
-
-        for idx_next in IDX_READ_ALSO.get(idx, ()):
-            next_real_text = real_texts.get(
-                BCCWJSentIndex(
-                    idx_next.sampleID,
-                    idx_next.sent_start_pos,
-                ),
-                "",
-            )
-
-            if next_real_text:
-                result += next_real_text
-                logger.info(
-                    f"Concatenated the next real text {idx_next} for {corpus_id_str}"
-                )
-            else:
-                logger.info(
-                    f"Cannot find the next real text {idx_next} for {corpus_id_str}"
-                )
-        return result
+        return _join_read_also(idx, real_text, real_texts, corpus_id_str)
     else:
         logger.warning(f"Cannot find the real text for {corpus_id_str}")
         return None
+
+
+def _join_read_also(
+    idx: BCCWJSentIndex,
+    real_text: str,
+    real_texts: Mapping[BCCWJSentIndex, str],
+    corpus_id_str: str,
+) -> str:
+    """
+    Append to `real_text` the texts to be read along with it, if any.
+    """
+    if not (idxs_next := IDX_READ_ALSO.get(idx)):
+        return real_text
+
+    parts = [real_text]
+    for idx_next in idxs_next:
+        if next_real_text := real_texts.get(idx_next, ""):
+            parts.append(next_real_text)
+            logger.info(
+                f"Concatenated the next real text {idx_next} for {corpus_id_str}"
+            )
+        else:
+            logger.info(
+                f"Cannot find the next real text {idx_next} for {corpus_id_str}"
+            )
+    return "".join(parts)
+
+
+def get_real_texts(
+    idxs: Sequence[BCCWJSentIndex | None],
+    real_texts: Mapping[BCCWJSentIndex, str],
+    corpus_ids: Sequence[ABCTComp_BCCWJ_ID | str] | None = None,
+) -> list[str | None]:
+    """
+    Look up the real texts of `idxs` at once.
+    None is given for the indices that are None or not found.
+
+    Unlike `get_real_text`, nothing is logged for the texts not found.
+    """
+    keys = set(idx for idx in idxs if idx is not None)
+    for idx in tuple(keys):
+        keys.update(IDX_READ_ALSO.get(idx, ()))
+
+    if isinstance(real_texts, (BCCWJSentStore, BCCWJSentStack)):
+        found = real_texts.get_many(keys)
+    else:
+        found = {key: text for key in keys if (text := real_texts.get(key))}
+
+    result: list[str | None] = []
+    for i, idx in enumerate(idxs):
+        if idx is None or not (real_text := found.get(idx)):
+            result.append(None)
+        elif idx not in IDX_READ_ALSO:
+            result.append(real_text)
+        else:
+            result.append(
+                _join_read_also(
+                    idx,
+                    real_text,
+                    found,
+                    str(corpus_ids[i]) if corpus_ids else "[UNKNOWN]",
+                )
+            )
+    return result
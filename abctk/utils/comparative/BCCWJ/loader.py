@@ -1,17 +1,29 @@
-import io
 import sys
 import re
 from pathlib import Path
-from typing import Iterable, NamedTuple, TextIO, Any, Iterator
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Collection,
+    Iterable,
+    NamedTuple,
+    TextIO,
+    Any,
+    Iterator,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 import zipfile
 
-import lxml.etree as etree
-from tqdm import tqdm
+if TYPE_CHECKING:
+    import lxml.etree as etree
 
-from abctk.obj.comparative import ABCTComp_BCCWJ_ID
+    from abctk.utils.comparative.BCCWJ.sentences import BCCWJSentences
+
+from abctk.obj.comparative import ABCTComp_BCCWJ_ID, CompRecord
+
+from abctk.utils.comparative.profiling import profiler
 
 StartPos_UNKNOWN = -1
 _RE_WS = re.compile(r"\s+")
@@ -22,65 +34,292 @@ class BCCWJSentIndex(NamedTuple):
     sent_start_pos: int
 
 
-def load_BCCWJ(
-    corpus_folder: Path | str,
-    tqdm_buffer: TextIO = sys.stderr,
+def iter_M_XML_sentences(
+    fp: IO[bytes],
+) -> Iterator[tuple[BCCWJSentIndex, str]]:
+    """
+    Read an M-XML file incrementally and yield its sentences.
+
+    Each sentence is yielded as soon as it is closed,
+    after which the parsed elements are discarded,
+    so that only one sentence is kept in memory at a time.
+    Nested sentences are yielded in the document order
+    when the outermost one is closed.
+    """
+    import lxml.etree as etree
+
+    sampleIDs: list[str] = []
+
+    # The sentences being read, innermost last.
+    # None stands for a sentence outside any <mergedSample>.
+    sents_open: list[_SentenceBuffer | None] = []
+
+    # The sentences to be yielded, in the document order.
+    sents_pending: list[_SentenceBuffer] = []
+
+    text_of_SUW = profiler.wrap("BCCWJ.strip", _text_of_SUW)
+
+    for event, elem in etree.iterparse(
+        profiler.reader("BCCWJ.decompress", fp),
+        events=("start", "end"),
+        tag=("mergedSample", "sentence", "SUW"),
+    ):
+        match event, elem.tag:
+            case "start", "mergedSample":
+                sampleIDs.append(elem.get("sampleID", "<NO_SAMPLE_ID>"))
+            case "end", "mergedSample":
+                sampleIDs.pop()
+                elem.clear()
+            case "start", "sentence":
+                if sampleIDs:
+                    sent = _SentenceBuffer(sampleIDs[-1])
+                    sents_open.append(sent)
+                    sents_pending.append(sent)
+                else:
+                    sents_open.append(None)
+            case "end", "sentence":
+                sents_open.pop()
+                if sents_pending and not any(sents_open):
+                    for sent in sents_pending:
+                        yield sent.index(), "".join(sent.chunks)
+                    sents_pending.clear()
+
+                    elem.clear()
+                    while (prev := elem.getprevious()) is not None:
+                        prev.getparent().remove(prev)
+            case "end", "SUW":
+                text = text_of_SUW(elem)
+                for sent in sents_open:
+                    if sent is not None:
+                        if sent.first_pos is None:
+                            sent.first_pos = (
+                                int(pos_str)
+                                if (pos_str := elem.get("start"))
+                                else StartPos_UNKNOWN
+                            )
+                        sent.chunks.append(text)
+            case _:
+                pass
+
+
+def _text_of_SUW(elem: "etree._Element") -> str:
+    return _RE_WS.sub("", "".join(elem.itertext()))
+
+
+class _SentenceBuffer:
+    __slots__ = ("sampleID", "first_pos", "chunks")
+
+    def __init__(self, sampleID: str):
+        self.sampleID = sampleID
+        self.first_pos: int | None = None
+        self.chunks: list[str] = []
+
+    def index(self) -> BCCWJSentIndex:
+        return BCCWJSentIndex(
+            self.sampleID,
+            StartPos_UNKNOWN if self.first_pos is None else self.first_pos,
+        )
+
+
+def _extract_sentences(
+    zipf: zipfile.ZipFile,
+    member: zipfile.ZipInfo | str,
 ) -> dict[BCCWJSentIndex, str]:
-    corpus_folder = Path(corpus_folder)
-    BCCWJ_sentences: dict[BCCWJSentIndex, str] = dict()
+    """
+    Extract all the sentences in an M-XML file contained in `zipf`.
+    """
+    with zipf.open(member, "r") as f:
+        return dict(profiler.iterate("BCCWJ.parse", iter_M_XML_sentences(f)))
+
+
+_worker_zipf: zipfile.ZipFile | None = None
+"""
+The zip archive opened once per worker process of the parallel loader.
+"""
+
 
+def _init_worker(path_zip: Path) -> None:
+    global _worker_zipf
+    _worker_zipf = zipfile.ZipFile(path_zip, "r")
+
+
+def _extract_sentences_in_worker(member: str) -> dict[BCCWJSentIndex, str]:
+    if _worker_zipf is None:
+        raise RuntimeError("The worker process is not initialized")
+    return _extract_sentences(_worker_zipf, member)
+
+
+def _locate_LB_zip(corpus_folder: Path | str) -> Path:
     path_LB_zip = Path(f"{corpus_folder}/M-XML_OT/LB.zip")
     if not path_LB_zip.exists():
         raise FileNotFoundError(
             f"{path_LB_zip.absolute()} is not found. "
             "Please check if you specified the correct path to Disc 3 of the BCCWJ corpus."
         )
+    return path_LB_zip
+
+
+def _list_M_XML(
+    zipf: zipfile.ZipFile,
+    path_zip: Path,
+    sampleIDs: Collection[str] | None = None,
+) -> tuple[zipfile.ZipInfo, ...]:
+    xml_list = tuple(fp for fp in zipf.infolist() if Path(fp.filename).suffix == ".xml")
+
+    logger.info(f"Found {len(xml_list)} M-XML files in {path_zip.absolute()}.")
+
+    if sampleIDs is not None:
+        # Each M-XML file is named after the sample it contains.
+        # Only the central directory of the archive is read here,
+        # so that the other files are never decompressed.
+        xml_list = tuple(fp for fp in xml_list if Path(fp.filename).stem in sampleIDs)
+        if missing := set(sampleIDs).difference(
+            Path(fp.filename).stem for fp in xml_list
+        ):
+            logger.warning(
+                f"Cannot find M-XML files for the samples: {' '.join(sorted(missing))}"
+            )
+        logger.info(f"Selected {len(xml_list)} M-XML files for the required samples.")
+    logger.info(
+        f"List of the M-XML files: {' '.join(str(fp.filename) for fp in xml_list)}"
+    )
+    return xml_list
+
+
+def _progress_options(total: int, tqdm_buffer: TextIO) -> dict[str, Any]:
+    return dict(
+        desc="Loading the BCCWJ corpus",
+        total=total,
+        unit="file(s)",
+        file=tqdm_buffer,
+    )
+
+
+def iter_BCCWJ(
+    corpus_folder: Path | str,
+    tqdm_buffer: TextIO = sys.stderr,
+    sampleIDs: Collection[str] | None = None,
+) -> Iterator[tuple[BCCWJSentIndex, str]]:
+    """
+    Yield the sentences of the LB subcorpus from Disc 3 of the BCCWJ corpus
+    one by one, without holding more than one sentence in memory.
+
+    If `sampleIDs` is given, only the M-XML files of these samples are read.
+    """
+    from tqdm import tqdm
+
+    path_LB_zip = _locate_LB_zip(corpus_folder)
     with zipfile.ZipFile(path_LB_zip, "r") as zipf:
-        xml_list = tuple(
-            fp for fp in zipf.infolist() if Path(fp.filename).suffix == ".xml"
-        )
+        xml_list = _list_M_XML(zipf, path_LB_zip, sampleIDs)
+
+        for fp in tqdm(xml_list, **_progress_options(len(xml_list), tqdm_buffer)):
+            with zipf.open(fp, "r") as f:
+                yield from profiler.iterate("BCCWJ.parse", iter_M_XML_sentences(f))
+
 
-        logger.info(f"Found {len(xml_list)} M-XML files in {path_LB_zip.absolute()}.")
-        logger.info(
-            f"List of the M-XML files: {' '.join(str(fp.filename) for fp in xml_list)}"
+def load_BCCWJ(
+    corpus_folder: Path | str,
+    tqdm_buffer: TextIO = sys.stderr,
+    jobs: int = 1,
+    sampleIDs: Collection[str] | None = None,
+    cache_dir: Path | str | None = None,
+) -> "BCCWJSentences":
+    """
+    Load the sentences of the LB subcorpus from Disc 3 of the BCCWJ corpus
+    into a compact mapping.
+
+    With `jobs` > 1, the M-XML files are parsed in that many worker processes.
+    The result does not depend on `jobs`.
+    If `sampleIDs` is given, only the M-XML files of these samples are read.
+    If `cache_dir` is given, the sentences of each M-XML file are cached there
+    and reused as long as the file is unchanged.
+    """
+    from abctk.utils.comparative.BCCWJ.sentences import BCCWJSentences
+
+    if jobs <= 1 and cache_dir is None:
+        return BCCWJSentences(iter_BCCWJ(corpus_folder, tqdm_buffer, sampleIDs))
+
+    from tqdm import tqdm
+
+    cache = None
+    if cache_dir is not None:
+        from abctk.utils.comparative.BCCWJ.cache import MemberCache
+
+        cache = MemberCache(cache_dir)
+
+    path_LB_zip = _locate_LB_zip(corpus_folder)
+    with zipfile.ZipFile(path_LB_zip, "r") as zipf, tqdm(
+        **_progress_options(0, tqdm_buffer)
+    ) as progress:
+        xml_list = _list_M_XML(zipf, path_LB_zip, sampleIDs)
+        progress.reset(total=len(xml_list))
+
+        results: list[dict[BCCWJSentIndex, str] | None] = []
+        with profiler.phase("BCCWJ.cache-lookup"):
+            for fp in xml_list:
+                results.append(cache.get(fp) if cache else None)
+                if results[-1] is not None:
+                    progress.update()
+        xml_to_parse = tuple(
+            fp for fp, sentences in zip(xml_list, results) if sentences is None
         )
+        if cache:
+            logger.info(
+                f"Found {len(xml_list) - len(xml_to_parse)} M-XML files "
+                f"in the cache {cache.cache_dir}."
+            )
 
-        for fp in tqdm(
-            xml_list,
-            desc="Loading the BCCWJ corpus",
-            total=len(xml_list),
-            unit="file(s)",
-            file=tqdm_buffer,
-        ):
-            with io.TextIOWrapper(
-                zipf.open(fp, "r"),
-                encoding="utf-8",
-                newline="\r\n",
-            ) as f:
-                doc = etree.parse(f)
-                for mergedSample in doc.xpath("//mergedSample"):
-                    sampleID: str = mergedSample.attrib.get(
-                        "sampleID", "<NO_SAMPLE_ID>"
-                    )
-
-                    for sent in mergedSample.xpath(".//sentence"):
-                        suws = tuple(sent.xpath(".//SUW"))
-                        first_pos = (
-                            int(pos_str)
-                            if suws and (pos_str := suws[0].get("start"))
-                            else StartPos_UNKNOWN
-                        )
-
-                        BCCWJ_sentences[BCCWJSentIndex(sampleID, first_pos)] = "".join(
-                            _RE_WS.sub("", "".join(s.itertext())) for s in suws
-                        )
-
-    return BCCWJ_sentences
+        if jobs > 1 and xml_to_parse:
+            logger.info(f"Parsing the M-XML files with {jobs} worker processes.")
+            from concurrent.futures import ProcessPoolExecutor
+
+            executor = ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=(path_LB_zip,),
+            )
+            # Only the time spent waiting for the workers is measured here.
+            parsed = profiler.iterate(
+                "BCCWJ.parse-workers",
+                executor.map(
+                    _extract_sentences_in_worker,
+                    (fp.filename for fp in xml_to_parse),
+                ),
+            )
+        else:
+            executor = None
+            parsed = (_extract_sentences(zipf, fp) for fp in xml_to_parse)
+
+        try:
+            # Both ways yield the results in the order of `xml_to_parse`,
+            # which keeps the merged dictionary deterministic.
+            results_parsed = iter(parsed)
+            for i, sentences in enumerate(results):
+                if sentences is None:
+                    results[i] = sentences = next(results_parsed)
+                    if cache:
+                        with profiler.phase("BCCWJ.cache-write"):
+                            cache.put(xml_list[i], sentences)
+                    progress.update()
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+    with profiler.phase("BCCWJ.merge"):
+        return BCCWJSentences(
+            item for sentences in results if sentences for item in sentences.items()
+        )
 
 
 def extract_IDs_from_annotations(
-    annotations: Iterable[dict[str, Any]]
+    annotations: Iterable[CompRecord | dict[str, Any]]
 ) -> Iterator[ABCTComp_BCCWJ_ID]:
     yield from filter(
-        None, (ABCTComp_BCCWJ_ID.from_string(record["ID"]) for record in annotations)
+        None,
+        (
+            ABCTComp_BCCWJ_ID.from_string(
+                record["ID"] if isinstance(record, dict) else record.ID
+            )
+            for record in annotations
+        ),
     )
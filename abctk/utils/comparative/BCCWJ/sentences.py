@@ -0,0 +1,105 @@
+"""
+A compact in-memory mapping of BCCWJ sentences.
+
+A dict keyed by `BCCWJSentIndex` spends a tuple, an int and a str object
+and a slot of its hash table on each sentence.
+`BCCWJSentences` instead keeps, for each sample,
+the sorted start positions of its sentences in an array
+and their texts concatenated into a single string with their end offsets,
+so that a sentence costs 12 bytes besides its text.
+The sampleIDs are interned and stored once.
+
+The texts of a sample are joined separately from those of the others
+so that a character outside the BMP in one sentence
+only widens the string of its own sample.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping
+import sys
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+
+
+class _Sample:
+    __slots__ = ("positions", "offsets", "text")
+
+    def __init__(self, texts: dict[int, str]):
+        self.positions = array("q", sorted(texts))
+        """
+        The start positions of the sentences, sorted.
+        """
+
+        self.offsets = array("I", [0])
+        """
+        The offsets of the sentences in `text`, followed by the length of `text`.
+        """
+
+        parts: list[str] = []
+        offset = 0
+        for pos in self.positions:
+            parts.append(texts[pos])
+            offset += len(parts[-1])
+            self.offsets.append(offset)
+        self.text = "".join(parts)
+
+
+class BCCWJSentences(Mapping[BCCWJSentIndex, str]):
+    """
+    A read-only mapping from sentence indices to texts held compactly in memory.
+
+    It is made of (index, text) pairs;
+    a later text replaces an earlier one with the same index, as in a dict.
+    It is iterated in the order of the sampleIDs and then of the start positions.
+    """
+
+    def __init__(self, sentences: Iterable[tuple[BCCWJSentIndex, str]] = ()):
+        texts_by_sample: dict[str, dict[int, str]] = {}
+        for (sampleID, pos), text in sentences:
+            texts_by_sample.setdefault(sampleID, {})[pos] = text
+
+        self._samples: dict[str, _Sample] = {}
+        self._length = 0
+        for sampleID in sorted(texts_by_sample):
+            # Dropped while going so that the texts are not held twice.
+            sample = _Sample(texts_by_sample.pop(sampleID))
+            self._samples[sys.intern(sampleID)] = sample
+            self._length += len(sample.positions)
+
+    @property
+    def sampleIDs(self) -> Iterable[str]:
+        """
+        The sampleIDs of the sentences, sorted.
+        """
+        return self._samples.keys()
+
+    def get(self, key, default=None):
+        try:
+            sampleID, pos = key
+        except (TypeError, ValueError):
+            return default
+        if not isinstance(pos, int) or (sample := self._samples.get(sampleID)) is None:
+            return default
+
+        positions = sample.positions
+        j = bisect_left(positions, pos)
+        if j == len(positions) or positions[j] != pos:
+            return default
+        return sample.text[sample.offsets[j] : sample.offsets[j + 1]]
+
+    def __getitem__(self, key: BCCWJSentIndex) -> str:
+        if (text := self.get(key)) is None:
+            raise KeyError(key)
+        return text
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[BCCWJSentIndex]:
+        for sampleID, sample in self._samples.items():
+            for pos in sample.positions:
+                yield BCCWJSentIndex(sampleID, pos)
@@ -0,0 +1,139 @@
+"""
+Several mappings of BCCWJ sentences, e.g. cache files, looked up as one.
+
+The mappings are stacked in order, and a later one takes precedence
+sample by sample:
+a sample is looked up only in the last mapping that has it,
+so that a sample parsed again, e.g. from a corrected release of the corpus,
+replaces the old one as a whole, including the sentences it no longer has.
+
+Nothing is copied out of the mappings;
+only a table from the sampleIDs to their mappings is held in memory.
+"""
+
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+import contextlib
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.BCCWJ.sentences import BCCWJSentences
+from abctk.utils.comparative.BCCWJ.store import BCCWJSentStore
+
+
+def _sampleIDs_of(sentences: Mapping[BCCWJSentIndex, str]) -> Iterable[str]:
+    if isinstance(sentences, (BCCWJSentStore, BCCWJSentences, BCCWJSentStack)):
+        return sentences.sampleIDs
+    else:
+        return {key.sampleID for key in sentences}
+
+
+class BCCWJSentStack(Mapping[BCCWJSentIndex, str]):
+    """
+    A read-only mapping looking up each sample in the last of `layers` that has it.
+    """
+
+    def __init__(self, layers: Sequence[Mapping[BCCWJSentIndex, str]]):
+        self.layers = tuple(layers)
+
+        self._owners: dict[str, Mapping[BCCWJSentIndex, str]] = {}
+        for i, layer in enumerate(self.layers):
+            replaced = 0
+            for sampleID in _sampleIDs_of(layer):
+                replaced += sampleID in self._owners
+                self._owners[sampleID] = layer
+            if replaced:
+                logger.info(
+                    f"Layer #{i} replaces {replaced} samples of the ones below."
+                )
+        self._length: int | None = None
+
+    @property
+    def sampleIDs(self) -> Iterable[str]:
+        return self._owners.keys()
+
+    def close(self) -> None:
+        """
+        Close the layers that can be closed, e.g. `BCCWJSentStore`s.
+        """
+        for layer in self.layers:
+            if isinstance(layer, BCCWJSentStore):
+                layer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def get(self, key, default=None):
+        try:
+            owner = self._owners.get(key[0])
+        except (TypeError, IndexError, KeyError):
+            return default
+        if owner is None:
+            return default
+        return owner.get(key, default)
+
+    def __getitem__(self, key: BCCWJSentIndex) -> str:
+        if (text := self.get(key)) is None:
+            raise KeyError(key)
+        return text
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def get_many(self, keys: Iterable[BCCWJSentIndex]) -> dict[BCCWJSentIndex, str]:
+        """
+        Look up `keys` at once, leaving out the ones not found.
+        The keys are passed on to the layer owning their samples in one go.
+        """
+        keys_by_layer: dict[int, list[BCCWJSentIndex]] = {}
+        for key in keys:
+            if (owner := self._owners.get(key.sampleID)) is not None:
+                keys_by_layer.setdefault(id(owner), []).append(key)
+
+        found: dict[BCCWJSentIndex, str] = {}
+        for layer in self.layers:
+            if not (keys_layer := keys_by_layer.pop(id(layer), None)):
+                continue
+            if isinstance(layer, (BCCWJSentStore, BCCWJSentStack)):
+                found.update(layer.get_many(keys_layer))
+            else:
+                found.update(
+                    (key, text)
+                    for key in keys_layer
+                    if (text := layer.get(key)) is not None
+                )
+        return found
+
+    def __iter__(self) -> Iterator[BCCWJSentIndex]:
+        """
+        Iterate layer by layer over the sentences of the samples each owns.
+        """
+        for layer in self.layers:
+            owners = self._owners
+            for key in layer:
+                if owners[key.sampleID] is layer:
+                    yield key
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = sum(1 for _ in self)
+        return self._length
+
+
+def open_stores(paths: Sequence[Path | str]) -> BCCWJSentStore | BCCWJSentStack:
+    """
+    Open the store files at `paths`, stacked in that order if there are several.
+    """
+    if len(paths) == 1:
+        return BCCWJSentStore(paths[0])
+
+    with contextlib.ExitStack() as opened:
+        stores = [opened.enter_context(BCCWJSentStore(path)) for path in paths]
+        # Kept open once all of them are opened.
+        opened.pop_all()
+    return BCCWJSentStack(stores)
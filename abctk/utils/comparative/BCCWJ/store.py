@@ -0,0 +1,226 @@
+"""
+An on-disk store of BCCWJ sentences that is looked up without being loaded.
+
+The layout of a store file, where all the integers are little-endian:
+
+- header: the magic bytes, the number of sentences (u64),
+  the size of the sampleID table (u64) and a reserved field (u64)
+- sampleID table: the sorted sampleIDs joined by newlines in UTF-8
+- index: one record per sentence, sorted by (sampleID, sent_start_pos),
+  consisting of the position of the sampleID in the table (u32),
+  the start position (i64), the offset of the text (u64)
+  and the size of the text (u32)
+- texts: the UTF-8 encoded texts, concatenated
+
+The file is memory-mapped, the index is binary-searched,
+and only the texts asked for are decoded.
+"""
+
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+import mmap
+from pathlib import Path
+import struct
+from typing import BinaryIO
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+
+MAGIC = b"BCCWJST\x01"
+
+_HEADER = struct.Struct("<8sQQQ")
+_RECORD = struct.Struct("<IqQI")
+
+_RECORD_POSITION = "4xq12x"
+"""
+The start position in `_RECORD`, skipping the other fields.
+"""
+
+_SCAN_RATIO = 64
+"""
+`BCCWJSentStore.get_many` unpacks all the start positions of a sample
+if it is asked for at least one in this many sentences of the sample.
+"""
+
+
+class InvalidStoreError(ValueError):
+    pass
+
+
+def write_store(
+    sentences: Mapping[BCCWJSentIndex, str],
+    fp: BinaryIO,
+) -> None:
+    """
+    Write `sentences` to `fp` in the store format.
+    """
+    keys = sorted(sentences)
+    sampleIDs = sorted({k.sampleID for k in keys})
+    sampleID_numbers = {s: i for i, s in enumerate(sampleIDs)}
+    sampleIDs_encoded = "\n".join(sampleIDs).encode("utf-8")
+
+    fp.write(_HEADER.pack(MAGIC, len(keys), len(sampleIDs_encoded), 0))
+    fp.write(sampleIDs_encoded)
+
+    texts_encoded = tuple(sentences[k].encode("utf-8") for k in keys)
+    text_offset = 0
+    for key, text in zip(keys, texts_encoded):
+        fp.write(
+            _RECORD.pack(
+                sampleID_numbers[key.sampleID],
+                key.sent_start_pos,
+                text_offset,
+                len(text),
+            )
+        )
+        text_offset += len(text)
+
+    for text in texts_encoded:
+        fp.write(text)
+
+
+class _IndexKeys(Sequence[tuple[int, int]]):
+    """
+    A view of the (sampleID number, sent_start_pos) pairs in the index,
+    unpacked on demand for binary search.
+    """
+
+    def __init__(self, buffer: mmap.mmap, offset: int, length: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._length:
+            raise IndexError(i)
+        sample_no, pos, _, _ = _RECORD.unpack_from(
+            self._buffer, self._offset + i * _RECORD.size
+        )
+        return sample_no, pos
+
+
+class BCCWJSentStore(Mapping[BCCWJSentIndex, str]):
+    """
+    A read-only mapping from sentence indices to texts backed by a store file.
+    """
+
+    def __init__(self, path: Path | str):
+        self._file = open(path, "rb")
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            # An empty file cannot be mapped.
+            self._file.close()
+            raise InvalidStoreError(f"{path} is not a BCCWJ sentence store") from e
+
+        if len(self._buffer) < _HEADER.size or self._buffer[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise InvalidStoreError(
+                f"{path} is not a BCCWJ sentence store. "
+                "Please recreate it with the `BCCWJ cache` command."
+            )
+        _, self._length, sampleIDs_size, _ = _HEADER.unpack_from(self._buffer, 0)
+
+        offset = _HEADER.size
+        self._sampleIDs: list[str] = (
+            self._buffer[offset : offset + sampleIDs_size].decode("utf-8").split("\n")
+            if sampleIDs_size
+            else []
+        )
+        self._sampleID_numbers = {s: i for i, s in enumerate(self._sampleIDs)}
+
+        self._index_offset = offset + sampleIDs_size
+        self._texts_offset = self._index_offset + self._length * _RECORD.size
+        self._keys = _IndexKeys(self._buffer, self._index_offset, self._length)
+
+    @property
+    def sampleIDs(self) -> Sequence[str]:
+        """
+        The sampleIDs of the sentences, sorted.
+        """
+        return self._sampleIDs
+
+    def close(self) -> None:
+        if not self._buffer.closed:
+            self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _find(self, key) -> int | None:
+        try:
+            sampleID, pos = key
+        except (TypeError, ValueError):
+            return None
+        if (sample_no := self._sampleID_numbers.get(sampleID)) is None:
+            return None
+
+        i = bisect_left(self._keys, (sample_no, pos))
+        if i < self._length and self._keys[i] == (sample_no, pos):
+            return i
+        else:
+            return None
+
+    def __getitem__(self, key: BCCWJSentIndex) -> str:
+        if (i := self._find(key)) is None:
+            raise KeyError(key)
+        return self._text_at(i)
+
+    def _text_at(self, i: int) -> str:
+        _, _, text_offset, text_size = _RECORD.unpack_from(
+            self._buffer, self._index_offset + i * _RECORD.size
+        )
+        start = self._texts_offset + text_offset
+        return self._buffer[start : start + text_size].decode("utf-8")
+
+    def get_many(self, keys: Iterable[BCCWJSentIndex]) -> dict[BCCWJSentIndex, str]:
+        """
+        Look up `keys` at once, leaving out the ones not found.
+
+        The keys are grouped by sample.
+        The start positions of a sample are unpacked at once
+        and searched in memory
+        if there are enough keys in the sample to make up for it.
+        """
+        keys_by_sample: dict[int, list[BCCWJSentIndex]] = {}
+        for key in keys:
+            if (sample_no := self._sampleID_numbers.get(key.sampleID)) is not None:
+                keys_by_sample.setdefault(sample_no, []).append(key)
+
+        found: dict[BCCWJSentIndex, str] = {}
+        for sample_no, keys_sample in keys_by_sample.items():
+            lo = bisect_left(self._keys, (sample_no, -(2**63)))
+            hi = bisect_left(self._keys, (sample_no + 1, -(2**63)), lo)
+
+            if len(keys_sample) * _SCAN_RATIO >= hi - lo:
+                positions = struct.unpack_from(
+                    "<" + _RECORD_POSITION * (hi - lo),
+                    self._buffer,
+                    self._index_offset + lo * _RECORD.size,
+                )
+                for key in keys_sample:
+                    j = bisect_left(positions, key.sent_start_pos)
+                    if j < len(positions) and positions[j] == key.sent_start_pos:
+                        found[key] = self._text_at(lo + j)
+            else:
+                for key in keys_sample:
+                    i = bisect_left(self._keys, (sample_no, key.sent_start_pos), lo, hi)
+                    if i < hi and self._keys[i] == (sample_no, key.sent_start_pos):
+                        found[key] = self._text_at(i)
+        return found
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) is not None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[BCCWJSentIndex]:
+        for sample_no, pos in self._keys:
+            yield BCCWJSentIndex(self._sampleIDs[sample_no], pos)
@@ -1,3 +1,8 @@
-import importlib.metadata as im
+def __getattr__(name: str):
+    # Reading the package metadata is slow,
+    # so it is put off until the version is asked for.
+    if name == "__version__":
+        import importlib.metadata as im
 
-__version__: str = im.version("abctk.utils.comparative")
+        return im.version("abctk.utils.comparative")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
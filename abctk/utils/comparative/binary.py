@@ -0,0 +1,316 @@
+"""
+A compact binary format of annotation records that can be seeked by record index.
+
+A file starts with `MAGIC` and consists of frames,
+each of which is a type byte, the size of the payload (u32) and the payload.
+All the integers are little-endian.
+
+- S: starts a segment, which is written by a single call of `write_records`,
+  and resets the labels
+- L: defines the next label of the segment, in UTF-8
+- R: a record (see `_encode_record`), whose spans refer to the labels by number
+- X: the index of the segment:
+  the number of the records (u64), their offsets (u64 each),
+  the offset of the S frame (u64) and the labels (length-prefixed UTF-8)
+- T: the offset of the X frame (u64), which ends the segment
+
+A reader of a pipe goes through the frames one by one.
+A reader of a file finds the segments from the T frame at the end,
+each segment preceded by the T frame of the previous one,
+and seeks to the record asked for.
+"""
+
+import itertools
+import struct
+from typing import BinaryIO, Iterable, Iterator
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.parallel import chunked
+
+MAGIC = b"ABCTCMP\x01"
+
+_FRAME = struct.Struct("<cI")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_TRAILER_SIZE = _FRAME.size + _U64.size
+
+_RECORD_HEADER = struct.Struct("<5I")
+"""
+The numbers of the comments, the tokens and the spans
+and the sizes of the ID and the ID in v1 in bytes.
+"""
+
+_TOKEN_SEP = "\0"
+
+_NONE = 0xFFFFFFFF
+"""
+The size standing for a missing ID in v1.
+"""
+
+BATCH_SIZE = 1024
+"""
+The number of records whose frames are written at once.
+"""
+
+
+def _encode_str(s: str) -> bytes:
+    b = s.encode("utf-8")
+    return _U32.pack(len(b)) + b
+
+
+def _encode_record(record: aoc.CompRecord, label_IDs: dict[str, int]) -> bytes:
+    """
+    Encode a record as:
+
+    - `_RECORD_HEADER`
+    - the start, the end and the label of each span (u32 each)
+    - the comments, each prefixed by its size in bytes (u32)
+    - the ID, the ID in v1 and the tokens joined by NUL, in UTF-8
+
+    so that the spans are unpacked at once and the tokens are split at once.
+    """
+    tokens = record.tokens
+    spans = record.comp
+    text = _TOKEN_SEP.join(tokens)
+    if text.count(_TOKEN_SEP) != max(len(tokens) - 1, 0):
+        raise ValueError(f"A token of {record.ID} contains NUL")
+    ID = str(record.ID).encode("utf-8")
+    ID_v1 = b"" if record.ID_v1 is None else record.ID_v1.encode("utf-8")
+    return b"".join(
+        (
+            _RECORD_HEADER.pack(
+                len(record.comments),
+                len(tokens),
+                len(spans),
+                len(ID),
+                _NONE if record.ID_v1 is None else len(ID_v1),
+            ),
+            struct.pack(
+                f"<{len(spans) * 3}I",
+                *itertools.chain.from_iterable(
+                    (span.start, span.end, label_IDs[span.label]) for span in spans
+                ),
+            ),
+            *(_encode_str(comment) for comment in record.comments),
+            ID,
+            ID_v1,
+            text.encode("utf-8"),
+        )
+    )
+
+
+def _decode_record(payload: bytes, labels: list[str]) -> aoc.CompRecord:
+    n_comments, n_tokens, n_spans, size_ID, size_ID_v1 = _RECORD_HEADER.unpack_from(
+        payload
+    )
+    span_fields = struct.unpack_from(f"<{n_spans * 3}I", payload, _RECORD_HEADER.size)
+    pos = _RECORD_HEADER.size + _U32.size * len(span_fields)
+
+    comments = []
+    for _ in range(n_comments):
+        (size,) = _U32.unpack_from(payload, pos)
+        pos += _U32.size
+        comments.append(payload[pos : pos + size].decode("utf-8"))
+        pos += size
+
+    ID = payload[pos : pos + size_ID].decode("utf-8")
+    pos += size_ID
+    if size_ID_v1 == _NONE:
+        ID_v1 = None
+    else:
+        ID_v1 = payload[pos : pos + size_ID_v1].decode("utf-8")
+        pos += size_ID_v1
+
+    tokens = payload[pos:].decode("utf-8").split(_TOKEN_SEP) if n_tokens else []
+
+    it = iter(span_fields)
+    comp = [
+        aoc.CompSpan(start=start, end=end, label=labels[label])
+        for start, end, label in zip(it, it, it)
+    ]
+
+    return aoc.CompRecord(
+        ID=ID,
+        tokens=tokens,
+        comp=comp,
+        comments=comments,
+        ID_v1=ID_v1,
+    )
+
+
+def _frame(type: bytes, payload: bytes) -> bytes:
+    return _FRAME.pack(type, len(payload)) + payload
+
+
+def write_records(
+    records: Iterable[aoc.CompRecord],
+    fp: BinaryIO,
+    continued: bool = False,
+) -> None:
+    """
+    Write `records` to `fp` as a segment.
+
+    With `continued`, the segment is appended to the ones
+    written to `fp` by previous calls, and `fp` has to be seekable.
+    Otherwise, `fp` may be a pipe.
+    """
+    # The offsets are counted here instead of asking `fp`, which may be a pipe.
+    if continued:
+        if not fp.seekable():
+            raise ValueError("The binary format can only be continued in a file")
+        pos = fp.tell()
+    else:
+        fp.write(MAGIC)
+        pos = len(MAGIC)
+
+    segment_start = pos
+    frame = _frame(b"S", b"")
+    fp.write(frame)
+    pos += len(frame)
+
+    label_IDs: dict[str, int] = {}
+    offsets: list[int] = []
+    for batch in chunked(records, BATCH_SIZE):
+        frames: list[bytes] = []
+        for record in batch:
+            for span in record.comp:
+                if span.label not in label_IDs:
+                    label_IDs[span.label] = len(label_IDs)
+                    frame = _frame(b"L", span.label.encode("utf-8"))
+                    frames.append(frame)
+                    pos += len(frame)
+            frame = _frame(b"R", _encode_record(record, label_IDs))
+            frames.append(frame)
+            offsets.append(pos)
+            pos += len(frame)
+        fp.write(b"".join(frames))
+
+    index_start = pos
+    fp.write(
+        _frame(
+            b"X",
+            b"".join(
+                (
+                    struct.pack(
+                        f"<Q{len(offsets)}QQ", len(offsets), *offsets, segment_start
+                    ),
+                    *(_encode_str(label) for label in label_IDs),
+                )
+            ),
+        )
+    )
+    fp.write(_frame(b"T", _U64.pack(index_start)))
+
+
+def _read_frame(fp: BinaryIO) -> tuple[bytes, bytes] | None:
+    header = fp.read(_FRAME.size)
+    if not header:
+        return None
+    if len(header) < _FRAME.size:
+        raise ValueError("The binary annotation file is truncated")
+    type, size = _FRAME.unpack(header)
+    payload = fp.read(size)
+    if len(payload) < size:
+        raise ValueError("The binary annotation file is truncated")
+    return type, payload
+
+
+def _check_magic(fp: BinaryIO) -> None:
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary annotation file")
+
+
+def _iter_sequentially(fp: BinaryIO) -> Iterator[aoc.CompRecord]:
+    _check_magic(fp)
+    labels: list[str] = []
+    while frame := _read_frame(fp):
+        match frame:
+            case b"R", payload:
+                yield _decode_record(payload, labels)
+            case b"L", payload:
+                labels.append(payload.decode("utf-8"))
+            case b"S", _:
+                labels = []
+            case _:
+                pass
+
+
+class _Segment:
+    __slots__ = ("offsets", "labels")
+
+    def __init__(self, offsets: tuple[int, ...], labels: list[str]):
+        self.offsets = offsets
+        self.labels = labels
+
+
+def _read_segments(fp: BinaryIO) -> list[_Segment]:
+    """
+    Read the indices of all the segments of a seekable file, first to last.
+    """
+    fp.seek(0)
+    _check_magic(fp)
+
+    segments: list[_Segment] = []
+    end = fp.seek(0, 2)
+    while end > len(MAGIC):
+        fp.seek(end - _TRAILER_SIZE)
+        match _read_frame(fp):
+            case b"T", payload:
+                (index_start,) = _U64.unpack(payload)
+            case _:
+                raise ValueError("The binary annotation file is truncated")
+
+        fp.seek(index_start)
+        match _read_frame(fp):
+            case b"X", payload:
+                pass
+            case _:
+                raise ValueError("The index of the binary annotation file is broken")
+
+        (n_records,) = _U64.unpack_from(payload, 0)
+        *offsets, segment_start = struct.unpack_from(f"<{n_records + 1}Q", payload, 8)
+        pos = _U64.size * (n_records + 2)
+        labels = []
+        while pos < len(payload):
+            (size,) = _U32.unpack_from(payload, pos)
+            pos += _U32.size
+            labels.append(payload[pos : pos + size].decode("utf-8"))
+            pos += size
+
+        segments.append(_Segment(tuple(offsets), labels))
+        end = segment_start
+    segments.reverse()
+    return segments
+
+
+def read_records(
+    fp: BinaryIO,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[aoc.CompRecord]:
+    """
+    Read the records from `start` to `stop` (exclusive) from `fp`.
+
+    If `fp` is seekable, the reading starts at the record `start`
+    without going through the ones before it.
+    """
+    if not fp.seekable():
+        yield from itertools.islice(_iter_sequentially(fp), start, stop)
+        return
+
+    index = 0
+    for segment in _read_segments(fp):
+        for offset in segment.offsets:
+            if stop is not None and index >= stop:
+                return
+            if index >= start:
+                fp.seek(offset)
+                match _read_frame(fp):
+                    case b"R", payload:
+                        yield _decode_record(payload, segment.labels)
+                    case _:
+                        raise ValueError(
+                            "The index of the binary annotation file is broken"
+                        )
+            index += 1
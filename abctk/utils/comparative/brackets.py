@@ -0,0 +1,165 @@
+"""
+Parsing bracketed annotations a batch of records at a time.
+
+A bracketed annotation is a line of tokens separated by single spaces,
+where a span opens with `[` before its first token
+and closes with `]LABEL` right after its last token,
+e.g. `[[太郎 より]prej 背 が]deg 高い`.
+
+`CompRecord.from_brackets` in abctk.obj goes through a general grammar.
+The plain annotations above are split here with a few string operations instead,
+and every record so made is checked by writing it back with `CompRecord.to_brackets`:
+as abctk.obj reads back what it writes,
+a record written back to the annotation it is made of
+is the one abctk.obj reads from it.
+The other annotations are left to abctk.obj.
+
+Writing back does not tell the order of the spans in a record, however.
+The order abctk.obj lists them in is found by having it read `_PROBE` once,
+and the spans split here are sorted in that order;
+if it is none of `_SPAN_ORDERS`, every annotation is left to abctk.obj.
+"""
+
+import functools
+import re
+from typing import Any, Callable
+
+import abctk.obj.comparative as aoc
+
+BATCH_SIZE = 1024
+"""
+The number of records parsed at once.
+"""
+
+_RE_PIECE = re.compile(r"(\[*)([^\s\[\]]+)((?:\][a-z0-9\-]+)*)")
+"""
+A token with the brackets opened before it and closed after it,
+with labels of lowercase letters, digits and hyphens as in the annotation scheme.
+"""
+
+_RE_IRREGULAR = re.compile(r"[^\S ]|  |^ | $|^$")
+"""
+Whitespace other than single spaces between tokens, or an empty annotation.
+"""
+
+_PROBE = "[[[a]x b]y [c [d]z]w e]v [[f]t]s"
+"""
+An annotation with nested and sibling spans,
+spans of the same start, of the same end and of the same tokens.
+"""
+
+_SPAN_ORDERS: tuple[Callable[[list[aoc.CompSpan]], list[aoc.CompSpan]], ...] = (
+    # As closed, which is how `parse` lists them, i.e. by (end, -start).
+    lambda comp: comp,
+    # As opened.
+    lambda comp: sorted(comp, key=lambda s: (s.start, -s.end)),
+    lambda comp: sorted(comp, key=lambda s: (s.start, s.end)),
+    lambda comp: sorted(comp, key=lambda s: (s.end, s.start)),
+    lambda comp: sorted(comp, key=lambda s: (s.start, s.end, s.label)),
+    lambda comp: sorted(comp, key=lambda s: (s.label, s.start, s.end)),
+)
+"""
+The orders of spans abctk.obj may list them in, from the order they are closed in.
+"""
+
+
+def parse(annot: str) -> tuple[list[str], list[aoc.CompSpan]] | None:
+    """
+    Split a plain bracketed annotation into its tokens and spans.
+    Returns None if `annot` is out of the plain syntax.
+    """
+    if _RE_IRREGULAR.search(annot) or not annot.isprintable():
+        return None
+
+    tokens: list[str] = []
+    comp: list[aoc.CompSpan] = []
+    opened: list[int] = []
+    for piece in annot.split(" "):
+        if "[" not in piece and "]" not in piece:
+            tokens.append(piece)
+            continue
+
+        if not (m := _RE_PIECE.fullmatch(piece)):
+            return None
+        opens, token, closes = m.groups()
+        opened.extend([len(tokens)] * len(opens))
+        tokens.append(token)
+        if closes:
+            for label in closes[1:].split("]"):
+                if not opened:
+                    return None
+                comp.append(
+                    aoc.CompSpan(start=opened.pop(), end=len(tokens), label=label)
+                )
+    if opened:
+        return None
+    return tokens, comp
+
+
+@functools.cache
+def span_order() -> Callable[[list[aoc.CompSpan]], list[aoc.CompSpan]] | None:
+    """
+    The one of `_SPAN_ORDERS` abctk.obj lists spans in,
+    or None if it is none of them.
+    """
+    parsed = parse(_PROBE)
+    assert parsed is not None
+    try:
+        expected = aoc.CompRecord.from_brackets(line=_PROBE, ID="probe").comp
+    except Exception:
+        return None
+    for order in _SPAN_ORDERS:
+        if order(list(parsed[1])) == expected:
+            return order
+    return None
+
+
+def _from_bracketed(item: dict[str, Any]) -> aoc.CompRecord:
+    return aoc.CompRecord.from_brackets(
+        line=item["annot"],
+        ID=item["ID"],
+        comments=item.get("comments"),
+        ID_v1=item.get("ID_v1"),
+    )
+
+
+def _from_plain(item: dict[str, Any]) -> aoc.CompRecord | None:
+    """
+    Make a record out of a plain bracketed annotation,
+    or return None if the annotation is not plain
+    or abctk.obj does not write the record back to it.
+    """
+    annot = item["annot"]
+    comments = item.get("comments")
+    # How abctk.obj fills in missing comments is up to it.
+    if (
+        not isinstance(comments, list)
+        or (order := span_order()) is None
+        or (parsed := parse(annot)) is None
+    ):
+        return None
+
+    tokens, comp = parsed
+    record = aoc.CompRecord(
+        ID=item["ID"],
+        tokens=tokens,
+        comp=order(comp),
+        comments=comments,
+        ID_v1=item.get("ID_v1"),
+    )
+    if record.to_brackets() != annot:
+        return None
+    return record
+
+
+def from_bracketed_batch(items: list[dict[str, Any]]) -> list[aoc.CompRecord]:
+    """
+    Make records out of the bracketed annotations in `items`,
+    which are dicts with the keys `annot`, `ID`, `comments` and `ID_v1`.
+    """
+    records: list[aoc.CompRecord] = []
+    for item in items:
+        if (record := _from_plain(item)) is None:
+            record = _from_bracketed(item)
+        records.append(record)
+    return records
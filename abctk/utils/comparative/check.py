@@ -0,0 +1,186 @@
+"""
+Checking annotation records for problems, e.g. before a release,
+a chunk of records at a time.
+
+Each record is checked on its own by `check_records`, which can run in worker processes,
+for:
+
+- an ID that is empty, has whitespace in it,
+  or looks like a BCCWJ one but cannot be parsed as such,
+- spans that are empty or out of the bounds of the tokens,
+- given the real texts,
+  tokens whose total length differs from that of the real text of the record,
+  or which differ from the real text if they are decrypted.
+
+Whether the IDs are unique is checked across the chunks by `DuplicateIDs`.
+"""
+
+from collections import Counter
+import dataclasses
+from dataclasses import dataclass
+from enum import Enum
+import re
+from typing import Iterable, Mapping
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.BCCWJ.incorp import get_real_texts
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+
+
+class IssueKind(str, Enum):
+    MALFORMED_ID = "malformed-ID"
+    DUPLICATE_ID = "duplicate-ID"
+    EMPTY_SPAN = "empty-span"
+    SPAN_OUT_OF_BOUNDS = "span-out-of-bounds"
+    TEXT_NOT_FOUND = "text-not-found"
+
+    TEXT_LONGER = "text-longer"
+    """
+    The real text is longer than the tokens.
+    """
+
+    TEXT_SHORTER = "text-shorter"
+    """
+    The real text is shorter than the tokens.
+    """
+
+    TEXT_DIFFERENT = "text-different"
+    """
+    The tokens are decrypted but are not the real text.
+    """
+
+
+@dataclass
+class Issue:
+    index: int
+    """
+    The position of the record in the input, from 0.
+    """
+
+    ID: str
+    kind: IssueKind
+    detail: str | None = None
+
+
+_RE_WHITESPACE = re.compile(r"\s")
+
+ENCRYPTED_CHAR = "⛔"
+
+
+def check_records(
+    records: list[aoc.CompRecord],
+    start: int = 0,
+    real_texts: Mapping[BCCWJSentIndex, str] | None = None,
+) -> list[Issue]:
+    """
+    Check `records`, the first of which is at `start` in the input,
+    except for the uniqueness of their IDs.
+
+    The real texts are checked only if `real_texts` is given,
+    and only for the records with BCCWJ IDs.
+    """
+    issues: list[Issue] = []
+    idxs: list[BCCWJSentIndex | None] = []
+    for i, record in enumerate(records, start):
+        ID = str(record.ID) if record.ID is not None else ""
+
+        ID_parsed = aoc.ABCTComp_BCCWJ_ID.from_string(ID)
+        if not ID or _RE_WHITESPACE.search(ID):
+            issues.append(Issue(i, ID, IssueKind.MALFORMED_ID, "empty or with spaces"))
+        elif ID_parsed is None and "_BCCWJ_" in ID:
+            issues.append(Issue(i, ID, IssueKind.MALFORMED_ID, "not a BCCWJ ID"))
+        idxs.append(
+            BCCWJSentIndex(ID_parsed.sampleID, ID_parsed.start_pos)
+            if ID_parsed
+            else None
+        )
+
+        n = len(record.tokens)
+        for span in record.comp:
+            if span.start >= span.end:
+                kind = IssueKind.EMPTY_SPAN
+            elif span.start < 0 or span.end > n:
+                kind = IssueKind.SPAN_OUT_OF_BOUNDS
+            else:
+                continue
+            issues.append(
+                Issue(i, ID, kind, f"{span.label} [{span.start}, {span.end}) of {n}")
+            )
+
+    if real_texts is None:
+        return issues
+
+    found_texts = get_real_texts(
+        idxs, real_texts, corpus_ids=[record.ID for record in records]
+    )
+    for i, (record, idx, real_text) in enumerate(
+        zip(records, idxs, found_texts), start
+    ):
+        if idx is None:
+            continue
+        if real_text is None:
+            issues.append(Issue(i, str(record.ID), IssueKind.TEXT_NOT_FOUND))
+            continue
+
+        text = "".join(record.tokens)
+        if len(text) < len(real_text):
+            kind = IssueKind.TEXT_LONGER
+        elif len(text) > len(real_text):
+            kind = IssueKind.TEXT_SHORTER
+        elif text != real_text and text != ENCRYPTED_CHAR * len(text):
+            kind = IssueKind.TEXT_DIFFERENT
+        else:
+            continue
+        issues.append(
+            Issue(i, str(record.ID), kind, f"{len(text)} of {len(real_text)} chars")
+        )
+
+    # In the order of the records
+    issues.sort(key=lambda issue: issue.index)
+    return issues
+
+
+class DuplicateIDs:
+    """
+    The IDs seen so far, to tell the duplicate ones.
+    """
+
+    def __init__(self):
+        self._seen: set[str] = set()
+
+    def check(self, records: Iterable[aoc.CompRecord], start: int = 0) -> list[Issue]:
+        issues: list[Issue] = []
+        seen = self._seen
+        for i, record in enumerate(records, start):
+            ID = str(record.ID) if record.ID is not None else ""
+            if not ID:
+                # Already told as malformed
+                continue
+            if ID in seen:
+                issues.append(Issue(i, ID, IssueKind.DUPLICATE_ID))
+            else:
+                seen.add(ID)
+        return issues
+
+
+@dataclass
+class CheckSummary:
+    records: int = 0
+    records_with_issues: int = 0
+    issues: Counter[IssueKind] = dataclasses.field(default_factory=Counter)
+
+    def add(self, count: int, issues: list[Issue]) -> None:
+        self.records += count
+        self.records_with_issues += len({issue.index for issue in issues})
+        self.issues.update(issue.kind for issue in issues)
+
+    def to_dict(self) -> dict:
+        return {
+            "records": self.records,
+            "records_with_issues": self.records_with_issues,
+            "issues": {kind.value: self.issues[kind] for kind in IssueKind},
+        }
+
+    def __str__(self) -> str:
+        return ", ".join(f"{self.issues[kind]} {kind.value}" for kind in IssueKind)
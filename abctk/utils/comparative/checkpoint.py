@@ -0,0 +1,194 @@
+"""
+Writing annotation files in chunks so that an interrupted run can be resumed.
+
+The records are written to PATH.part chunk by chunk.
+After each chunk, the number of the records written so far,
+the ID of the last one and the size of PATH.part are saved in PATH.checkpoint.
+When all the records are written,
+PATH.part is renamed to PATH and PATH.checkpoint is deleted,
+so that PATH never contains a truncated file.
+
+A compressed file gets a gzip member or a zstd frame per chunk,
+so that it can be truncated at a checkpoint as well.
+"""
+
+import dataclasses
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.compression import Compression, text_writer
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    write_file,
+)
+from abctk.utils.comparative.parallel import chunked
+
+CHUNK_SIZE = 10_000
+"""
+The default number of records written between two checkpoints.
+"""
+
+
+@dataclass
+class Checkpoint:
+    format: AnnotationFileFormat
+    style: AnnotationFileStyle
+    records: int
+    """
+    The number of the records written so far.
+    """
+    last_ID: str | None
+    """
+    The ID of the last record written.
+    """
+    size: int
+    """
+    The size of the part file in bytes after the last record.
+    """
+    compression: Compression = Compression.NONE
+
+
+def part_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.part")
+
+
+def checkpoint_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.checkpoint")
+
+
+def load_checkpoint(path: Path) -> Checkpoint | None:
+    """
+    Load the checkpoint of an interrupted write to `path`, if any.
+    """
+    path_checkpoint = checkpoint_path(path)
+    if not (path_checkpoint.exists() and part_path(path).exists()):
+        return None
+
+    with open(path_checkpoint, "r") as f:
+        d = json.load(f)
+    return Checkpoint(
+        format=AnnotationFileFormat(d["format"]),
+        style=AnnotationFileStyle(d["style"]),
+        records=d["records"],
+        last_ID=d["last_ID"],
+        size=d["size"],
+        compression=Compression(d.get("compression", Compression.NONE)),
+    )
+
+
+def _save_checkpoint(path: Path, checkpoint: Checkpoint) -> None:
+    path_checkpoint = checkpoint_path(path)
+    fd, path_temp = tempfile.mkstemp(
+        dir=path_checkpoint.parent,
+        prefix=f"{path_checkpoint.name}.",
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(dataclasses.asdict(checkpoint), f)
+        os.replace(path_temp, path_checkpoint)
+    except BaseException:
+        os.unlink(path_temp)
+        raise
+
+
+def write_file_resumable(
+    records: Iterable[aoc.CompRecord],
+    path: Path,
+    format: AnnotationFileFormat,
+    style: AnnotationFileStyle,
+    chunk_size: int = CHUNK_SIZE,
+    resume_from: Checkpoint | None = None,
+    compression: Compression = Compression.NONE,
+    compression_level: int | None = None,
+    threads: int = 1,
+    fsync: bool = False,
+) -> int:
+    """
+    Write `records` to `path` in UTF-8 with a checkpoint after every `chunk_size` records.
+
+    If `resume_from` is given, the records are appended to the part file
+    after the ones recorded in it.
+    `records` must not contain the records already written.
+
+    With `compression`, the file is compressed at `compression_level`,
+    zstd in `threads` threads.
+    The binary format cannot be compressed.
+
+    With `fsync`, the part file is flushed to the disk before each checkpoint,
+    so that the checkpoint survives a crash of the system as well.
+
+    Returns the number of the records in the file.
+    """
+    if format == AnnotationFileFormat.BINARY and compression != Compression.NONE:
+        raise ValueError("The binary format cannot be compressed")
+
+    path_part = part_path(path)
+    if resume_from:
+        if (resume_from.format, resume_from.style) != (format, style):
+            raise ValueError(
+                f"The interrupted write to {path} was in "
+                f"{resume_from.format.value}/{resume_from.style.value}, "
+                f"not in {format.value}/{style.value}"
+            )
+        if resume_from.compression != compression:
+            raise ValueError(
+                f"The interrupted write to {path} was compressed with "
+                f"{resume_from.compression.value}, not with {compression.value}"
+            )
+        # Anything written after the checkpoint is thrown away.
+        os.truncate(path_part, resume_from.size)
+        checkpoint = resume_from
+    else:
+        checkpoint = Checkpoint(
+            format=format,
+            style=style,
+            records=0,
+            last_ID=None,
+            size=0,
+            compression=compression,
+        )
+
+    def _writer(buffer):
+        return text_writer(buffer, compression, compression_level, threads)
+
+    with open(path_part, "ab" if resume_from else "wb") as f:
+        for chunk in chunked(records, chunk_size):
+            with _writer(f) as fp:
+                write_file(
+                    chunk,
+                    fp,
+                    format=format,
+                    style=style,
+                    continued=checkpoint.records > 0,
+                )
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+            checkpoint = dataclasses.replace(
+                checkpoint,
+                records=checkpoint.records + len(chunk),
+                last_ID=chunk[-1].ID,
+                size=f.tell(),
+            )
+            _save_checkpoint(path, checkpoint)
+            logger.debug(f"Checkpoint: {checkpoint.records} records written.")
+
+        if checkpoint.records == 0:
+            # An empty file still has the header, if any.
+            with _writer(f) as fp:
+                write_file([], fp, format=format, style=style)
+
+    os.replace(path_part, path)
+    checkpoint_path(path).unlink(missing_ok=True)
+    return checkpoint.records
@@ -1,6 +1,7 @@
 from pathlib import Path
-from typing import Annotated
-import pickle
+from typing import Annotated, List, Mapping, Optional
+import contextlib
+import os
 import sys
 import logging
 
@@ -9,10 +10,46 @@ logger = logging.getLogger(__name__)
 import typer
 
 import abctk.utils.comparative.BCCWJ.loader as gs
+from abctk.utils.comparative.BCCWJ.cache import MemberCache
+from abctk.utils.comparative.BCCWJ.incorp import get_required_sampleIDs
+from abctk.utils.comparative.BCCWJ.stack import BCCWJSentStack
+from abctk.utils.comparative.BCCWJ.store import BCCWJSentStore, write_store
+from abctk.utils.comparative.checkpoint import part_path
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+)
+from abctk.utils.comparative.profiling import profiler
 
 app = typer.Typer()
 
 
+def _dump_store(
+    sentences: Mapping[gs.BCCWJSentIndex, str],
+    output_file: Path,
+    confirm_overwrite: bool = True,
+) -> None:
+    if output_file == Path("-"):
+        if typer.confirm("Dump the corpus to STDOUT?"):
+            with profiler.phase("BCCWJ.write-store"):
+                write_store(sentences, sys.stdout.buffer)
+        else:
+            logger.info("Abort dumping the cache to STDOUT by the user.")
+    elif (
+        not confirm_overwrite
+        or not output_file.exists()
+        or typer.confirm(f"The file {output_file} already exists. Overwrite?")
+    ):
+        # Written aside first, as the file may be one of the caches being read.
+        with profiler.phase("BCCWJ.write-store"):
+            with open(part_path(output_file), "wb") as f:
+                write_store(sentences, f)
+        os.replace(part_path(output_file), output_file)
+    else:
+        logger.info(f"Abort dumping the cache to {output_file.absolute()} by the user.")
+
+
 @app.command("cache")
 def cmd_cache(
     corpus_folder: Annotated[
@@ -32,17 +69,200 @@ def cmd_cache(
             allow_dash=True,
         ),
     ],
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=1,
+            help="The number of processes parsing the corpus in parallel.",
+        ),
+    ] = 1,
+    samples: Annotated[
+        Optional[List[str]],
+        typer.Option(
+            "--sample",
+            help=(
+                "A sampleID, e.g. OC01_00001. If given, "
+                "only the samples given by this option or --only-for are cached. "
+                "Can be given more than once."
+            ),
+        ),
+    ] = None,
+    annotation_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--only-for",
+            file_okay=True,
+            dir_okay=False,
+            exists=True,
+            help=(
+                "An annotation file. "
+                "If given, only the samples needed for its records are cached."
+            ),
+        ),
+    ] = None,
+    annotation_format: Annotated[
+        AnnotationFileFormat,
+        typer.Option(
+            "--only-for-ext",
+            case_sensitive=False,
+            help="The format of the file given by --only-for.",
+        ),
+    ] = AnnotationFileFormat.TEXT,
+    annotation_style: Annotated[
+        AnnotationFileStyle,
+        typer.Option(
+            "--only-for-style",
+            case_sensitive=False,
+            help="The style of the file given by --only-for.",
+        ),
+    ] = AnnotationFileStyle.BRACKETED,
+    cache_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--cache-dir",
+            file_okay=False,
+            dir_okay=True,
+            help=(
+                "A folder to keep the parsed M-XML files in. "
+                "Unchanged files are not parsed again on the next run."
+            ),
+        ),
+    ] = None,
+    cache_max_size: Annotated[
+        Optional[int],
+        typer.Option(
+            "--cache-max-size",
+            min=0,
+            help=(
+                "The maximum size of the folder given by --cache-dir in MiB. "
+                "The least recently used entries are deleted beyond it."
+            ),
+        ),
+    ] = None,
+    onto: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--onto",
+            file_okay=True,
+            dir_okay=False,
+            exists=True,
+            help=(
+                "A cache file to add the samples parsed to. "
+                "They replace the ones of the same sampleIDs in it as a whole. "
+                "It can be the output file itself to update it in place."
+            ),
+        ),
+    ] = None,
 ):
-    corpus = gs.load_BCCWJ(corpus_folder)
-    if output_file == Path("-"):
-        if typer.confirm("Dump the corpus to STDOUT?"):
-            pickle.dump(corpus, sys.stdout.buffer)
-        else:
-            logger.info("Abort dumping pickle to STDOUT by the user.")
-    if not output_file.exists() or typer.confirm(
-        f"The file {output_file} already exists. Overwrite?"
-    ):
-        with open(output_file, "wb") as f:
-            pickle.dump(corpus, f)
+    """
+    Parse the BCCWJ corpus and write the sentences to a cache file.
+    """
+    sampleIDs = None
+    if samples:
+        sampleIDs = set(samples)
+    if annotation_file is not None:
+        # As by `annot load`; compressed files are decompressed by `load_file`.
+        mode = "rb" if annotation_format == AnnotationFileFormat.BINARY else "r"
+        with open(annotation_file, mode) as f:
+            sampleIDs_required = get_required_sampleIDs(
+                gs.extract_IDs_from_annotations(
+                    load_file(f, format=annotation_format, style=annotation_style)
+                )
+            )
+        logger.info(
+            f"{len(sampleIDs_required)} samples are required by "
+            f"{annotation_file.absolute()}."
+        )
+        sampleIDs = (sampleIDs or set()) | set(sampleIDs_required)
+
+    with profiler.phase("BCCWJ.load"):
+        corpus = gs.load_BCCWJ(
+            corpus_folder,
+            jobs=jobs,
+            sampleIDs=sampleIDs,
+            cache_dir=cache_dir,
+        )
+    profiler.count("BCCWJ.load", len(corpus))
+    if cache_dir is not None and cache_max_size is not None:
+        MemberCache(cache_dir).prune(cache_max_size * 2**20)
+
+    if onto is None:
+        _dump_store(corpus, output_file)
     else:
-        logger.info(f"Abort dumping pickle to {output_file.absolute()} by the user.")
+        with BCCWJSentStore(onto) as base:
+            _dump_store(
+                BCCWJSentStack([base, corpus]),
+                output_file,
+                confirm_overwrite=not _is_same_file(output_file, onto),
+            )
+
+
+def _is_same_file(path: Path, other: Path) -> bool:
+    return path != Path("-") and path.exists() and path.samefile(other)
+
+
+@app.command("merge-caches")
+def cmd_merge_caches(
+    cache_files: Annotated[
+        List[Path],
+        typer.Argument(
+            file_okay=True,
+            dir_okay=False,
+            exists=True,
+            help="Cache files made by `cache`.",
+        ),
+    ],
+    output_file: Annotated[
+        Path,
+        typer.Argument(
+            file_okay=True,
+            dir_okay=False,
+            allow_dash=True,
+        ),
+    ],
+):
+    """
+    Merge cache files into one.
+    Each sample is taken as a whole from the last file given that has it.
+    """
+    with contextlib.ExitStack() as stack:
+        stores = [stack.enter_context(BCCWJSentStore(path)) for path in cache_files]
+        _dump_store(
+            BCCWJSentStack(stores),
+            output_file,
+            confirm_overwrite=not any(
+                _is_same_file(output_file, path) for path in cache_files
+            ),
+        )
+
+
+@app.command("prune-cache")
+def cmd_prune_cache(
+    cache_dir: Annotated[
+        Path,
+        typer.Argument(
+            file_okay=False,
+            dir_okay=True,
+            exists=True,
+            help="A folder given to `cache --cache-dir`.",
+        ),
+    ],
+    max_size: Annotated[
+        int,
+        typer.Option(
+            "--max-size",
+            min=0,
+            help=(
+                "The size in MiB to shrink the folder to, "
+                "deleting the least recently used entries first. "
+                "0 empties the folder."
+            ),
+        ),
+    ] = 0,
+):
+    """
+    Delete parsed M-XML files kept by `cache --cache-dir`.
+    """
+    MemberCache(cache_dir).prune(max_size * 2**20)
@@ -1,18 +1,45 @@
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, List, Optional
+import sys
 import logging
 
 logger = logging.getLogger(__name__)
 
+import click
 import typer
+from typer.core import TyperGroup
 
-from abctk.utils.comparative.cli.BCCWJ import app as app_BCCWJ
-from abctk.utils.comparative.cli.annot import app as app_annot
+from abctk.utils.comparative.client import Op, ServerError, run_client
+from abctk.utils.comparative.profiling import profiler
 
-app = typer.Typer()
 
-app.add_typer(app_BCCWJ, name="BCCWJ")
-app.add_typer(app_annot, name="annot")
+class _LazyGroup(TyperGroup):
+    """
+    A group whose subgroups are imported only when they are invoked,
+    so that a command does not load the dependencies of the others.
+    """
+
+    lazy_subgroups = ("BCCWJ", "annot")
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted([*super().list_commands(ctx), *self.lazy_subgroups])
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        # The imports are spelled out for PyInstaller to find them.
+        match cmd_name:
+            case "BCCWJ":
+                from abctk.utils.comparative.cli.BCCWJ import app as app_sub
+            case "annot":
+                from abctk.utils.comparative.cli.annot import app as app_sub
+            case _:
+                return super().get_command(ctx, cmd_name)
+
+        group = typer.main.get_group(app_sub)
+        group.name = cmd_name
+        return group
+
+
+app = typer.Typer(cls=_LazyGroup)
 
 
 @app.command("version")
@@ -22,8 +49,165 @@ def cmd_version():
     typer.echo(c.__version__)
 
 
+@app.command("serve")
+def cmd_serve(
+    socket_path: Annotated[
+        Path,
+        typer.Argument(
+            dir_okay=False,
+            help="The path of the Unix socket to listen on.",
+        ),
+    ],
+    real_texts: Annotated[
+        Optional[List[Path]],
+        typer.Option(
+            "--real-texts",
+            "-t",
+            file_okay=True,
+            dir_okay=False,
+            exists=True,
+            help=(
+                "A cache file made by `BCCWJ cache` to decrypt with. "
+                "Given more than once, the files are stacked as by `annot incorp-text`."
+            ),
+        ),
+    ] = None,
+    fork: Annotated[
+        bool,
+        typer.Option(
+            "--fork",
+            help=(
+                "Handle each connection in a child process instead of a thread, "
+                "so that the connections are processed on several CPU cores."
+            ),
+        ),
+    ] = False,
+):
+    """
+    Convert, encrypt and decrypt annotation files sent by `client`
+    until interrupted, keeping the real texts open.
+    """
+    from abctk.utils.comparative.serve import serve
+
+    try:
+        serve(socket_path, real_texts or [], fork=fork)
+    except FileExistsError as e:
+        raise typer.BadParameter(str(e), param_hint="SOCKET_PATH")
+
+
+@app.command("client")
+def cmd_client(
+    socket_path: Annotated[
+        Path,
+        typer.Argument(
+            dir_okay=False,
+            help="The Unix socket `serve` listens on.",
+        ),
+    ],
+    op: Annotated[
+        Op,
+        typer.Argument(case_sensitive=False),
+    ],
+    input_file: Annotated[
+        Path,
+        typer.Argument(
+            dir_okay=False,
+            allow_dash=True,
+        ),
+    ] = Path("-"),
+    output_file: Annotated[
+        Path,
+        typer.Argument(
+            dir_okay=False,
+            allow_dash=True,
+        ),
+    ] = Path("-"),
+    format: Annotated[
+        str,
+        typer.Option(
+            "--ext",
+            "--extension",
+            "-e",
+            help="The format of the input as in `annot load`.",
+        ),
+    ] = "jsonl",
+    style: Annotated[
+        str,
+        typer.Option(
+            "--style",
+            "-s",
+            help="The style of the input as in `annot load`.",
+        ),
+    ] = "bracketed",
+    output_format: Annotated[
+        Optional[str],
+        typer.Option(
+            "--output-ext",
+            "-E",
+            help="The format of the output. Defaults to the one of the input.",
+        ),
+    ] = None,
+    output_style: Annotated[
+        Optional[str],
+        typer.Option(
+            "--output-style",
+            "-S",
+            help="The style of the output. Defaults to the one of the input.",
+        ),
+    ] = None,
+    report: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--report",
+            file_okay=True,
+            dir_okay=False,
+            writable=True,
+            help="Write the records not decrypted to this file in JSONL.",
+        ),
+    ] = None,
+):
+    """
+    Send an annotation file to `serve` and receive it converted, encrypted or decrypted.
+    `python -m abctk.utils.comparative.client` does the same and starts faster.
+    """
+    options: dict = {"format": format, "style": style}
+    if output_format is not None:
+        options["output_format"] = output_format
+    if output_style is not None:
+        options["output_style"] = output_style
+
+    try:
+        run_client(socket_path, op, input_file, output_file, options, report)
+    except (OSError, ServerError) as e:
+        logger.error(f"{socket_path}: {e}")
+        raise typer.Exit(1)
+
+
+def _report_profile(
+    profile_output: Optional[Path],
+    cprofile: Optional[str],
+    cprofile_output: Optional[Path],
+) -> None:
+    if profile_output is None:
+        profiler.print_table()
+    elif str(profile_output) == "-":
+        profiler.dump_json(sys.stdout)
+    else:
+        with open(profile_output, "w") as f:
+            profiler.dump_json(f)
+        logger.info(f"The profile is written to {profile_output.absolute()}.")
+
+    if cprofile:
+        path = cprofile_output or Path(f"{cprofile}.pstats")
+        profiler.dump_cprofile(str(path))
+        logger.info(
+            f"The cProfile stats of {cprofile} are written to {path.absolute()}."
+        )
+
+
 @app.callback()
 def callback(
+    ctx: typer.Context,
     log_level: Annotated[
         int,
         typer.Option(
@@ -33,9 +217,51 @@ def callback(
             max=logging.CRITICAL,
         ),
     ] = logging.WARNING,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help=(
+                "Measure the wall time, the CPU time, the number of records "
+                "and the peak memory of each phase of the commands "
+                "and print a summary table to STDERR at the end."
+            ),
+        ),
+    ] = False,
+    profile_output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--profile-output",
+            dir_okay=False,
+            allow_dash=True,
+            help="Write the profile as JSON to this file instead. Implies --profile.",
+        ),
+    ] = None,
+    cprofile: Annotated[
+        Optional[str],
+        typer.Option(
+            "--cprofile",
+            metavar="PHASE",
+            help="Also run the phase of this name under cProfile. Implies --profile.",
+        ),
+    ] = None,
+    cprofile_output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--cprofile-output",
+            dir_okay=False,
+            help="Where to write the pstats of --cprofile. Defaults to PHASE.pstats.",
+        ),
+    ] = None,
 ):
     logging.basicConfig(
         level=log_level,
         format="[%(name)s %(levelname)s] %(message)s",
         force=True,
     )
+
+    if profile or profile_output or cprofile:
+        profiler.enable(cprofile_phase=cprofile)
+        ctx.call_on_close(
+            lambda: _report_profile(profile_output, cprofile, cprofile_output)
+        )
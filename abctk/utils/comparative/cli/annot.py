@@ -1,48 +1,206 @@
 from pathlib import Path
+from collections import deque
 from enum import Enum
-from typing import Annotated
+from typing import Annotated, Callable, Iterable, Iterator, Mapping, Optional
+import contextlib
 import dataclasses
+import itertools
+import json
 from dataclasses import dataclass
 import sys
 import logging
 
 logger = logging.getLogger(__name__)
-import pickle
 
 import typer
 
 from abctk.obj.ID import RecordID
 import abctk.obj.comparative as aoc
 
+from abctk.utils.comparative import jsonl
 from abctk.utils.comparative.io import (
     AnnotationFileFormat,
     AnnotationFileStyle,
     load_file,
     write_file,
 )
-from abctk.utils.comparative.BCCWJ.incorp import get_real_text as get_real_text_BCCWJ
 from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.BCCWJ.stack import open_stores
+from abctk.utils.comparative.BCCWJ.store import BCCWJSentStore
+from abctk.utils.comparative.check import (
+    CheckSummary,
+    DuplicateIDs,
+    Issue,
+    check_records,
+)
+from abctk.utils.comparative.checkpoint import (
+    CHUNK_SIZE as CHECKPOINT_CHUNK_SIZE,
+    load_checkpoint,
+    write_file_resumable,
+)
+from abctk.utils.comparative.columnar import CompCorpus, SpanStat
+from abctk.utils.comparative.compression import (
+    Compression,
+    from_suffix,
+    text_writer,
+)
+from abctk.utils.comparative.decrypt import (
+    Mismatch,
+    decrypt_records_BCCWJ,
+    encrypt_record,
+    summarize_mismatches,
+)
+from abctk.utils.comparative.id_index import load_records_by_ID
+from abctk.utils.comparative.load_many import (
+    FileSpec,
+    default_style,
+    expand_globs,
+    guess_format,
+    load_many,
+)
+from abctk.utils.comparative.parallel import CHUNK_SIZE, chunked, map_chunks
+from abctk.utils.comparative.shard import (
+    ShardKey,
+    merge_shards,
+    shard_path,
+    write_shards,
+)
+from abctk.utils.comparative.profiling import profiler
 
 
 @dataclass
 class CliContext:
-    annots: list[aoc.CompRecord] = dataclasses.field(default_factory=list)
-    real_texts: dict[RecordID | str, str] = dataclasses.field(default_factory=dict)
+    annots: Iterable[aoc.CompRecord] = dataclasses.field(default_factory=list)
+    real_texts_paths: list[Path] = dataclasses.field(default_factory=list)
+    """
+    The cache files of the real texts given by `incorp-text`, in the order given.
+    """
+
+    jobs: int = 1
+    """
+    The number of worker processes for the commands processing records in parallel.
+    """
+
+    stream: bool = False
+    """
+    If True, the records are passed from one command to the next one by one
+    instead of being collected in `annots` after each command.
+    """
+
+    resources: contextlib.ExitStack = dataclasses.field(
+        default_factory=contextlib.ExitStack
+    )
+    """
+    Files and other resources that have to be kept open until the records are consumed.
+    """
+
+    skip: int = 0
+    """
+    The number of the records to be dropped by the first command that sees them,
+    which are the ones already written by an interrupted run of `write --resume`.
+    """
+
+    last_skipped_ID: RecordID | str | None = None
+
+    exit_code: int = 0
+    """
+    The exit status of the whole run, set by e.g. `check --strict`.
+    """
+
+    def skip_done(self, records: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        for rec in records:
+            if self.skip > 0:
+                self.skip -= 1
+                self.last_skipped_ID = rec.ID
+            else:
+                yield rec
+
+    def pipe(
+        self,
+        transform: Callable[[Iterable[aoc.CompRecord]], Iterable[aoc.CompRecord]],
+        name: str,
+    ) -> None:
+        """
+        Apply `transform` to the records.
+        Unless streaming, the records are collected right away.
+        The time spent in `transform` is profiled as the phase annot.`name`.
+        """
+        self.annots = profiler.iterate(f"annot.{name}", transform(self.annots))
+        if not self.stream:
+            self.annots = list(self.annots)
+
+    def close(self) -> None:
+        # Run the remaining lazy transforms, which may have side effects such as logging.
+        for _ in self.annots:
+            pass
+        self.annots = []
+        self.resources.close()
+        if self.exit_code:
+            raise typer.Exit(self.exit_code)
 
 
 app = typer.Typer(chain=True)
 
 
 @app.callback()
-def callback(ctx: typer.Context):
+def callback(
+    ctx: typer.Context,
+    stream: Annotated[
+        bool,
+        typer.Option(
+            "--stream",
+            help=(
+                "Pass the records through the commands one by one "
+                "without keeping all of them in memory. "
+                "`write` then consumes the records it receives, "
+                "leaving none to the subsequent commands."
+            ),
+        ),
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=1,
+            help=(
+                "The number of processes used to parse bracketed annotations, "
+                "look up real texts and decrypt records. "
+                "The order of the records is kept."
+            ),
+        ),
+    ] = 1,
+):
     # https://stackoverflow.com/a/72156916
-    _ = ctx.ensure_object(CliContext)
+    obj = ctx.ensure_object(CliContext)
+    obj.stream = stream
+    obj.jobs = jobs
+    ctx.call_on_close(obj.close)
 
 
 class SourceName(str, Enum):
     BCCWJ = "BCCWJ"
 
 
+_worker_real_texts: Mapping[BCCWJSentIndex, str] | None = None
+"""
+The real texts opened once per worker process of `decrypt` and `check`.
+"""
+
+
+def _init_worker(paths: list[Path]) -> None:
+    global _worker_real_texts
+    _worker_real_texts = open_stores(paths) if paths else None
+
+
+def _decrypt_chunk_in_worker(
+    records: list[aoc.CompRecord],
+) -> list[tuple[aoc.CompRecord, Mismatch | None]]:
+    if _worker_real_texts is None:
+        raise RuntimeError("The worker process is not initialized")
+    return decrypt_records_BCCWJ(records, _worker_real_texts)
+
+
 @app.command("incorp-text")
 def cmd_incorp_text(
     ctx: typer.Context,
@@ -58,87 +216,104 @@ def cmd_incorp_text(
             file_okay=True,
             dir_okay=False,
             exists=True,
-            help="A pickle file containing the real text.",
+            help="A cache file containing the real text.",
         ),
     ],
 ):
+    """
+    Give the real texts for `decrypt`, which looks them up in bulk.
+
+    Given more than once, the cache files are stacked:
+    each sample is taken from the last file given that has it.
+    """
     obj = ctx.ensure_object(CliContext)
 
-    with open(path, "rb") as f:
-        real_texts: dict[BCCWJSentIndex, str] = pickle.load(f)
-
-        match name:
-            case SourceName.BCCWJ:
-                for rec in obj.annots:
-                    if ID_parsed := aoc.ABCTComp_BCCWJ_ID.from_string(rec.ID):
-                        found_text = get_real_text_BCCWJ(
-                            BCCWJSentIndex(
-                                ID_parsed.sampleID,
-                                ID_parsed.start_pos,
-                            ),
-                            real_texts,
-                            corpus_id=rec.ID,
-                        )
-                        if found_text:
-                            obj.real_texts[rec.ID] = found_text
-                        else:
-                            logger.warning(f"Cannot find the real text for {rec.ID}")
-                    else:
-                        logger.warning(f"Cannot parse the ID {rec.ID}")
-            case _:
-                raise NotImplementedError
+    match name:
+        case SourceName.BCCWJ:
+            # Fail here rather than in `decrypt` if the file is not a cache.
+            BCCWJSentStore(path).close()
+            obj.real_texts_paths.append(path)
+        case _:
+            raise NotImplementedError
 
 
 @app.command("encrypt")
 def cmd_encrypt(ctx: typer.Context):
     obj = ctx.ensure_object(CliContext)
-    for rec in obj.annots:
-        rec.tokens = tuple("⛔" * len(t) for t in rec.tokens)
+
+    def _encrypt(records: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        for rec in records:
+            encrypt_record(rec)
+            yield rec
+
+    obj.pipe(_encrypt, "encrypt")
 
 
 @app.command("decrypt")
 def cmd_decrypt(
     ctx: typer.Context,
+    report: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--report",
+            file_okay=True,
+            dir_okay=False,
+            writable=True,
+            help=(
+                "Write the records whose real texts are missing "
+                "or do not have the same length as the annotations "
+                "to this file in JSONL."
+            ),
+        ),
+    ] = None,
 ):
     """
     Decrypt an annotation file containing encrypted texts.
     """
     obj = ctx.ensure_object(CliContext)
+    paths = list(obj.real_texts_paths)
 
-    for record in obj.annots:
-        ID_parsed = aoc.ABCTComp_BCCWJ_ID.from_string(record.ID)
-        real_texts = obj.real_texts
-        if ID_parsed:
-            if real_text := real_texts.get(record.ID, ""):
-                real_text_len = len(real_text)
-                tokens_changed: list[str] = []
-
-                char_pos = 0
-                for t in record.tokens:
-                    tokens_changed.append(real_text[char_pos : char_pos + len(t)])
-                    char_pos += len(t)
-
-                if char_pos < real_text_len:
-                    # ANNOTATION: -----------------------|
-                    #                                   char_pos
-                    # REAL TEXT:  ------------------------------------|
-                    logger.warning(
-                        f"The real text for {record.ID} is longer than the annotation"
-                    )
-                elif char_pos > real_text_len:
+    fp_report = obj.resources.enter_context(open(report, "w")) if report else None
 
-                    # ANNOTATION: -----------------------|
-                    #                                   char_pos
-                    # REAL TEXT:  ----------------|
-                    logger.warning(
-                        f"The real text for {record.ID} is shorter than the annotation"
-                    )
+    def _decrypt(records: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        if obj.jobs > 1 and paths:
+            results = map_chunks(
+                _decrypt_chunk_in_worker,
+                records,
+                obj.jobs,
+                initializer=_init_worker,
+                initargs=(paths,),
+            )
+        else:
+            # Without `incorp-text`, no real texts are found for any record.
+            real_texts: Mapping[BCCWJSentIndex, str] = (
+                obj.resources.enter_context(open_stores(paths)) if paths else {}
+            )
+            results = itertools.chain.from_iterable(
+                decrypt_records_BCCWJ(chunk, real_texts)
+                for chunk in chunked(records, CHUNK_SIZE)
+            )
 
-                record.tokens = tokens_changed
-            else:
-                logging.warning(f"Cannot find the real text for {record.ID}")
+        count = 0
+        mismatches: list[Mismatch] = []
+        for record, mismatch in results:
+            count += 1
+            if mismatch:
+                mismatches.append(mismatch)
+                if fp_report:
+                    jsonl.write_lines((mismatch,), fp_report)
+            yield record
+
+        if mismatches:
+            logger.warning(
+                f"Decrypted {count} records, of which {len(mismatches)} do not match "
+                f"their real texts: {summarize_mismatches(mismatches)}"
+                + ("" if fp_report else ". See them with `decrypt --report FILE`.")
+            )
         else:
-            logging.warning(f"Cannot parse the ID {record.ID}")
+            logger.info(f"Decrypted {count} records.")
+
+    obj.pipe(_decrypt, "decrypt")
 
 
 @app.command("load")
@@ -171,31 +346,329 @@ def cmd_load(
             case_sensitive=False,
         ),
     ] = AnnotationFileStyle.SEPARATE,
+    start: Annotated[
+        int,
+        typer.Option(
+            "--start",
+            min=0,
+            help="The index of the first record to load, counted from 0.",
+        ),
+    ] = 0,
+    stop: Annotated[
+        Optional[int],
+        typer.Option(
+            "--stop",
+            min=0,
+            help=(
+                "The index of the record to stop loading at (exclusive). "
+                "Binary files are not read before --start if they are seekable."
+            ),
+        ),
+    ] = None,
+    IDs: Annotated[
+        Optional[str],
+        typer.Option(
+            "--ids",
+            help=(
+                "Load only the records with these IDs or IDs in v1, "
+                "separated by commas. "
+                "Only for JSONL files, which are indexed by ID in FILEPATH.idx "
+                "so that the records are read without parsing the whole file."
+            ),
+        ),
+    ] = None,
+    ID_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--id-file",
+            file_okay=True,
+            dir_okay=False,
+            exists=True,
+            help=(
+                "Load only the records with the IDs listed in this file, "
+                "one per line."
+            ),
+        ),
+    ] = None,
 ):
     """
     Load a comparative annotation file.
     """
-    fp = None
-    try:
-        fp = sys.stdin if str(path) == "-" else open(path, "r")
+    obj = ctx.ensure_object(CliContext)
+
+    if IDs is not None or ID_file is not None:
+        if str(path) == "-":
+            raise typer.BadParameter("Records cannot be looked up by ID in STDIN")
+        if format != AnnotationFileFormat.JSONL:
+            raise typer.BadParameter(
+                f"Records can be looked up by ID only in JSONL files, not {format.value}"
+            )
+        if start or stop is not None:
+            raise typer.BadParameter(
+                "--ids and --id-file cannot be used with --start or --stop"
+            )
+
+        IDs_wanted: list[str] = []
+        if IDs is not None:
+            IDs_wanted.extend(ID.strip() for ID in IDs.split(",") if ID.strip())
+        if ID_file is not None:
+            with open(ID_file, "r") as f:
+                IDs_wanted.extend(line.strip() for line in f if line.strip())
+
+        records = load_records_by_ID(path, format, style, IDs_wanted)
+    else:
+        mode = "rb" if format == AnnotationFileFormat.BINARY else "r"
+        fp = (
+            sys.stdin
+            if str(path) == "-"
+            else obj.resources.enter_context(open(path, mode))
+        )
 
         records = load_file(
             fp,
             format=format,
             style=style,
+            jobs=obj.jobs,
+            start=start,
+            stop=stop,
         )
 
-        obj = ctx.ensure_object(CliContext)
-        item_prev = len(obj.annots)
-        obj.annots.extend(records)
+    def _load(records_prev: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        item_prev = 0
+        for rec in records_prev:
+            item_prev += 1
+            yield rec
+
+        item_loaded = 0
+        # When streaming, the records already written by `write --resume`
+        # are dropped here so that the other commands do not process them again.
+        for rec in obj.skip_done(records):
+            item_loaded += 1
+            yield rec
+
         logger.info(
-            f"Loaded {len(obj.annots) - item_prev} records "
+            f"Loaded {item_loaded} records "
             f"from {'STDIN' if str(path) == '-' else str(path)}; "
-            f"now {len(obj.annots)} records in total."
+            f"now {item_prev + item_loaded} records in total."
+        )
+
+    obj.pipe(_load, "load")
+
+
+def _file_specs(
+    patterns: str,
+    format: AnnotationFileFormat | None,
+    style: AnnotationFileStyle | None,
+) -> list[FileSpec]:
+    """
+    List the files matching the comma-separated `patterns`
+    with their formats and styles, told from their extensions if not given.
+    """
+    try:
+        paths = expand_globs(
+            pattern for pattern in patterns.split(",") if pattern.strip()
+        )
+        specs = []
+        for path in paths:
+            format_file = format or guess_format(path)
+            specs.append(
+                FileSpec(path, format_file, style or default_style(format_file))
+            )
+    except (FileNotFoundError, ValueError) as e:
+        raise typer.BadParameter(str(e)) from e
+    return specs
+
+
+@app.command("load-many")
+def cmd_load_many(
+    ctx: typer.Context,
+    patterns: Annotated[
+        str,
+        typer.Argument(
+            help=(
+                "Annotation files or glob patterns separated by commas, "
+                "quoted so that the shell leaves them, "
+                "e.g. 'a.jsonl,annot/**/*.yaml'. "
+                "The records are loaded in the order of the patterns "
+                "and of the sorted file names matching each."
+            ),
+        ),
+    ],
+    format: Annotated[
+        Optional[AnnotationFileFormat],
+        typer.Option(
+            "--ext",
+            "--extension",
+            "-e",
+            case_sensitive=False,
+            help="The format of all the files. Told from each extension if not given.",
+        ),
+    ] = None,
+    style: Annotated[
+        Optional[AnnotationFileStyle],
+        typer.Option(
+            "--style",
+            "-s",
+            case_sensitive=False,
+            help=(
+                "The style of all the files. "
+                "Bracketed for TXT files and separate for the others if not given."
+            ),
+        ),
+    ] = None,
+    prefetch: Annotated[
+        int,
+        typer.Option(
+            "--prefetch",
+            min=1,
+            help="The number of files read ahead of the one being parsed.",
+        ),
+    ] = 4,
+    report: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--report",
+            file_okay=True,
+            dir_okay=False,
+            writable=True,
+            help=(
+                "Write the size, the number of the records and the timing "
+                "of each file to this file in JSONL."
+            ),
+        ),
+    ] = None,
+):
+    """
+    Load several comparative annotation files, reading them concurrently.
+    With `annot --jobs N`, the files are parsed in N processes.
+    """
+    obj = ctx.ensure_object(CliContext)
+
+    specs = _file_specs(patterns, format, style)
+
+    fp_report = obj.resources.enter_context(open(report, "w")) if report else None
+
+    def _load(records_prev: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        item_prev = 0
+        for rec in records_prev:
+            item_prev += 1
+            yield rec
+
+        item_loaded = 0
+        for loaded in load_many(specs, prefetch=prefetch, jobs=obj.jobs):
+            logger.info(
+                f"Loaded {len(loaded.records)} records from {loaded.spec.path} "
+                f"({loaded.size} bytes): read in {loaded.read_seconds:.3f}s, "
+                f"parsed in {loaded.parse_seconds:.3f}s, "
+                f"waited for {loaded.wait_seconds:.3f}s"
+            )
+            if fp_report:
+                jsonl.write_lines(
+                    (
+                        {
+                            "path": str(loaded.spec.path),
+                            "format": loaded.spec.format.value,
+                            "style": loaded.spec.style.value,
+                            "records": len(loaded.records),
+                            "bytes": loaded.size,
+                            "read_seconds": loaded.read_seconds,
+                            "parse_seconds": loaded.parse_seconds,
+                            "wait_seconds": loaded.wait_seconds,
+                        },
+                    ),
+                    fp_report,
+                )
+
+            for rec in obj.skip_done(loaded.records):
+                item_loaded += 1
+                yield rec
+
+        logger.info(
+            f"Loaded {item_loaded} records from {len(specs)} files; "
+            f"now {item_prev + item_loaded} records in total."
+        )
+
+    obj.pipe(_load, "load-many")
+
+
+@app.command("merge")
+def cmd_merge(
+    ctx: typer.Context,
+    patterns: Annotated[
+        str,
+        typer.Argument(
+            help=(
+                "Shards or glob patterns separated by commas, "
+                "quoted so that the shell leaves them, "
+                "e.g. 'annot-*-of-00004.jsonl'."
+            ),
+        ),
+    ],
+    format: Annotated[
+        Optional[AnnotationFileFormat],
+        typer.Option(
+            "--ext",
+            "--extension",
+            "-e",
+            case_sensitive=False,
+            help="The format of all the shards. Told from each extension if not given.",
+        ),
+    ] = None,
+    style: Annotated[
+        Optional[AnnotationFileStyle],
+        typer.Option(
+            "--style",
+            "-s",
+            case_sensitive=False,
+            help=(
+                "The style of all the shards. "
+                "Bracketed for TXT files and separate for the others if not given."
+            ),
+        ),
+    ] = None,
+):
+    """
+    Load shards sorted by ID, merging them into one sequence sorted by ID.
+    Only one record of each shard is held at a time, which with `annot --stream`
+    keeps the memory constant however large the shards are.
+    """
+    obj = ctx.ensure_object(CliContext)
+
+    specs = _file_specs(patterns, format, style)
+
+    shards = [
+        load_file(
+            obj.resources.enter_context(
+                open(
+                    spec.path,
+                    "rb" if spec.format == AnnotationFileFormat.BINARY else "r",
+                )
+            ),
+            format=spec.format,
+            style=spec.style,
+        )
+        for spec in specs
+    ]
+
+    def _merge(records_prev: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        item_prev = 0
+        for rec in records_prev:
+            item_prev += 1
+            yield rec
+
+        item_loaded = 0
+        for rec in obj.skip_done(
+            merge_shards(shards, names=[str(spec.path) for spec in specs])
+        ):
+            item_loaded += 1
+            yield rec
+
+        logger.info(
+            f"Merged {item_loaded} records from {len(specs)} shards; "
+            f"now {item_prev + item_loaded} records in total."
         )
-    finally:
-        if fp and fp != sys.stdin:
-            fp.close()
+
+    obj.pipe(_merge, "merge")
 
 
 @app.command("count")
@@ -206,7 +679,175 @@ def cmd_count(
     Count the number of loaded records.
     """
     obj = ctx.ensure_object(CliContext)
-    logger.info(f"count: {len(obj.annots)} records in total.")
+
+    def _count(records: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        count = 0
+        for rec in records:
+            count += 1
+            yield rec
+        logger.info(f"count: {count} records in total.")
+
+    obj.pipe(_count, "count")
+
+
+@app.command("stats")
+def cmd_stats(
+    ctx: typer.Context,
+):
+    """
+    Count the comparative spans and the tokens and characters they cover by label.
+    """
+    obj = ctx.ensure_object(CliContext)
+
+    def _stats(records: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        stats: dict[str, SpanStat] = {}
+        # The records are converted into the columnar form chunk by chunk
+        # so that the statistics are taken without a loop over the tokens.
+        for chunk in chunked(records, CHUNK_SIZE):
+            for label, stat in CompCorpus.from_records(chunk).span_stats().items():
+                total = stats.setdefault(label, SpanStat())
+                total.count += stat.count
+                total.tokens += stat.tokens
+                total.chars += stat.chars
+            yield from chunk
+
+        for label, stat in sorted(stats.items()):
+            logger.info(
+                f"stats: {label}: {stat.count} spans, "
+                f"{stat.tokens / stat.count:.2f} tokens and "
+                f"{stat.chars / stat.count:.2f} characters per span."
+            )
+
+    obj.pipe(_stats, "stats")
+
+
+def _check_chunks_in_worker(
+    chunks: list[tuple[int, list[aoc.CompRecord]]],
+) -> list[list[Issue]]:
+    return [
+        check_records(records, start, _worker_real_texts) for start, records in chunks
+    ]
+
+
+@app.command("check")
+def cmd_check(
+    ctx: typer.Context,
+    report: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--report",
+            file_okay=True,
+            dir_okay=False,
+            writable=True,
+            help="Write the issues found to this file in JSONL, one per line.",
+        ),
+    ] = None,
+    summary: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--summary",
+            file_okay=True,
+            dir_okay=False,
+            writable=True,
+            allow_dash=True,
+            help=(
+                "Write the number of the records and the issues by kind "
+                "to this file in JSON. - stands for STDERR."
+            ),
+        ),
+    ] = None,
+    strict: Annotated[
+        bool,
+        typer.Option(
+            "--strict",
+            help="Exit with 1 at the end if any issue is found.",
+        ),
+    ] = False,
+):
+    """
+    Check the records for malformed or duplicate IDs and spans out of their tokens,
+    and, after `incorp-text`, for tokens not matching the real texts.
+    The records are passed on as they are.
+    """
+    obj = ctx.ensure_object(CliContext)
+    paths = list(obj.real_texts_paths)
+
+    fp_report = obj.resources.enter_context(open(report, "w")) if report else None
+
+    def _check(records: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+        chunks = _numbered(chunked(records, CHUNK_SIZE))
+        if obj.jobs > 1:
+            # Only the issues come back from the workers;
+            # the records are kept here until then.
+            in_flight: deque[list[aoc.CompRecord]] = deque()
+
+            def _sent(chunks):
+                for start, chunk in chunks:
+                    in_flight.append(chunk)
+                    yield start, chunk
+
+            results = (
+                (in_flight.popleft(), issues)
+                for issues in map_chunks(
+                    _check_chunks_in_worker,
+                    _sent(chunks),
+                    obj.jobs,
+                    chunk_size=1,
+                    initializer=_init_worker,
+                    initargs=(paths,),
+                )
+            )
+        else:
+            real_texts = (
+                obj.resources.enter_context(open_stores(paths)) if paths else None
+            )
+            results = (
+                (chunk, check_records(chunk, start, real_texts))
+                for start, chunk in chunks
+            )
+
+        duplicates = DuplicateIDs()
+        stats = CheckSummary()
+        for chunk, issues in results:
+            issues_duplicate = duplicates.check(chunk, stats.records)
+            if issues_duplicate:
+                issues = sorted(issues + issues_duplicate, key=lambda i: i.index)
+            stats.add(len(chunk), issues)
+            if fp_report and issues:
+                jsonl.write_lines(issues, fp_report)
+            yield from chunk
+
+        if stats.records_with_issues:
+            logger.warning(
+                f"check: {stats.records_with_issues} of {stats.records} records "
+                f"have issues: {stats}"
+                + ("" if fp_report else ". See them with `check --report FILE`.")
+            )
+            if strict:
+                obj.exit_code = 1
+        else:
+            logger.info(f"check: no issues in {stats.records} records.")
+
+        if summary == Path("-"):
+            json.dump(stats.to_dict(), sys.stderr)
+            sys.stderr.write("\n")
+        elif summary is not None:
+            with open(summary, "w") as f:
+                json.dump(stats.to_dict(), f)
+
+    obj.pipe(_check, "check")
+
+
+def _numbered(
+    chunks: Iterable[list[aoc.CompRecord]],
+) -> Iterator[tuple[int, list[aoc.CompRecord]]]:
+    """
+    Pair each chunk with the position of its first record.
+    """
+    start = 0
+    for chunk in chunks:
+        yield start, chunk
+        start += len(chunk)
 
 
 @app.command("write")
@@ -238,31 +879,252 @@ def cmd_write(
             case_sensitive=False,
         ),
     ] = AnnotationFileStyle.SEPARATE,
+    chunk_size: Annotated[
+        Optional[int],
+        typer.Option(
+            "--chunk-size",
+            min=1,
+            help=(
+                "Write to PATH.part and save a checkpoint in PATH.checkpoint "
+                f"every this many records. Defaults to {CHECKPOINT_CHUNK_SIZE} "
+                "with --resume, and to writing PATH directly otherwise."
+            ),
+        ),
+    ] = None,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help=(
+                "Write with checkpoints, "
+                "continuing an interrupted write to the same file from its checkpoint "
+                "and skipping the records already written. "
+                "With --stream, they are skipped right after being loaded."
+            ),
+        ),
+    ] = False,
+    fsync: Annotated[
+        bool,
+        typer.Option(
+            "--fsync",
+            help="Flush PATH.part to the disk before saving each checkpoint.",
+        ),
+    ] = False,
+    compression: Annotated[
+        Optional[Compression],
+        typer.Option(
+            "--compression",
+            "-z",
+            case_sensitive=False,
+            help=(
+                "Compress the file. "
+                "Defaults to the extension of PATH (.gz, .zst) "
+                "and to no compression for STDOUT. "
+                "zstd is compressed in as many threads as --jobs."
+            ),
+        ),
+    ] = None,
+    compression_level: Annotated[
+        Optional[int],
+        typer.Option(
+            "--compression-level",
+            help="The compression level. Defaults to 6 for gzip and 3 for zstd.",
+        ),
+    ] = None,
+    shards: Annotated[
+        Optional[int],
+        typer.Option(
+            "--shards",
+            min=1,
+            help=(
+                "Split the records into this many files, "
+                "e.g. PATH-00000-of-00004.jsonl for PATH.jsonl, "
+                "to be processed separately and merged back by `merge`."
+            ),
+        ),
+    ] = None,
+    shard_by: Annotated[
+        ShardKey,
+        typer.Option(
+            "--shard-by",
+            case_sensitive=False,
+            help=(
+                "Send the records to the shards by their IDs, "
+                "or by their BCCWJ sample IDs to keep the sentences of a sample together."
+            ),
+        ),
+    ] = ShardKey.ID,
 ):
     """
     Write out all the loaded annotations into a file.
+
+    With --resume or --chunk-size, the file is written as PATH.part
+    and renamed to PATH when completed.
     """
     obj = ctx.ensure_object(CliContext)
-
-    if str(path) == "-":
-        write_file(
-            obj.annots,
-            sys.stdout,
-            format=format,
-            style=style,
-        )
+    if obj.stream:
+        # The records written here are not kept for the subsequent commands.
+        records, obj.annots = obj.annots, []
     else:
-        if not path.exists() or typer.confirm(
-            f"{path.absolute()} already exists. Overwrite?",
+        records = obj.annots
+
+    if compression is None:
+        compression = Compression.NONE if str(path) == "-" else from_suffix(path)
+    if format == AnnotationFileFormat.BINARY and compression != Compression.NONE:
+        raise typer.BadParameter("The binary format cannot be compressed")
+
+    if shards is not None:
+        if str(path) == "-":
+            raise typer.BadParameter("Cannot write shards to STDOUT")
+        if resume:
+            raise typer.BadParameter("Sharded writes cannot be resumed")
+
+        paths = [shard_path(path, i, shards) for i in range(shards)]
+        if any(p.exists() for p in paths) and not typer.confirm(
+            f"Some shards of {path.absolute()} already exist. Overwrite?",
             abort=False,
         ):
-            with open(path, "w") as f:
+            logger.info(f"Writing to {path} aborted by the user.")
+            return
+
+        with profiler.phase("annot.write"):
+            written = write_shards(
+                profiler.counted("annot.write", records),
+                path,
+                count=shards,
+                key=shard_by,
+                format=format,
+                style=style,
+                chunk_size=chunk_size or CHECKPOINT_CHUNK_SIZE,
+                compression=compression,
+                compression_level=compression_level,
+                threads=obj.jobs,
+            )
+        logger.info(
+            f"Written {sum(written)} records to {shards} shards "
+            f"from {paths[0].absolute()} to {paths[-1].absolute()}."
+        )
+        return
+
+    if str(path) == "-":
+        if resume:
+            raise typer.BadParameter("Cannot resume writing to STDOUT")
+        with profiler.phase("annot.write"):
+            if compression == Compression.NONE:
                 write_file(
-                    obj.annots,
-                    f,
+                    profiler.counted("annot.write", records),
+                    sys.stdout,
                     format=format,
                     style=style,
                 )
+            else:
+                sys.stdout.flush()
+                with text_writer(
+                    sys.stdout.buffer, compression, compression_level, obj.jobs
+                ) as fp:
+                    write_file(
+                        profiler.counted("annot.write", records),
+                        fp,
+                        format=format,
+                        style=style,
+                    )
+                sys.stdout.buffer.flush()
+        return
+
+    if not resume and chunk_size is None:
+        if not path.exists() or typer.confirm(
+            f"{path.absolute()} already exists. Overwrite?",
+            abort=False,
+        ):
+            with profiler.phase("annot.write"):
+                if compression == Compression.NONE:
+                    with open(path, "w", encoding="utf-8") as f:
+                        write_file(
+                            profiler.counted("annot.write", records),
+                            f,
+                            format=format,
+                            style=style,
+                        )
+                else:
+                    with open(path, "wb") as f, text_writer(
+                        f, compression, compression_level, obj.jobs
+                    ) as fp:
+                        write_file(
+                            profiler.counted("annot.write", records),
+                            fp,
+                            format=format,
+                            style=style,
+                        )
             logger.info(f"Written to {path.absolute()}.")
         else:
             logger.info(f"Writing to {path} aborted by the user.")
+        return
+
+    checkpoint = load_checkpoint(path) if resume else None
+    if checkpoint:
+        logger.info(
+            f"Resuming the write to {path.absolute()} "
+            f"after {checkpoint.records} records."
+        )
+        records = _skip_written(obj, records, checkpoint.records, checkpoint.last_ID)
+    elif resume:
+        logger.warning(f"No checkpoint is found for {path.absolute()}.")
+
+    if (
+        checkpoint
+        or not path.exists()
+        or typer.confirm(
+            f"{path.absolute()} already exists. Overwrite?",
+            abort=False,
+        )
+    ):
+        with profiler.phase("annot.write"):
+            written = write_file_resumable(
+                profiler.counted("annot.write", records),
+                path,
+                format=format,
+                style=style,
+                chunk_size=chunk_size or CHECKPOINT_CHUNK_SIZE,
+                resume_from=checkpoint,
+                compression=compression,
+                compression_level=compression_level,
+                threads=obj.jobs,
+                fsync=fsync,
+            )
+        logger.info(f"Written {written} records to {path.absolute()}.")
+    else:
+        logger.info(f"Writing to {path} aborted by the user.")
+
+
+def _skip_written(
+    obj: CliContext,
+    records: Iterable[aoc.CompRecord],
+    count: int,
+    last_ID: str | None,
+) -> Iterator[aoc.CompRecord]:
+    """
+    Drop the first `count` records, which have been written already,
+    and check that the last of them is the one recorded in the checkpoint.
+    """
+    obj.skip = count
+    obj.last_skipped_ID = None
+
+    # When streaming, `load` drops the records as the first one is pulled.
+    # Otherwise they are dropped here.
+    records_left = iter(obj.skip_done(records))
+    first = next(records_left, None)
+    if obj.skip > 0:
+        raise ValueError(
+            f"The records do not match the checkpoint: "
+            f"{count} records have been written but only {count - obj.skip} are given"
+        )
+    if obj.last_skipped_ID != last_ID:
+        raise ValueError(
+            f"The records do not match the checkpoint: "
+            f"the record #{count} is expected to be {last_ID} "
+            f"but is {obj.last_skipped_ID}"
+        )
+
+    if first is not None:
+        yield first
+    yield from records_left
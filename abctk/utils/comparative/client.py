@@ -0,0 +1,244 @@
+"""
+A client of the server started by `serve`, which keeps the real texts open
+and converts, encrypts and decrypts annotation files sent over a Unix socket.
+
+This module uses the standard library only,
+so that a call costs little more than starting Python:
+
+    python -m abctk.utils.comparative.client SOCKET OP [INPUT] [OUTPUT] [OPTIONS]
+
+takes the same arguments as the `client` command.
+
+The protocol: a client sends a request as a line of a JSON object,
+followed by the number of bytes given by its `size`:
+
+    {"op": "decrypt", "format": "jsonl", "style": "bracketed",
+     "output_format": "yaml", "output_style": "bracketed", "size": 1234}
+    <1234 bytes of an annotation file>
+
+where `op` is one of `ping`, `convert`, `encrypt` and `decrypt`,
+and the format and the style are the ones of `annot load` and `annot write`,
+the output ones defaulting to the input ones.
+A compressed file is decompressed as by `annot load`.
+
+The server answers with a line of a JSON object in the same way,
+followed by the file converted:
+
+    {"ok": true, "records": 5000, "size": 5678, ...}
+    <5678 bytes>
+
+or, if the request fails, with `{"ok": false, "error": "..."}` and nothing after it.
+A connection can carry any number of requests one after another.
+"""
+
+import argparse
+from enum import Enum
+import json
+import socket
+from pathlib import Path
+import sys
+from typing import Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Op(str, Enum):
+    PING = "ping"
+    """
+    Do nothing but tell about the server.
+    """
+
+    CONVERT = "convert"
+    ENCRYPT = "encrypt"
+    DECRYPT = "decrypt"
+
+
+class ServerError(RuntimeError):
+    """
+    The server has failed to process a request.
+    """
+
+
+def send_message(fp, header: dict[str, Any], body: bytes = b"") -> None:
+    """
+    Send `header` followed by `body` to a socket file opened by `socket.makefile`.
+    """
+    fp.write(json.dumps({**header, "size": len(body)}).encode("utf-8") + b"\n")
+    fp.write(body)
+    fp.flush()
+
+
+def receive_message(fp) -> tuple[dict[str, Any], bytes] | None:
+    """
+    Receive a header and the body after it.
+    Returns None if the connection is closed before a header.
+    """
+    if not (line := fp.readline()):
+        return None
+    header = json.loads(line)
+    if not isinstance(header, dict):
+        raise ValueError("The header is not a JSON object")
+
+    size = header.get("size", 0)
+    # bool is an int as well.
+    if type(size) is not int or size < 0:
+        raise ValueError(f"The size {size!r} is not a non-negative integer")
+    body = fp.read(size)
+    if len(body) != size:
+        raise ConnectionError("The connection is closed in the middle of a message")
+    return header, body
+
+
+class Client:
+    """
+    A connection to the server, which can be used for many requests.
+    """
+
+    def __init__(self, socket_path: Path | str, timeout: float | None = None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(str(socket_path))
+        except OSError:
+            self._socket.close()
+            raise
+        self._file = self._socket.makefile("rwb")
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def request(
+        self,
+        op: str,
+        body: bytes = b"",
+        **options: Any,
+    ) -> tuple[dict[str, Any], bytes]:
+        """
+        Send a request of `op` with the annotation file `body`,
+        where `options` are the other fields of the header, e.g. `format`.
+
+        Returns the header and the body of the response.
+        Raises ServerError if the server fails to process the request.
+        """
+        send_message(self._file, {**options, "op": op}, body)
+        if (response := receive_message(self._file)) is None:
+            raise ConnectionError("The server has closed the connection")
+
+        header, body_response = response
+        if not header.get("ok"):
+            raise ServerError(header.get("error", "Unknown error"))
+        return header, body_response
+
+
+def run_client(
+    socket_path: Path,
+    op: Op,
+    input_file: Path,
+    output_file: Path,
+    options: dict[str, Any],
+    report: Path | None = None,
+) -> None:
+    """
+    Send `input_file` to the server for `op` and write the result to `output_file`,
+    either of which can be `-` for STDIN or STDOUT.
+    `options` are the other fields of the request, e.g. `format`.
+    """
+    body = b""
+    if op != Op.PING:
+        body = (
+            sys.stdin.buffer.read()
+            if input_file == Path("-")
+            else input_file.read_bytes()
+        )
+
+    with Client(socket_path) as client:
+        header, body_response = client.request(
+            op.value, body, **options, report=report is not None
+        )
+
+    if op == Op.PING:
+        print(json.dumps(header))
+        return
+
+    if output_file == Path("-"):
+        sys.stdout.buffer.write(body_response)
+        sys.stdout.buffer.flush()
+    else:
+        output_file.write_bytes(body_response)
+
+    if op == Op.DECRYPT:
+        mismatches: dict[str, int] = header.get("mismatches", {})
+        if (count_mismatches := sum(mismatches.values())) > 0:
+            logger.warning(
+                f"Decrypted {header['records']} records, of which {count_mismatches} "
+                "do not match their real texts: "
+                + ", ".join(f"{n} {kind}" for kind, n in mismatches.items())
+                + ("" if report else ". See them with `client --report FILE`.")
+            )
+        else:
+            logger.info(f"Decrypted {header['records']} records.")
+
+        if report is not None:
+            # In the same way as `annot decrypt --report`
+            with open(report, "w") as f:
+                for mismatch in header.get("report", []):
+                    f.write(
+                        json.dumps(mismatch, ensure_ascii=False, separators=(",", ":"))
+                    )
+                    f.write("\n")
+
+
+def main(args: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m abctk.utils.comparative.client",
+        description=(
+            "Send an annotation file to `serve` "
+            "and receive it converted, encrypted or decrypted."
+        ),
+    )
+    parser.add_argument("socket_path", type=Path)
+    parser.add_argument("op", choices=[op.value for op in Op])
+    parser.add_argument("input_file", type=Path, nargs="?", default=Path("-"))
+    parser.add_argument("output_file", type=Path, nargs="?", default=Path("-"))
+    parser.add_argument("--ext", "--extension", "-e", dest="format", default="jsonl")
+    parser.add_argument("--style", "-s", default="bracketed")
+    parser.add_argument("--output-ext", "-E", dest="output_format")
+    parser.add_argument("--output-style", "-S")
+    parser.add_argument("--report", type=Path)
+    parser.add_argument("--log-level", "-l", type=int, default=logging.WARNING)
+    parsed = parser.parse_intermixed_args(args)
+
+    logging.basicConfig(
+        level=parsed.log_level,
+        format="[%(name)s %(levelname)s] %(message)s",
+    )
+    options = {"format": parsed.format, "style": parsed.style}
+    if parsed.output_format is not None:
+        options["output_format"] = parsed.output_format
+    if parsed.output_style is not None:
+        options["output_style"] = parsed.output_style
+
+    try:
+        run_client(
+            parsed.socket_path,
+            Op(parsed.op),
+            parsed.input_file,
+            parsed.output_file,
+            options,
+            parsed.report,
+        )
+    except (OSError, ServerError) as e:
+        logger.error(f"{parsed.socket_path}: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+A columnar representation of comparative annotation records.
+
+`CompCorpus` keeps the texts of all the records in one string
+and their tokens and spans in flat arrays of offsets
+instead of a list of strs and a list of `CompSpan` per record:
+
+- token k is `text[token_offsets[k] : token_offsets[k + 1]]`
+- record i has the tokens from `record_tokens[i]` to `record_tokens[i + 1]`
+  and the spans from `record_spans[i]` to `record_spans[i + 1]`
+- span j covers the tokens `span_starts[j]` to `span_ends[j]` of its record
+  and is labelled `labels[span_labels[j]]`
+
+so that the whole corpus consists of a handful of objects
+and operations on the texts are carried out on the whole buffer at once.
+"""
+
+from array import array
+from dataclasses import dataclass
+import itertools
+import logging
+from typing import Iterable, Iterator, Sequence
+
+logger = logging.getLogger(__name__)
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.decrypt import Mismatch, MismatchKind, length_mismatch
+
+
+@dataclass
+class SpanStat:
+    count: int = 0
+    tokens: int = 0
+    """
+    The total number of the tokens covered by the spans.
+    """
+    chars: int = 0
+    """
+    The total number of the characters covered by the spans.
+    """
+
+
+class CompCorpus:
+    def __init__(self):
+        self.IDs: list[str] = []
+        self.comments: list[list[str]] = []
+        self.IDs_v1: list[str | None] = []
+
+        self.text = ""
+        self.token_offsets = array("q", (0,))
+        self.record_tokens = array("q", (0,))
+
+        self.labels: list[str] = []
+        self.span_starts = array("q")
+        self.span_ends = array("q")
+        self.span_labels = array("q")
+        self.record_spans = array("q", (0,))
+
+    @classmethod
+    def from_records(cls, records: Iterable[aoc.CompRecord]) -> "CompCorpus":
+        corpus = cls()
+        chunks: list[str] = []
+        label_IDs: dict[str, int] = {}
+
+        for rec in records:
+            corpus.IDs.append(rec.ID)
+            corpus.comments.append(rec.comments)
+            corpus.IDs_v1.append(rec.ID_v1)
+
+            chunks.append("".join(rec.tokens))
+            corpus.token_offsets.extend(
+                itertools.islice(
+                    itertools.accumulate(
+                        map(len, rec.tokens),
+                        initial=corpus.token_offsets[-1],
+                    ),
+                    1,
+                    None,
+                )
+            )
+            corpus.record_tokens.append(len(corpus.token_offsets) - 1)
+
+            for span in rec.comp:
+                corpus.span_starts.append(span.start)
+                corpus.span_ends.append(span.end)
+                corpus.span_labels.append(
+                    label_IDs.setdefault(span.label, len(label_IDs))
+                )
+            corpus.record_spans.append(len(corpus.span_starts))
+
+        corpus.text = "".join(chunks)
+        corpus.labels = list(label_IDs)
+        return corpus
+
+    def __len__(self) -> int:
+        return len(self.IDs)
+
+    def record_text(self, index: int) -> str:
+        return self.text[
+            self.token_offsets[self.record_tokens[index]] : self.token_offsets[
+                self.record_tokens[index + 1]
+            ]
+        ]
+
+    def iter_records(self) -> Iterator[aoc.CompRecord]:
+        """
+        Convert the records back into `CompRecord`s.
+        """
+        text = self.text
+        labels = self.labels
+        for i, (ID, comments, ID_v1) in enumerate(
+            zip(self.IDs, self.comments, self.IDs_v1)
+        ):
+            offsets = self.token_offsets[
+                self.record_tokens[i] : self.record_tokens[i + 1] + 1
+            ]
+            yield aoc.CompRecord(
+                ID=ID,
+                tokens=[text[start:end] for start, end in itertools.pairwise(offsets)],
+                comp=[
+                    aoc.CompSpan(
+                        start=self.span_starts[j],
+                        end=self.span_ends[j],
+                        label=labels[self.span_labels[j]],
+                    )
+                    for j in range(self.record_spans[i], self.record_spans[i + 1])
+                ],
+                comments=comments,
+                ID_v1=ID_v1,
+            )
+
+    def encrypt(self) -> None:
+        """
+        Replace every character of the texts with ⛔, as `encrypt_record` does.
+        """
+        self.text = "⛔" * len(self.text)
+
+    def decrypt(self, real_texts: Sequence[str | None]) -> list[Mismatch]:
+        """
+        Replace the text of each record with the corresponding item of `real_texts`,
+        cutting it into tokens of the same lengths as `decrypt_record` does:
+        if a real text is shorter than the record,
+        the tokens beyond its end are cut short or emptied.
+        The records whose real text is None are left as they are.
+
+        Returns the records whose real texts are longer or shorter,
+        in the order of the records.
+        """
+        if len(real_texts) != len(self):
+            raise ValueError(
+                f"{len(real_texts)} real texts are given for {len(self)} records"
+            )
+
+        offsets = self.token_offsets
+        chunks: list[str] = []
+        mismatches: list[Mismatch] = []
+        # Whether the offsets have to be rebuilt due to a real text that is too short
+        shortened = False
+
+        for i, real_text in enumerate(real_texts):
+            start = offsets[self.record_tokens[i]]
+            end = offsets[self.record_tokens[i + 1]]
+            if real_text is None:
+                chunks.append(self.text[start:end])
+                continue
+
+            if mismatch := length_mismatch(self.IDs[i], end - start, len(real_text)):
+                mismatches.append(mismatch)
+                shortened = shortened or mismatch.kind == MismatchKind.SHORTER
+            chunks.append(real_text[: end - start])
+
+        if shortened:
+            self.token_offsets = array("q", (0,))
+            for i, chunk in enumerate(chunks):
+                token_start = self.record_tokens[i]
+                token_end = self.record_tokens[i + 1]
+                start = offsets[token_start]
+                base = self.token_offsets[-1]
+                self.token_offsets.extend(
+                    base + min(offset - start, len(chunk))
+                    for offset in offsets[token_start + 1 : token_end + 1]
+                )
+        self.text = "".join(chunks)
+        return mismatches
+
+    def span_stats(self) -> dict[str, SpanStat]:
+        """
+        Count the spans and the tokens and characters they cover by label.
+        The spans out of the tokens of their records are left out with a warning.
+        """
+        stats: dict[int, SpanStat] = {}
+        offsets = self.token_offsets
+        for i in range(len(self)):
+            base = self.record_tokens[i]
+            n = self.record_tokens[i + 1] - base
+            for j in range(self.record_spans[i], self.record_spans[i + 1]):
+                start = self.span_starts[j]
+                end = self.span_ends[j]
+                label = self.span_labels[j]
+                if not 0 <= start <= end <= n:
+                    logger.warning(
+                        f"The span {self.labels[label]} [{start}, {end}) "
+                        f"of {self.IDs[i]} is out of its {n} tokens; "
+                        "left out of the statistics"
+                    )
+                    continue
+
+                stat = stats.setdefault(label, SpanStat())
+                stat.count += 1
+                stat.tokens += end - start
+                stat.chars += offsets[base + end] - offsets[base + start]
+        return {self.labels[label]: stats[label] for label in sorted(stats)}
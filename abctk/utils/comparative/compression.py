@@ -0,0 +1,229 @@
+"""
+Transparent gzip and zstd compression of annotation files.
+
+Compressed files are told by their first bytes when read,
+so that they need no particular extension and can be piped in,
+and by their extensions (.gz, .zst) when written.
+
+gzip is in the standard library.
+zstd needs the `zstandard` package, and is compressed in several threads if asked.
+
+A compressed file may consist of several gzip members or zstd frames,
+which are decompressed as if they were one.
+`text_writer` ends one at every call,
+so that a file can be truncated after any of them and appended to.
+"""
+
+import contextlib
+from enum import Enum
+import gzip
+import io
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, TextIO
+
+
+class Compression(str, Enum):
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+_MAGICS = {
+    Compression.GZIP: b"\x1f\x8b",
+    Compression.ZSTD: b"\x28\xb5\x2f\xfd",
+}
+
+_SUFFIXES = {
+    ".gz": Compression.GZIP,
+    ".zst": Compression.ZSTD,
+    ".zstd": Compression.ZSTD,
+}
+
+DEFAULT_LEVELS = {
+    Compression.GZIP: 6,
+    Compression.ZSTD: 3,
+}
+"""
+The default compression levels, the same as the ones of the gzip and zstd commands.
+"""
+
+
+def _zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression needs the zstandard package (pip install zstandard)"
+        ) from None
+    return zstandard
+
+
+def from_suffix(path: Path) -> Compression:
+    return _SUFFIXES.get(path.suffix.lower(), Compression.NONE)
+
+
+def strip_suffix(path: Path) -> Path:
+    """
+    Remove the compression extension of `path`, if any.
+    """
+    return path.with_suffix("") if path.suffix.lower() in _SUFFIXES else path
+
+
+def sniff(buffer: BinaryIO) -> Compression:
+    """
+    Tell the compression of `buffer` by its first bytes without consuming them.
+    Streams that can neither peek nor seek are taken as uncompressed.
+    """
+    if hasattr(buffer, "peek"):
+        head = buffer.peek(4)[:4]
+    elif buffer.seekable():
+        pos = buffer.tell()
+        head = buffer.read(4)
+        buffer.seek(pos)
+    else:
+        return Compression.NONE
+
+    for compression, magic in _MAGICS.items():
+        if head.startswith(magic):
+            return compression
+    return Compression.NONE
+
+
+class _Sequential(io.RawIOBase):
+    """
+    A decompressed stream, which can be read through only once.
+
+    `GzipFile` seeks by decompressing the file again from the start,
+    which is never worth it for the binary format.
+
+    The compressed stream `fp` is kept referenced,
+    as a text stream closes its buffer when it is garbage-collected.
+    """
+
+    def __init__(self, stream: BinaryIO, fp: TextIO | BinaryIO):
+        self._stream = stream
+        self._fp = fp
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        return self._stream.readinto(b)
+
+    def close(self) -> None:
+        self._stream.close()
+        super().close()
+
+
+def decompressing(fp: TextIO | BinaryIO) -> TextIO | BinaryIO:
+    """
+    Wrap `fp` in a decompressor if it is compressed.
+    Text streams stay text streams, with the same encoding.
+    """
+    is_text = hasattr(fp, "encoding")
+    buffer = getattr(fp, "buffer", None) if is_text else fp
+    if buffer is None:
+        # e.g. `io.StringIO`
+        return fp
+
+    match sniff(buffer):  # type: ignore
+        case Compression.NONE:
+            return fp
+        case Compression.GZIP:
+            stream = gzip.GzipFile(fileobj=buffer, mode="rb")
+        case Compression.ZSTD:
+            stream = (
+                _zstandard()
+                .ZstdDecompressor()
+                .stream_reader(buffer, read_across_frames=True, closefd=False)
+            )
+        case _:
+            raise ValueError("Unknown compression")
+
+    decompressed = io.BufferedReader(_Sequential(stream, fp))  # type: ignore
+    if is_text:
+        return io.TextIOWrapper(
+            decompressed,
+            encoding=fp.encoding,  # type: ignore
+            errors=fp.errors,  # type: ignore
+        )
+    return decompressed
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Decompress `data` if it is compressed.
+    """
+    match sniff(io.BytesIO(data)):
+        case Compression.NONE:
+            return data
+        case Compression.GZIP:
+            return gzip.decompress(data)
+        case Compression.ZSTD:
+            reader = (
+                _zstandard()
+                .ZstdDecompressor()
+                .stream_reader(data, read_across_frames=True)
+            )
+            return reader.read()
+        case _:
+            raise ValueError("Unknown compression")
+
+
+def _compressor(
+    buffer: BinaryIO,
+    compression: Compression,
+    level: int | None,
+    threads: int,
+) -> BinaryIO:
+    if level is None:
+        level = DEFAULT_LEVELS.get(compression, 0)
+
+    match compression:
+        case Compression.GZIP:
+            # No file name or time in the header, so that the output is reproducible.
+            return gzip.GzipFile(
+                filename="",
+                mode="wb",
+                compresslevel=level,
+                fileobj=buffer,
+                mtime=0,
+            )  # type: ignore
+        case Compression.ZSTD:
+            return (
+                _zstandard()
+                .ZstdCompressor(level=level, threads=threads if threads > 1 else 0)
+                .stream_writer(buffer, closefd=False)
+            )
+        case _:
+            raise ValueError(f"{compression} is an invalid compression")
+
+
+@contextlib.contextmanager
+def text_writer(
+    buffer: BinaryIO,
+    compression: Compression,
+    level: int | None = None,
+    threads: int = 1,
+) -> Iterator[TextIO]:
+    """
+    Write text to `buffer`, compressed into a gzip member or a zstd frame
+    which is ended when the context is left.
+    `buffer` is left open.
+
+    With `threads` > 1, zstd is compressed in that many threads.
+    gzip is always compressed in the current thread.
+    """
+    stream = (
+        buffer
+        if compression == Compression.NONE
+        else _compressor(buffer, compression, level, threads)
+    )
+    fp = io.TextIOWrapper(stream, encoding="utf-8")  # type: ignore
+    try:
+        yield fp  # type: ignore
+        fp.flush()
+    finally:
+        fp.detach()
+        if stream is not buffer:
+            stream.close()
@@ -0,0 +1,155 @@
+"""
+Decrypting records with the real texts of BCCWJ, a chunk of records at a time.
+
+For each chunk, the ID of each record is parsed once,
+the real texts of all the records are looked up at once,
+and the tokens are cut out of the real texts in one pass.
+The records whose texts do not fit are reported as `Mismatch`es
+instead of being logged one by one.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterable, Mapping
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.BCCWJ.incorp import get_real_texts
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.profiling import profiler
+
+
+class MismatchKind(str, Enum):
+    LONGER = "longer"
+    """
+    The real text is longer than the annotation, whose tokens miss its end.
+    """
+
+    SHORTER = "shorter"
+    """
+    The real text is shorter than the annotation, whose last tokens are cut short.
+    """
+
+    NOT_FOUND = "not-found"
+    """
+    The real text is not found. The record is left encrypted.
+    """
+
+    UNPARSABLE_ID = "unparsable-ID"
+    """
+    The ID is not a BCCWJ one. The record is left encrypted.
+    """
+
+
+@dataclass
+class Mismatch:
+    ID: str
+    kind: MismatchKind
+    annotation_length: int
+    """
+    The total length of the tokens in characters.
+    """
+    real_text_length: int | None = None
+
+
+def encrypt_record(record: aoc.CompRecord) -> None:
+    """
+    Replace each character of the tokens of `record` with ⛔.
+    """
+    record.tokens = tuple("⛔" * len(t) for t in record.tokens)
+
+
+def decrypt_record(record: aoc.CompRecord, real_text: str) -> int:
+    """
+    Replace the tokens of `record` with the characters of `real_text`
+    at the same positions.
+
+    Returns the total length of the tokens.
+    """
+    tokens: list[str] = []
+    char_pos = 0
+    for t in record.tokens:
+        length = len(t)
+        tokens.append(real_text[char_pos : char_pos + length])
+        char_pos += length
+    record.tokens = tokens
+    return char_pos
+
+
+def length_mismatch(
+    ID: object,
+    annotation_length: int,
+    real_text_length: int,
+) -> Mismatch | None:
+    """
+    Tell whether the real text of a record decrypted is longer or shorter
+    than its annotation.
+    """
+    if annotation_length < real_text_length:
+        # ANNOTATION: -----------------------|
+        # REAL TEXT:  ------------------------------------|
+        kind = MismatchKind.LONGER
+    elif annotation_length > real_text_length:
+        # ANNOTATION: -----------------------|
+        # REAL TEXT:  ----------------|
+        kind = MismatchKind.SHORTER
+    else:
+        return None
+    return Mismatch(
+        ID=str(ID),
+        kind=kind,
+        annotation_length=annotation_length,
+        real_text_length=real_text_length,
+    )
+
+
+def decrypt_records_BCCWJ(
+    records: list[aoc.CompRecord],
+    real_texts: Mapping[BCCWJSentIndex, str],
+) -> list[tuple[aoc.CompRecord, Mismatch | None]]:
+    """
+    Decrypt `records` in place with the real texts in `real_texts`.
+    """
+    idxs: list[BCCWJSentIndex | None] = []
+    for record in records:
+        if ID_parsed := aoc.ABCTComp_BCCWJ_ID.from_string(record.ID):
+            idxs.append(BCCWJSentIndex(ID_parsed.sampleID, ID_parsed.start_pos))
+        else:
+            idxs.append(None)
+
+    with profiler.phase("BCCWJ.lookup"):
+        found_texts = get_real_texts(
+            idxs, real_texts, corpus_ids=[record.ID for record in records]
+        )
+        profiler.count("BCCWJ.lookup", len(records))
+
+    result: list[tuple[aoc.CompRecord, Mismatch | None]] = []
+    for record, idx, real_text in zip(records, idxs, found_texts):
+        if real_text is None:
+            result.append(
+                (
+                    record,
+                    Mismatch(
+                        ID=str(record.ID),
+                        kind=(
+                            MismatchKind.UNPARSABLE_ID
+                            if idx is None
+                            else MismatchKind.NOT_FOUND
+                        ),
+                        annotation_length=sum(map(len, record.tokens)),
+                    ),
+                )
+            )
+            continue
+
+        annotation_length = decrypt_record(record, real_text)
+        result.append(
+            (record, length_mismatch(record.ID, annotation_length, len(real_text)))
+        )
+    return result
+
+
+def summarize_mismatches(mismatches: Iterable[Mismatch]) -> str:
+    counts = Counter(mismatch.kind for mismatch in mismatches)
+    return ", ".join(f"{counts[kind]} {kind.value}" for kind in MismatchKind)
@@ -0,0 +1,212 @@
+"""
+An index of the records in a JSONL annotation file by their IDs.
+
+The index maps the ID and the ID in v1 of each record
+to the offset of its line in bytes,
+and is saved next to the file as FILE.idx.
+It records the size and the mtime of the file
+and is rebuilt whenever either of them changes.
+"""
+
+import dataclasses
+from dataclasses import dataclass
+import io
+import os
+from pathlib import Path
+import tempfile
+from typing import Iterable, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative import jsonl
+from abctk.utils.comparative.compression import Compression, sniff
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+)
+from abctk.utils.comparative.profiling import profiler
+
+INDEX_VERSION = 1
+
+
+@dataclass
+class IDIndex:
+    format: AnnotationFileFormat
+    style: AnnotationFileStyle
+    size: int
+    """
+    The size of the indexed file in bytes.
+    """
+    mtime_ns: int
+    """
+    The mtime of the indexed file.
+    """
+    IDs: dict[str, int]
+    """
+    The offsets of the records by ID.
+    """
+    IDs_v1: dict[str, int]
+    """
+    The offsets of the records by ID in v1.
+    """
+
+    def is_valid_for(self, path: Path) -> bool:
+        stat = path.stat()
+        return (self.size, self.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+    def find(self, ID: str) -> int | None:
+        """
+        Get the offset of the record with the ID or the ID in v1 `ID`.
+        """
+        offset = self.IDs.get(ID)
+        return self.IDs_v1.get(ID) if offset is None else offset
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.idx")
+
+
+def _IDs_of_line(line: bytes) -> tuple[str, str | None]:
+    record = jsonl.loads(line)
+    return str(record["ID"]), record.get("ID_v1")
+
+
+def build_index(
+    path: Path,
+    format: AnnotationFileFormat,
+    style: AnnotationFileStyle,
+) -> IDIndex:
+    # A record in the text format can span several lines,
+    # whose bounds are known only to abctk.obj.
+    if format != AnnotationFileFormat.JSONL:
+        raise ValueError(f"Only JSONL files can be indexed by ID, not {format.value}")
+
+    stat = path.stat()
+    IDs: dict[str, int] = {}
+    IDs_v1: dict[str, int] = {}
+
+    with profiler.phase("annot.index"), open(path, "rb") as f:
+        if sniff(f) != Compression.NONE:
+            raise ValueError(f"{path} is compressed and cannot be indexed by ID")
+
+        offset = 0
+        for line in f:
+            if line.strip():
+                ID, ID_v1 = _IDs_of_line(line)
+                if IDs.setdefault(ID, offset) != offset:
+                    logger.warning(f"{path} has more than one record with ID {ID}")
+                if ID_v1 is not None:
+                    IDs_v1.setdefault(ID_v1, offset)
+            offset += len(line)
+        profiler.count("annot.index", len(IDs))
+
+    return IDIndex(
+        format=format,
+        style=style,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        IDs=IDs,
+        IDs_v1=IDs_v1,
+    )
+
+
+def load_index(
+    path: Path,
+    format: AnnotationFileFormat,
+    style: AnnotationFileStyle,
+) -> IDIndex | None:
+    """
+    Load the index of `path` if it is up to date.
+    """
+    try:
+        with open(index_path(path), "rb") as f:
+            d = jsonl.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.warning(f"Ignoring the broken index {index_path(path)}")
+        return None
+
+    if d.get("version") != INDEX_VERSION:
+        return None
+    index = IDIndex(
+        format=AnnotationFileFormat(d["format"]),
+        style=AnnotationFileStyle(d["style"]),
+        size=d["size"],
+        mtime_ns=d["mtime_ns"],
+        IDs=d["IDs"],
+        IDs_v1=d["IDs_v1"],
+    )
+    if (index.format, index.style) != (format, style) or not index.is_valid_for(path):
+        return None
+    return index
+
+
+def save_index(path: Path, index: IDIndex) -> None:
+    path_index = index_path(path)
+    fd, path_temp = tempfile.mkstemp(
+        dir=path_index.parent,
+        prefix=f"{path_index.name}.",
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(jsonl.dumps({"version": INDEX_VERSION} | dataclasses.asdict(index)))
+        os.replace(path_temp, path_index)
+    except BaseException:
+        os.unlink(path_temp)
+        raise
+
+
+def get_index(
+    path: Path,
+    format: AnnotationFileFormat,
+    style: AnnotationFileStyle,
+) -> IDIndex:
+    """
+    Load the index of `path`, building and saving it if it is missing or outdated.
+    """
+    index = load_index(path, format, style)
+    if index is None:
+        logger.info(f"Indexing {path} by ID")
+        index = build_index(path, format, style)
+        try:
+            save_index(path, index)
+        except OSError as e:
+            logger.warning(f"Failed to save the index of {path}: {e}")
+    return index
+
+
+def load_records_by_ID(
+    path: Path,
+    format: AnnotationFileFormat,
+    style: AnnotationFileStyle,
+    IDs: Iterable[str],
+) -> Iterator[aoc.CompRecord]:
+    """
+    Read the records of `path` whose ID or ID in v1 is in `IDs`, in the order of the file.
+    """
+    index = get_index(path, format, style)
+
+    offsets: set[int] = set()
+    missing: list[str] = []
+    for ID in IDs:
+        offset = index.find(ID)
+        if offset is None:
+            missing.append(ID)
+        else:
+            offsets.add(offset)
+    if missing:
+        logger.warning(
+            f"{len(missing)} IDs are not found in {path}: {', '.join(missing[:10])}"
+            + (", ..." if len(missing) > 10 else "")
+        )
+
+    with open(path, "rb") as f:
+        for offset in sorted(offsets):
+            f.seek(offset)
+            line = f.readline().decode("utf-8")
+            yield from load_file(io.StringIO(line), format=format, style=style)
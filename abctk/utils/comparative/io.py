@@ -1,17 +1,20 @@
 from enum import Enum
 import dataclasses
-from typing import TextIO, Iterator, Iterable
-import json
-
-import ruamel.yaml
+import itertools
+from typing import Any, BinaryIO, TextIO, Iterator, Iterable
 
 import abctk.obj.comparative as aoc
 
+from abctk.utils.comparative import brackets, jsonl
+from abctk.utils.comparative.compression import decompressing
+from abctk.utils.comparative.parallel import chunked, map_chunks
+
 
 class AnnotationFileFormat(str, Enum):
     YAML = "yaml"
     JSONL = "jsonl"
     TEXT = "txt"
+    BINARY = "bin"
 
 
 class AnnotationFileStyle(str, Enum):
@@ -26,12 +29,71 @@ class AnnotationFileStyle(str, Enum):
     """
 
 
+def _from_bracketed_records(
+    records: Iterable[dict[str, Any]],
+    jobs: int,
+) -> Iterator[aoc.CompRecord]:
+    if jobs > 1:
+        return map_chunks(
+            brackets.from_bracketed_batch, records, jobs, brackets.BATCH_SIZE
+        )
+    else:
+        return (
+            record
+            for chunk in chunked(records, brackets.BATCH_SIZE)
+            for record in brackets.from_bracketed_batch(chunk)
+        )
+
+
+def _binary_buffer(fp: TextIO | BinaryIO) -> BinaryIO:
+    """
+    Get the binary buffer underlying a text stream such as `sys.stdout`.
+    """
+    if not hasattr(fp, "encoding"):
+        return fp  # type: ignore
+    buffer = getattr(fp, "buffer", None)
+    if buffer is None:
+        raise ValueError("The binary format needs a binary stream")
+    fp.flush()
+    return buffer
+
+
 def load_file(
-    fp: TextIO,
+    fp: TextIO | BinaryIO,
     format: AnnotationFileFormat,
     style: AnnotationFileStyle,
+    jobs: int = 1,
+    start: int = 0,
+    stop: int | None = None,
 ) -> Iterator[aoc.CompRecord]:
+    """
+    Read records from `fp`.
+
+    With `jobs` > 1, the bracketed annotations in YAML and JSONL files
+    are parsed in that many worker processes.
+
+    Only the records from `start` to `stop` (exclusive) are read.
+    Binary files skip to `start` directly if `fp` is seekable;
+    the other formats go through the records before it.
+
+    `fp` is decompressed if it is compressed with gzip or zstd,
+    which is told by its first bytes.
+    Compressed binary files are read from the start.
+    """
+    fp = decompressing(fp)
     match format:
+        case AnnotationFileFormat.BINARY:
+            from abctk.utils.comparative import binary
+
+            match style:
+                case AnnotationFileStyle.SEPARATE:
+                    return binary.read_records(_binary_buffer(fp), start, stop)
+                case AnnotationFileStyle.BRACKETED:
+                    raise ValueError(
+                        "The binary format does not have the bracketed style"
+                    )
+                case _:
+                    raise ValueError(f"{style} is an invalid annotation file style")
         case AnnotationFileFormat.TEXT:
             match style:
                 case AnnotationFileStyle.BRACKETED:
@@ -41,18 +103,11 @@ def load_file(
                 case _:
                     raise ValueError(f"{style} is an invalid annotation file style")
         case AnnotationFileFormat.YAML:
-            yaml = ruamel.yaml.YAML()
+            from abctk.utils.comparative.yaml_io import iter_sequence
+
             match style:
                 case AnnotationFileStyle.BRACKETED:
-                    records = (
-                        aoc.CompRecord.from_brackets(
-                            line=record["annot"],
-                            ID=record["ID"],
-                            comments=record.get("comments"),
-                            ID_v1=record.get("ID_v1"),
-                        )
-                        for record in yaml.load(fp)
-                    )
+                    records = _from_bracketed_records(iter_sequence(fp), jobs)
                 case AnnotationFileStyle.SEPARATE:
                     records = (
                         aoc.CompRecord(
@@ -69,23 +124,14 @@ def load_file(
                             comments=record.get("comments", list()),
                             ID_v1=record.get("ID_v1"),
                         )
-                        for record in yaml.load(fp)
+                        for record in iter_sequence(fp)
                     )
                 case _:
                     raise ValueError(f"{style} is an invalid annotation file style")
         case AnnotationFileFormat.JSONL:
             match style:
                 case AnnotationFileStyle.BRACKETED:
-                    records = (
-                        aoc.CompRecord.from_brackets(
-                            line=record["annot"],
-                            ID=record["ID"],
-                            comments=record.get("comments"),
-                            ID_v1=record.get("ID_v1"),
-                        )
-                        for line in fp
-                        for record in (json.loads(line),)
-                    )
+                    records = _from_bracketed_records(jsonl.read_lines(fp), jobs)
                 case AnnotationFileStyle.SEPARATE:
                     records = (
                         aoc.CompRecord(
@@ -102,53 +148,61 @@ def load_file(
                             comments=record.get("comments", list()),
                             ID_v1=record.get("ID_v1"),
                         )
-                        for line in fp
-                        for record in (json.loads(line),)
+                        for record in jsonl.read_lines(fp)
                     )
                 case _:
                     raise ValueError(f"{style} is an invalid annotation file style")
         case _:
             raise ValueError(f"{format} is an invalid annotation file format")
+    if start or stop is not None:
+        records = itertools.islice(records, start, stop)
     return records
 
 
 def write_file(
     records: Iterable[aoc.CompRecord],
-    buffer: TextIO,
+    buffer: TextIO | BinaryIO,
     format: AnnotationFileFormat,
     style: AnnotationFileStyle,
+    continued: bool = False,
 ) -> None:
+    """
+    Write `records` to `buffer`.
+
+    With `continued`, the records are written
+    so that they continue the ones written by a previous call to the same buffer,
+    which matters to YAML, where the records form a single sequence,
+    and to the binary format, which keeps the offsets of the records.
+
+    The binary format is written to the binary buffer underlying a text stream.
+    """
+
     def _convert_to_bracket(record: aoc.CompRecord):
-        d = dataclasses.asdict(record)
+        d = {
+            f.name: getattr(record, f.name)
+            for f in dataclasses.fields(record)
+            if f.name not in ("tokens", "comp")
+        }
         d["annot"] = record.to_brackets()
-        del d["tokens"]
-        del d["comp"]
         return d
 
     match format:
         case AnnotationFileFormat.JSONL:
             match style:
                 case AnnotationFileStyle.BRACKETED:
-                    for rec in records:
-                        json.dump(
-                            _convert_to_bracket(rec),
-                            buffer,
-                            ensure_ascii=False,
-                            separators=(",", ":"),
-                        )
-                        buffer.write("\n")
+                    jsonl.write_lines(
+                        (_convert_to_bracket(rec) for rec in records),
+                        buffer,
+                    )
                 case AnnotationFileStyle.SEPARATE:
-                    for rec in records:
-                        json.dump(
-                            dataclasses.asdict(rec),
-                            buffer,
-                            ensure_ascii=False,
-                            separators=(",", ":"),
-                        )
-                        buffer.write("\n")
+                    jsonl.write_lines(records, buffer)
                 case _:
                     raise ValueError(f"{style} is an invalid annotation file style")
         case AnnotationFileFormat.YAML:
+            import ruamel.yaml
+
+            from abctk.utils.comparative.yaml_io import dump_sequence
+
             yaml = ruamel.yaml.YAML()
             yaml.version = (1, 2)
             yaml.width = 1000
@@ -168,11 +222,19 @@ def write_file(
                             )
 
                     yaml.representer.add_representer(str, represent_annot)
-                    records_asdict = tuple(_convert_to_bracket(rec) for rec in records)
-                    yaml.dump(records_asdict, buffer)
+                    dump_sequence(
+                        yaml,
+                        (_convert_to_bracket(rec) for rec in records),
+                        buffer,
+                        continued=continued,
+                    )
                 case AnnotationFileStyle.SEPARATE:
-                    records_asdict = tuple(dataclasses.asdict(rec) for rec in records)
-                    yaml.dump(records_asdict, buffer)
+                    dump_sequence(
+                        yaml,
+                        (dataclasses.asdict(rec) for rec in records),
+                        buffer,
+                        continued=continued,
+                    )
                 case _:
                     raise ValueError(f"{style} is an invalid annotation file style")
         case AnnotationFileFormat.TEXT:
@@ -185,5 +247,19 @@ def write_file(
                     raise ValueError("The text format does not have the separate style")
                 case _:
                     raise ValueError(f"{style} is an invalid annotation file style")
+        case AnnotationFileFormat.BINARY:
+            from abctk.utils.comparative import binary
+
+            match style:
+                case AnnotationFileStyle.SEPARATE:
+                    binary.write_records(
+                        records, _binary_buffer(buffer), continued=continued
+                    )
+                case AnnotationFileStyle.BRACKETED:
+                    raise ValueError(
+                        "The binary format does not have the bracketed style"
+                    )
+                case _:
+                    raise ValueError(f"{style} is an invalid annotation file style")
         case _:
             raise ValueError(f"{format} is an invalid output file type")
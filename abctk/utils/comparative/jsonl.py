@@ -0,0 +1,88 @@
+"""
+Encoding and decoding of JSON Lines.
+
+orjson is used if it is installed, and the standard `json` module otherwise.
+Both give the same output.
+Dataclass instances such as `CompRecord` and `CompSpan`
+are serialized directly without being converted into dicts beforehand.
+"""
+
+import dataclasses
+import functools
+import json
+from typing import Any, Iterable, Iterator, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BATCH_SIZE = 1024
+"""
+The number of lines written at once.
+"""
+
+
+@functools.cache
+def _field_names(cls: type) -> tuple[str, ...]:
+    return tuple(f.name for f in dataclasses.fields(cls))
+
+
+def _default(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {name: getattr(obj, name) for name in _field_names(type(obj))}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(
+    ensure_ascii=False,
+    separators=(",", ":"),
+    default=_default,
+)
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize `obj` into a line of JSON without the trailing newline.
+    """
+    if orjson:
+        return orjson.dumps(obj).decode("utf-8")
+    else:
+        return _encoder.encode(obj)
+
+
+def loads(line: str | bytes) -> Any:
+    if orjson:
+        return orjson.loads(line)
+    else:
+        return json.loads(line)
+
+
+def write_lines(
+    objs: Iterable[Any],
+    buffer: TextIO,
+    batch_size: int = BATCH_SIZE,
+) -> None:
+    """
+    Write `objs` to `buffer`, one per line, `batch_size` lines at a time.
+    """
+    batch: list[str] = []
+    for obj in objs:
+        batch.append(dumps(obj))
+        if len(batch) >= batch_size:
+            batch.append("")
+            buffer.write("\n".join(batch))
+            batch.clear()
+
+    if batch:
+        batch.append("")
+        buffer.write("\n".join(batch))
+
+
+def read_lines(fp: Iterable[str]) -> Iterator[Any]:
+    """
+    Decode each line of `fp`, skipping blank lines.
+    """
+    for line in fp:
+        if line and not line.isspace():
+            yield loads(line)
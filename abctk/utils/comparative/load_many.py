@@ -0,0 +1,186 @@
+"""
+Loading several annotation files with their reading overlapped.
+
+The files are read in threads a few files ahead of the one being parsed,
+so that the latency of a network file system is paid for all of them at once.
+They are parsed in the main thread or, with `jobs` > 1, in worker processes.
+The records are yielded file by file in the order of the files given.
+"""
+
+from collections import deque
+import contextlib
+from dataclasses import dataclass
+import glob
+import io
+from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.compression import decompress, strip_suffix
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+)
+from abctk.utils.comparative.parallel import mp_context
+
+_FORMATS_BY_SUFFIX = {
+    ".jsonl": AnnotationFileFormat.JSONL,
+    ".yaml": AnnotationFileFormat.YAML,
+    ".yml": AnnotationFileFormat.YAML,
+    ".txt": AnnotationFileFormat.TEXT,
+    ".bin": AnnotationFileFormat.BINARY,
+}
+
+
+def guess_format(path: Path) -> AnnotationFileFormat:
+    """
+    Tell the format of `path` from its extension, ignoring .gz and .zst.
+    """
+    try:
+        return _FORMATS_BY_SUFFIX[strip_suffix(path).suffix.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Cannot tell the format of {path} from its extension"
+        ) from None
+
+
+def default_style(format: AnnotationFileFormat) -> AnnotationFileStyle:
+    """
+    The style of a file whose style is not given:
+    bracketed for the text format, which has no other style, and separate otherwise.
+    """
+    if format == AnnotationFileFormat.TEXT:
+        return AnnotationFileStyle.BRACKETED
+    return AnnotationFileStyle.SEPARATE
+
+
+def expand_globs(patterns: Iterable[str]) -> list[Path]:
+    """
+    List the files matching `patterns`, pattern by pattern and sorted within each,
+    leaving out the ones matched by an earlier pattern.
+    """
+    paths: dict[Path, None] = {}
+    for pattern in patterns:
+        matched = sorted(glob.glob(pattern, recursive=True))
+        if not matched:
+            raise FileNotFoundError(f"No files match {pattern}")
+        for path in matched:
+            if Path(path).is_file():
+                paths.setdefault(Path(path))
+    return list(paths)
+
+
+@dataclass
+class FileSpec:
+    path: Path
+    format: AnnotationFileFormat
+    style: AnnotationFileStyle
+
+
+@dataclass
+class LoadedFile:
+    spec: FileSpec
+    records: list[aoc.CompRecord]
+    size: int
+    """
+    The size of the file in bytes.
+    """
+    read_seconds: float
+    """
+    The time from the start of the reading to its end.
+    """
+    wait_seconds: float
+    """
+    The time spent waiting for the file to be read,
+    and to be parsed if it is parsed in a worker process,
+    after the previous file was done with.
+    """
+    parse_seconds: float
+
+
+def _read(path: Path) -> tuple[bytes, float]:
+    start = time.perf_counter()
+    data = path.read_bytes()
+    return data, time.perf_counter() - start
+
+
+def _parse(
+    data: bytes,
+    format: AnnotationFileFormat,
+    style: AnnotationFileStyle,
+) -> tuple[list[aoc.CompRecord], float]:
+    start = time.perf_counter()
+    data = decompress(data)
+    fp = io.BytesIO(data)
+    if format != AnnotationFileFormat.BINARY:
+        # Decoded as by `open` in `annot load`
+        fp = io.TextIOWrapper(fp)
+    records = list(load_file(fp, format=format, style=style))
+    return records, time.perf_counter() - start
+
+
+def load_many(
+    specs: Iterable[FileSpec],
+    prefetch: int = 4,
+    jobs: int = 1,
+) -> Iterator[LoadedFile]:
+    """
+    Load the files of `specs`, reading up to `prefetch` files ahead.
+    """
+    # Imported here as it takes a while to load multiprocessing.
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    with contextlib.ExitStack() as stack:
+        readers = stack.enter_context(ThreadPoolExecutor(max_workers=prefetch))
+        parsers = (
+            stack.enter_context(
+                ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context())
+            )
+            if jobs > 1
+            else None
+        )
+
+        def _fetch(spec: FileSpec):
+            data, read_seconds = _read(spec.path)
+            if parsers:
+                # Handed over to a worker as soon as it is read.
+                return (
+                    len(data),
+                    read_seconds,
+                    parsers.submit(_parse, data, spec.format, spec.style),
+                )
+            else:
+                return len(data), read_seconds, data
+
+        def _finish(spec: FileSpec, future: "Future") -> LoadedFile:
+            start = time.perf_counter()
+            size, read_seconds, fetched = future.result()
+            if parsers:
+                records, parse_seconds = fetched.result()
+                wait_seconds = time.perf_counter() - start
+            else:
+                wait_seconds = time.perf_counter() - start
+                records, parse_seconds = _parse(fetched, spec.format, spec.style)
+            return LoadedFile(
+                spec=spec,
+                records=records,
+                size=size,
+                read_seconds=read_seconds,
+                wait_seconds=wait_seconds,
+                parse_seconds=parse_seconds,
+            )
+
+        pending: deque[tuple[FileSpec, Future]] = deque()
+        for spec in specs:
+            pending.append((spec, readers.submit(_fetch, spec)))
+            if len(pending) > prefetch:
+                yield _finish(*pending.popleft())
+
+        while pending:
+            yield _finish(*pending.popleft())
@@ -0,0 +1,68 @@
+from collections import deque
+import itertools
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, TypeVar
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+CHUNK_SIZE = 1000
+"""
+The number of items sent to a worker process at once.
+"""
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    it = iter(items)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+def mp_context():
+    """
+    The context the worker processes are started in.
+
+    They are not forked from this process,
+    as forking a process with threads running, e.g. of zstd, can deadlock.
+    """
+    import multiprocessing
+
+    return multiprocessing.get_context("forkserver")
+
+
+def map_chunks(
+    func: Callable[[list[T]], list[U]],
+    items: Iterable[T],
+    jobs: int,
+    chunk_size: int = CHUNK_SIZE,
+    initializer: Callable[..., Any] | None = None,
+    initargs: tuple[Any, ...] = (),
+) -> Iterator[U]:
+    """
+    Apply `func` to chunks of `items` in `jobs` worker processes
+    and yield the results in the order of `items`.
+
+    `items` are consumed lazily:
+    at most two chunks per worker are in flight at a time.
+    `initializer` is called once in each worker with `initargs`,
+    which is the place for state shared by all the chunks.
+    """
+    # Imported here as it takes a while to load multiprocessing.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=mp_context(),
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        pending: deque[Future[list[U]]] = deque()
+        for chunk in chunked(items, chunk_size):
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= 2 * jobs:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,277 @@
+"""
+Lightweight per-phase profiling of the CLI.
+
+Code marks its phases with `profiler.phase(NAME)` or `profiler.iterate(NAME, ITERABLE)`.
+Nothing is measured unless `profiler.enable()` is called,
+in which case each phase gets its wall time and CPU time,
+both including and excluding the nested phases,
+the number of records and the peak RSS of the process when it ended.
+"""
+
+import contextlib
+from dataclasses import asdict, dataclass
+import functools
+import json
+import resource
+import sys
+import time
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    ParamSpec,
+    TextIO,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    import cProfile
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+_RSS_CHECK_INTERVAL = 0.05
+"""
+The minimum interval in seconds between two checks of the peak RSS.
+"""
+
+
+def _peak_rss_MiB() -> float:
+    ru_maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return ru_maxrss / 2**20 if sys.platform == "darwin" else ru_maxrss / 2**10
+
+
+@dataclass
+class PhaseStat:
+    calls: int = 0
+    records: int = 0
+    wall: float = 0.0
+    wall_self: float = 0.0
+    cpu: float = 0.0
+    cpu_self: float = 0.0
+    peak_rss_MiB: float = 0.0
+
+
+class _Frame:
+    __slots__ = (
+        "stat",
+        "profile",
+        "wall_start",
+        "cpu_start",
+        "wall_child",
+        "cpu_child",
+    )
+
+    def __init__(self, stat: PhaseStat, profile: bool):
+        self.stat = stat
+        self.profile = profile
+        self.wall_child = 0.0
+        self.cpu_child = 0.0
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+
+class _Phase:
+    __slots__ = ("_profiler", "_name")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._profiler._enter(self._name)
+
+    def __exit__(self, *_):
+        self._profiler._exit()
+
+
+class _TimedReader:
+    """
+    A binary file whose reads are measured as a phase.
+    """
+
+    def __init__(self, profiler: "Profiler", name: str, fp: IO[bytes]):
+        self._profiler = profiler
+        self._name = name
+        self._fp = fp
+
+    def read(self, size: int = -1) -> bytes:
+        with self._profiler.phase(self._name):
+            return self._fp.read(size)
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.stats: dict[str, PhaseStat] = {}
+        self._stack: list[_Frame] = []
+        self._cprofile_phase: str | None = None
+        self._cprofile: cProfile.Profile | None = None
+        self._last_rss_check = 0.0
+
+    def enable(self, cprofile_phase: str | None = None) -> None:
+        """
+        Start measuring the phases.
+        If `cprofile_phase` is given, the phase of that name is also run under cProfile.
+        """
+        self.enabled = True
+        self._cprofile_phase = cprofile_phase
+        if cprofile_phase:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+
+    def _enter(self, name: str) -> None:
+        if (stat := self.stats.get(name)) is None:
+            stat = self.stats[name] = PhaseStat()
+        profile = name == self._cprofile_phase
+        self._stack.append(_Frame(stat, profile))
+        if profile and self._cprofile:
+            self._cprofile.enable()
+
+    def _exit(self) -> None:
+        frame = self._stack.pop()
+        if frame.profile and self._cprofile:
+            self._cprofile.disable()
+
+        wall = time.perf_counter() - frame.wall_start
+        cpu = time.process_time() - frame.cpu_start
+
+        stat = frame.stat
+        stat.calls += 1
+        stat.wall += wall
+        stat.cpu += cpu
+        stat.wall_self += wall - frame.wall_child
+        stat.cpu_self += cpu - frame.cpu_child
+
+        if self._stack:
+            self._stack[-1].wall_child += wall
+            self._stack[-1].cpu_child += cpu
+
+        now = time.perf_counter()
+        if (
+            now - self._last_rss_check > _RSS_CHECK_INTERVAL
+            or not self._stack
+            or not stat.peak_rss_MiB
+        ):
+            self._last_rss_check = now
+            stat.peak_rss_MiB = _peak_rss_MiB()
+
+    def phase(self, name: str) -> contextlib.AbstractContextManager:
+        """
+        Measure the code in the with block as the phase `name`.
+        """
+        if self.enabled:
+            return _Phase(self, name)
+        else:
+            return contextlib.nullcontext()
+
+    def count(self, name: str, records: int = 1) -> None:
+        """
+        Add to the number of the records processed by the phase `name`.
+        """
+        if self.enabled:
+            if (stat := self.stats.get(name)) is None:
+                stat = self.stats[name] = PhaseStat()
+            stat.records += records
+
+    def counted(self, name: str, items: Iterable[T]) -> Iterable[T]:
+        """
+        Count the items of `items` as the records of the phase `name`
+        without measuring the time.
+        """
+        if not self.enabled:
+            return items
+        return self._counted(name, items)
+
+    def _counted(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        for item in items:
+            self.count(name)
+            yield item
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterable[T]:
+        """
+        Measure the time spent in producing each item of `items` as the phase `name`
+        and count the items as its records.
+        """
+        if not self.enabled:
+            return items
+        return self._iterate(name, items)
+
+    def _iterate(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        it = iter(items)
+        while True:
+            self._enter(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            self.stats[name].records += 1
+            yield item
+
+    def wrap(self, name: str, func: Callable[P, T]) -> Callable[P, T]:
+        """
+        Measure each call of `func` as the phase `name`.
+        `func` itself is returned when the profiler is disabled,
+        which costs nothing in hot loops.
+        """
+        if not self.enabled:
+            return func
+
+        @functools.wraps(func)
+        def _wrapped(*args: P.args, **kwargs: P.kwargs) -> T:
+            self._enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit()
+
+        return _wrapped
+
+    def reader(self, name: str, fp: IO[bytes]) -> IO[bytes]:
+        """
+        Measure the reads from `fp` as the phase `name`.
+        """
+        if not self.enabled:
+            return fp
+        return _TimedReader(self, name, fp)  # type: ignore
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "phases": {name: asdict(stat) for name, stat in self.stats.items()},
+            "peak_rss_MiB": _peak_rss_MiB(),
+        }
+
+    def print_table(self, buffer: TextIO = sys.stderr) -> None:
+        header = (
+            f"{'phase':<32} {'calls':>9} {'records':>9} "
+            f"{'wall':>9} {'wall self':>9} {'cpu self':>9} {'peak RSS':>9}"
+        )
+        print(header, file=buffer)
+        print("-" * len(header), file=buffer)
+        for name, stat in self.stats.items():
+            print(
+                f"{name:<32} {stat.calls:>9} {stat.records:>9} "
+                f"{stat.wall:>8.3f}s {stat.wall_self:>8.3f}s {stat.cpu_self:>8.3f}s "
+                f"{stat.peak_rss_MiB:>6.1f}MiB",
+                file=buffer,
+            )
+
+    def dump_json(self, buffer: TextIO) -> None:
+        json.dump(self.report(), buffer, indent=2)
+
+    def dump_cprofile(self, path: str) -> None:
+        if self._cprofile:
+            self._cprofile.dump_stats(path)
+
+
+profiler = Profiler()
+"""
+The profiler shared by the whole process.
+"""
@@ -0,0 +1,235 @@
+"""
+A server that keeps the real texts open and the modules loaded,
+and converts, encrypts and decrypts annotation files sent over a Unix socket
+by the protocol described in `abctk.utils.comparative.client`.
+
+Each connection is handled in a thread of its own,
+or in a child process with `fork`,
+which shares the real texts opened by the parent
+and lets the requests run on several CPU cores.
+"""
+
+from collections import Counter
+import dataclasses
+import io
+import os
+from pathlib import Path
+import signal
+import socket
+import socketserver
+import stat
+import sys
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.BCCWJ.stack import open_stores
+from abctk.utils.comparative.client import Op, receive_message, send_message
+from abctk.utils.comparative.decrypt import (
+    Mismatch,
+    MismatchKind,
+    decrypt_records_BCCWJ,
+    encrypt_record,
+)
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+    write_file,
+)
+from abctk.utils.comparative.parallel import CHUNK_SIZE, chunked
+
+
+class AnnotService:
+    """
+    The processing of requests, apart from the connections.
+    """
+
+    def __init__(self, real_texts: Mapping[BCCWJSentIndex, str] | None = None):
+        self.real_texts = real_texts
+        self.pid = os.getpid()
+        """
+        The process of the server, rather than of the child handling a request.
+        """
+
+    def _decrypt(
+        self,
+        records: Iterable[aoc.CompRecord],
+        mismatches: list[Mismatch],
+    ) -> Iterator[aoc.CompRecord]:
+        if self.real_texts is None:
+            raise ValueError("No real texts are given to `serve`")
+        for chunk in chunked(records, CHUNK_SIZE):
+            for record, mismatch in decrypt_records_BCCWJ(chunk, self.real_texts):
+                if mismatch:
+                    mismatches.append(mismatch)
+                yield record
+
+    def process(
+        self,
+        header: dict[str, Any],
+        body: bytes,
+    ) -> tuple[dict[str, Any], bytes]:
+        """
+        Process a request and return the header and the body of the response.
+        """
+        op = Op(header.get("op"))
+        if op == Op.PING:
+            return {
+                "ok": True,
+                "pid": self.pid,
+                "real_texts": self.real_texts is not None,
+            }, b""
+
+        format = AnnotationFileFormat(header.get("format", AnnotationFileFormat.JSONL))
+        style = AnnotationFileStyle(header.get("style", AnnotationFileStyle.BRACKETED))
+        output_format = AnnotationFileFormat(header.get("output_format", format))
+        output_style = AnnotationFileStyle(header.get("output_style", style))
+
+        # The binary format is read from the bytes themselves.
+        fp_in: io.BytesIO | io.TextIOWrapper = io.BytesIO(body)
+        if format != AnnotationFileFormat.BINARY:
+            fp_in = io.TextIOWrapper(fp_in, encoding="utf-8")
+        records: Iterable[aoc.CompRecord] = load_file(fp_in, format=format, style=style)
+        mismatches: list[Mismatch] = []
+        match op:
+            case Op.CONVERT:
+                pass
+            case Op.ENCRYPT:
+                records = map(_encrypted, records)
+            case Op.DECRYPT:
+                records = self._decrypt(records, mismatches)
+            case _:
+                raise ValueError(f"{op} is an invalid operation")
+
+        count = 0
+
+        def _counted(records: Iterable[aoc.CompRecord]) -> Iterator[aoc.CompRecord]:
+            nonlocal count
+            for record in records:
+                count += 1
+                yield record
+
+        output = io.BytesIO()
+        fp_out = io.TextIOWrapper(output, encoding="utf-8")
+        write_file(_counted(records), fp_out, format=output_format, style=output_style)
+        fp_out.flush()
+        fp_out.detach()
+
+        response: dict[str, Any] = {"ok": True, "records": count}
+        if op == Op.DECRYPT:
+            counts = Counter(mismatch.kind for mismatch in mismatches)
+            response["mismatches"] = {kind.value: counts[kind] for kind in MismatchKind}
+            if header.get("report"):
+                response["report"] = [dataclasses.asdict(m) for m in mismatches]
+        return response, output.getvalue()
+
+
+def _encrypted(record: aoc.CompRecord) -> aoc.CompRecord:
+    encrypt_record(record)
+    return record
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_ThreadingServer | _ForkingServer"
+
+    def _send(self, header: dict[str, Any], body: bytes = b"") -> bool:
+        """
+        Send a response, returning False if the client has gone.
+        """
+        try:
+            send_message(self.wfile, header, body)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("The client has gone before the response.")
+            return False
+        return True
+
+    def handle(self) -> None:
+        while True:
+            try:
+                if (message := receive_message(self.rfile)) is None:
+                    return
+            except (ValueError, ConnectionError) as e:
+                self._send({"ok": False, "error": f"Bad request: {e}"})
+                return
+            header, body = message
+
+            try:
+                response, body_response = self.server.service.process(header, body)
+            except Exception as e:
+                # A bad request must not bring the server down.
+                logger.warning(f"Failed to process a request: {e!r}")
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                body_response = b""
+            logger.info(
+                f"{header.get('op')}: {len(body)} bytes in, "
+                f"{len(body_response)} bytes out"
+            )
+            if not self._send(response, body_response):
+                return
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    service: AnnotService
+
+
+class _ForkingServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    service: AnnotService
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """
+    Remove the socket file left by a server no longer running.
+    """
+    try:
+        mode = path.stat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(str(path))
+        except ConnectionRefusedError:
+            path.unlink()
+        else:
+            raise FileExistsError(f"A server is already running on {path}")
+
+
+def serve(
+    socket_path: Path,
+    real_texts_paths: Sequence[Path] = (),
+    fork: bool = False,
+) -> None:
+    """
+    Serve on `socket_path` until interrupted or terminated,
+    looking up the real texts in the store files at `real_texts_paths`,
+    stacked in that order.
+    """
+    _remove_stale_socket(socket_path)
+    real_texts = open_stores(real_texts_paths) if real_texts_paths else None
+
+    # Let SIGTERM clean up as Ctrl-C does.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    server_class = _ForkingServer if fork else _ThreadingServer
+    try:
+        with server_class(str(socket_path), _Handler) as server:
+            server.service = AnnotService(real_texts)
+            logger.info(f"Serving on {socket_path.absolute()}.")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                socket_path.unlink(missing_ok=True)
+                logger.info(f"Stopped serving on {socket_path.absolute()}.")
+    finally:
+        if real_texts is not None:
+            real_texts.close()
@@ -0,0 +1,170 @@
+"""
+Splitting records into shards to be processed separately, and merging them back.
+
+A record goes to the shard given by the CRC32 of its ID,
+or of its BCCWJ sample ID so that the sentences of a sample stay together.
+CRC32 is used instead of `hash`, which differs from process to process.
+
+The records keep their order within each shard,
+so that the shards of a file sorted by ID are sorted as well
+and can be merged back into one in a single pass.
+"""
+
+import contextlib
+from enum import Enum
+import heapq
+import os
+from operator import itemgetter
+from pathlib import Path
+import re
+from typing import Iterable, Iterator, Sequence
+import zlib
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.checkpoint import CHUNK_SIZE, part_path
+from abctk.utils.comparative.compression import (
+    Compression,
+    strip_suffix,
+    text_writer,
+)
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    write_file,
+)
+from abctk.utils.comparative.parallel import chunked
+
+
+class ShardKey(str, Enum):
+    ID = "id"
+    """
+    Shard by the ID of each record.
+    """
+
+    SAMPLE = "sample"
+    """
+    Shard by the BCCWJ sample ID of each record,
+    or by its ID if it is not a BCCWJ one.
+    """
+
+
+def shard_path(path: Path, index: int, count: int) -> Path:
+    """
+    The path of the shard `index` of `count` of `path`,
+    e.g. annot-00001-of-00004.jsonl.gz for annot.jsonl.gz.
+    """
+    path_plain = strip_suffix(path)
+    suffixes = path_plain.suffix + path.name[len(path_plain.name) :]
+    return path.with_name(f"{path_plain.stem}-{index:05d}-of-{count:05d}{suffixes}")
+
+
+def shard_of(record: aoc.CompRecord, count: int, key: ShardKey) -> int:
+    match key:
+        case ShardKey.ID:
+            value = str(record.ID)
+        case ShardKey.SAMPLE:
+            ID_parsed = aoc.ABCTComp_BCCWJ_ID.from_string(str(record.ID))
+            value = ID_parsed.sampleID if ID_parsed else str(record.ID)
+        case _:
+            raise ValueError(f"{key} is an invalid shard key")
+    return zlib.crc32(value.encode("utf-8")) % count
+
+
+def write_shards(
+    records: Iterable[aoc.CompRecord],
+    path: Path,
+    count: int,
+    key: ShardKey,
+    format: AnnotationFileFormat,
+    style: AnnotationFileStyle,
+    chunk_size: int = CHUNK_SIZE,
+    compression: Compression = Compression.NONE,
+    compression_level: int | None = None,
+    threads: int = 1,
+) -> list[int]:
+    """
+    Write `records` into `count` shards of `path`, named by `shard_path`.
+
+    Each shard is written as SHARD.part,
+    and all of them are renamed when all the records are written.
+
+    Returns the number of the records in each shard.
+    """
+    if format == AnnotationFileFormat.BINARY and compression != Compression.NONE:
+        raise ValueError("The binary format cannot be compressed")
+
+    paths = [shard_path(path, i, count) for i in range(count)]
+    written = [0] * count
+
+    def _write(f, records: list[aoc.CompRecord], continued: bool) -> None:
+        with text_writer(f, compression, compression_level, threads) as fp:
+            write_file(records, fp, format=format, style=style, continued=continued)
+
+    with contextlib.ExitStack() as stack:
+        files = [stack.enter_context(open(part_path(p), "wb")) for p in paths]
+
+        for chunk in chunked(records, chunk_size):
+            buckets: list[list[aoc.CompRecord]] = [[] for _ in range(count)]
+            for record in chunk:
+                buckets[shard_of(record, count, key)].append(record)
+            for i, bucket in enumerate(buckets):
+                if bucket:
+                    _write(files[i], bucket, continued=written[i] > 0)
+                    written[i] += len(bucket)
+
+        for i, f in enumerate(files):
+            if written[i] == 0:
+                # An empty file still has the header, if any.
+                _write(f, [], continued=False)
+
+    for p in paths:
+        os.replace(part_path(p), p)
+    return written
+
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def ID_order(ID: str) -> list[str | int]:
+    """
+    The key sorting IDs with the numbers in them compared as numbers,
+    e.g. 9_BCCWJ_LBa0_00001_100 before 10_BCCWJ_LBa0_00001_20.
+    """
+    parts: list[str | int] = _DIGITS.split(str(ID))
+    parts[1::2] = map(int, parts[1::2])  # type: ignore
+    return parts
+
+
+def _sorted_by_ID(
+    records: Iterable[aoc.CompRecord],
+    name: str,
+) -> Iterator[tuple[list[str | int], aoc.CompRecord]]:
+    order_prev = None
+    ID_prev = None
+    for record in records:
+        order = ID_order(record.ID)
+        if order_prev is not None and order < order_prev:
+            raise ValueError(
+                f"{name} is not sorted by ID: {record.ID} comes after {ID_prev}"
+            )
+        order_prev, ID_prev = order, record.ID
+        yield order, record
+
+
+def merge_shards(
+    shards: Sequence[Iterable[aoc.CompRecord]],
+    names: Sequence[str] | None = None,
+) -> Iterator[aoc.CompRecord]:
+    """
+    Merge `shards`, each sorted by `ID_order`, into one sequence sorted the same way,
+    holding only one record of each shard at a time.
+
+    Raises ValueError when a shard turns out not to be sorted.
+    """
+    names = names or [f"The shard #{i}" for i in range(len(shards))]
+    for _, record in heapq.merge(
+        *(_sorted_by_ID(shard, name) for shard, name in zip(shards, names)),
+        key=itemgetter(0),
+    ):
+        yield record
@@ -0,0 +1,145 @@
+"""
+Reading and writing YAML sequences item by item with ruamel.yaml.
+
+This module is imported only when a YAML file is read or written,
+so that the other commands do not load ruamel.yaml.
+"""
+
+import io
+from typing import Any, Iterable, Iterator, TextIO
+
+import ruamel.yaml
+from ruamel.yaml.composer import Composer
+import ruamel.yaml.events as ye
+from ruamel.yaml.resolver import VersionedResolver
+
+
+class _EventQueue:
+    """
+    A minimal parser interface over a stream of YAML events
+    so that nodes can be composed one by one by `Composer`.
+    """
+
+    def __init__(self, events: Iterable[ye.Event]):
+        self._events = iter(events)
+        self._next: ye.Event | None = None
+
+        # Attributes looked up by `Composer`
+        self._parser = self
+        self._resolver = VersionedResolver(loadumper=self)
+
+    def use_version(self, version: tuple[int, int]) -> None:
+        """
+        Resolve the tags of the scalars by the rules of YAML `version`.
+        """
+        self._resolver = VersionedResolver(version=version, loadumper=self)
+
+    def peek_event(self) -> ye.Event:
+        if self._next is None:
+            self._next = next(self._events)
+        return self._next
+
+    def check_event(self, *choices: type[ye.Event]) -> bool:
+        try:
+            event = self.peek_event()
+        except StopIteration:
+            return False
+        return not choices or isinstance(event, choices)
+
+    def get_event(self) -> ye.Event:
+        event = self.peek_event()
+        self._next = None
+        return event
+
+
+def iter_sequence(fp: TextIO) -> Iterator[Any]:
+    """
+    Read a YAML document consisting of a sequence item by item,
+    keeping only one item in memory at a time.
+
+    The scalars are read by the version of YAML given by the `%YAML` directive, if any,
+    e.g. `yes` as true in YAML 1.1, as by `YAML().load`.
+    """
+    yaml = ruamel.yaml.YAML(typ="safe")
+    events = _EventQueue(yaml.parse(fp))
+    composer = Composer(loader=events)
+    constructor = yaml.constructor
+
+    while events.check_event(ye.StreamStartEvent, ye.DocumentStartEvent):
+        event = events.get_event()
+        if isinstance(event, ye.DocumentStartEvent) and event.version:
+            events.use_version(event.version)
+            # Looked up by the constructor, e.g. for octal integers
+            yaml.version = event.version
+    if not events.check_event() or events.check_event(ye.StreamEndEvent):
+        # An empty file
+        return
+    if not events.check_event(ye.SequenceStartEvent):
+        raise ValueError("The YAML document is not a sequence of records")
+    _ = events.get_event()
+
+    index = 0
+    while not events.check_event(ye.SequenceEndEvent):
+        yield constructor.construct_document(composer.compose_node(None, index))
+        index += 1
+
+
+def dump_sequence(
+    yaml: ruamel.yaml.YAML,
+    items: Iterable[Any],
+    buffer: TextIO,
+    continued: bool = False,
+) -> None:
+    """
+    Write `items` as a YAML sequence item by item.
+    The output is the same as `yaml.dump(tuple(items), buffer)`.
+
+    With `continued`, only the items are written
+    so that they continue the sequence written by a previous call.
+    """
+    if continued:
+        out = io.StringIO()
+        dump_sequence(yaml, items, out)
+        text = out.getvalue()
+        # Each item of the top-level block sequence starts a line with "- ",
+        # and the directives and the document start marker come before the first one.
+        if (start := text.find("\n- ")) >= 0:
+            buffer.write(text[start + 1 :])
+        return
+
+    serializer, representer, emitter = yaml.get_serializer_representer_emitter(
+        buffer, None
+    )
+    serializer.open()
+    emitter.emit(
+        ye.DocumentStartEvent(
+            explicit=serializer.use_explicit_start,
+            version=serializer.use_version,
+            tags=serializer.use_tags,
+        )
+    )
+    emitter.emit(
+        ye.SequenceStartEvent(
+            anchor=None,
+            tag=None,
+            implicit=True,
+            flow_style=False,
+        )
+    )
+
+    for index, item in enumerate(items):
+        node = representer.represent_data(item)
+        serializer.anchor_node(node)
+        serializer.serialize_node(node, None, index)
+
+        # Forget the item so that the memory does not grow.
+        representer.represented_objects = {}
+        representer.object_keeper = []
+        representer.alias_key = None
+        serializer.serialized_nodes = {}
+        serializer.anchors = {}
+
+    emitter.emit(ye.SequenceEndEvent())
+    emitter.emit(ye.DocumentEndEvent(explicit=serializer.use_explicit_end))
+    serializer.close()
+    emitter.dispose()
@@ -0,0 +1,61 @@
+"""
+Throughput of parsing bracketed annotations in batches against abctk.obj,
+checking that both give the same records for every record.
+The same is checked on real annotation files by `tests/test_brackets.py`.
+
+Usage: python -m benchmarks.bench_brackets [NUMBER_OF_RECORDS]
+"""
+
+import sys
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative import brackets
+
+from benchmarks.bench_jsonl import make_records, measure
+from benchmarks.synthetic import _LABELS
+
+
+def main(n: int) -> None:
+    records = make_records(n)
+    # Nested spans with all the labels, as in the real annotations
+    for i, record in enumerate(records):
+        if len(record.tokens) > 3:
+            record.comp.append(
+                aoc.CompSpan(start=0, end=len(record.tokens) - 1, label=_LABELS[i % 4])
+            )
+    print(f"{n} records")
+
+    lines = [record.to_brackets() for record in records]
+    items = [
+        {"ID": record.ID, "annot": line, "comments": [], "ID_v1": None}
+        for record, line in zip(records, lines)
+    ]
+    parsed_slow: list[aoc.CompRecord] = []
+    measure(
+        "parse (abctk.obj)",
+        n,
+        lambda: parsed_slow.extend(
+            aoc.CompRecord.from_brackets(
+                line=item["annot"],
+                ID=item["ID"],
+                comments=item["comments"],
+                ID_v1=item["ID_v1"],
+            )
+            for item in items
+        ),
+    )
+    parsed_fast: list[aoc.CompRecord] = []
+    measure(
+        "parse (batched)",
+        n,
+        lambda: [
+            parsed_fast.extend(brackets.from_bracketed_batch(items[i : i + 1024]))
+            for i in range(0, n, 1024)
+        ],
+    )
+    assert parsed_slow == parsed_fast
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,84 @@
+"""
+Throughput of `annot check` with the real texts by the number of worker processes,
+checking that all of them give the same report.
+
+Usage: python -m benchmarks.bench_check [NUMBER_OF_RECORDS] [MAX_JOBS]
+"""
+
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+import typer
+
+from abctk.utils.comparative.BCCWJ.store import write_store
+from abctk.utils.comparative.cli import app
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    write_file,
+)
+
+from benchmarks.synthetic import make_corpus, make_records
+
+
+def main(n: int, max_jobs: int) -> None:
+    command = typer.main.get_command(app)
+
+    with tempfile.TemporaryDirectory() as folder_str:
+        folder = Path(folder_str)
+        sentences = make_corpus(folder / "corpus", 100, 200)
+        store_path = folder / "cache.bin"
+        with open(store_path, "wb") as f:
+            write_store(sentences, f)
+
+        annot_path = folder / "annot.jsonl"
+        with open(annot_path, "w") as f:
+            write_file(
+                make_records(sentences, n),
+                f,
+                format=AnnotationFileFormat.JSONL,
+                style=AnnotationFileStyle.SEPARATE,
+            )
+        print(f"{n} records")
+
+        reports: list[bytes] = []
+        jobs = 1
+        while jobs <= max_jobs:
+            report_path = folder / f"report-{jobs}.jsonl"
+            start = time.perf_counter()
+            command(
+                [
+                    "annot",
+                    "--stream",
+                    "--jobs",
+                    str(jobs),
+                    "load",
+                    "-e",
+                    "jsonl",
+                    "-s",
+                    "separate",
+                    str(annot_path),
+                    "incorp-text",
+                    "BCCWJ",
+                    str(store_path),
+                    "check",
+                    "--report",
+                    str(report_path),
+                ],
+                standalone_mode=False,
+            )
+            seconds = time.perf_counter() - start
+            print(f"{jobs:>2} jobs {n / seconds:12.0f} records/s")
+            reports.append(report_path.read_bytes())
+            jobs *= 2
+
+        assert all(report == reports[0] for report in reports)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+    )
@@ -0,0 +1,69 @@
+"""
+The bulk operations of the columnar corpus against the loops over `CompRecord`s.
+
+Usage: python -m benchmarks.bench_columnar [NUMBER_OF_RECORDS]
+"""
+
+import copy
+import sys
+import time
+
+from abctk.utils.comparative.columnar import CompCorpus, SpanStat
+from abctk.utils.comparative.decrypt import decrypt_record
+
+from benchmarks.bench_jsonl import make_records
+
+
+def span_stats_baseline(records) -> dict[str, SpanStat]:
+    stats: dict[str, SpanStat] = {}
+    for rec in records:
+        for span in rec.comp:
+            stat = stats.setdefault(span.label, SpanStat())
+            stat.count += 1
+            stat.tokens += span.end - span.start
+            stat.chars += sum(map(len, rec.tokens[span.start : span.end]))
+    return stats
+
+
+def measure(name: str, n: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:8.3f} s {n / elapsed:12.0f} records/s")
+    return result
+
+
+def main(n: int) -> None:
+    records = make_records(n)
+    real_texts = ["".join(rec.tokens)[::-1] for rec in records]
+    print(f"{n} records")
+
+    records_enc = copy.deepcopy(records)
+
+    def _encrypt():
+        for rec in records_enc:
+            rec.tokens = tuple("⛔" * len(t) for t in rec.tokens)
+
+    measure("encrypt (records)", n, _encrypt)
+
+    def _decrypt():
+        for rec, real_text in zip(records_enc, real_texts):
+            decrypt_record(rec, real_text)
+
+    measure("decrypt (records)", n, _decrypt)
+    stats = measure("span stats (records)", n, lambda: span_stats_baseline(records))
+
+    corpus = measure("from_records", n, lambda: CompCorpus.from_records(records))
+    measure("encrypt (columnar)", n, corpus.encrypt)
+    measure("decrypt (columnar)", n, lambda: corpus.decrypt(real_texts))
+    stats_columnar = measure("span stats (columnar)", n, corpus.span_stats)
+    decrypted_columnar = measure("iter_records", n, lambda: list(corpus.iter_records()))
+
+    assert [list(rec.tokens) for rec in records_enc] == [
+        rec.tokens for rec in decrypted_columnar
+    ]
+    assert stats == stats_columnar
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
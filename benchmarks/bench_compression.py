@@ -0,0 +1,91 @@
+"""
+Writing and reading a JSONL file compressed with gzip and zstd
+at several levels, against the uncompressed file.
+
+Usage: python -m benchmarks.bench_compression [NUMBER_OF_RECORDS]
+"""
+
+import dataclasses
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from abctk.utils.comparative.checkpoint import write_file_resumable
+from abctk.utils.comparative.compression import Compression, _zstandard
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+)
+
+from benchmarks.bench_jsonl import make_records
+
+SETTINGS: tuple[tuple[Compression, int | None, int], ...] = (
+    (Compression.NONE, None, 1),
+    (Compression.GZIP, 1, 1),
+    (Compression.GZIP, 6, 1),
+    (Compression.ZSTD, 3, 1),
+    (Compression.ZSTD, 3, 4),
+    (Compression.ZSTD, 9, 1),
+    (Compression.ZSTD, 9, 4),
+)
+"""
+The compressions, levels and numbers of threads compared.
+"""
+
+
+def main(n: int) -> None:
+    try:
+        _zstandard()
+        settings = SETTINGS
+    except ImportError:
+        print("zstandard is not installed; only gzip is measured")
+        settings = tuple(s for s in SETTINGS if s[0] != Compression.ZSTD)
+
+    records = make_records(n)
+    expected = list(map(dataclasses.asdict, records))
+    print(f"{n} records")
+    print(f"{'':<20} {'size':>12} {'write':>10} {'read':>10}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        for compression, level, threads in settings:
+            path = Path(folder) / f"{compression.value}-{level}-{threads}.jsonl"
+
+            start = time.perf_counter()
+            write_file_resumable(
+                records,
+                path,
+                format=AnnotationFileFormat.JSONL,
+                style=AnnotationFileStyle.SEPARATE,
+                compression=compression,
+                compression_level=level,
+                threads=threads,
+            )
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open(path, "r") as f:
+                loaded = list(
+                    load_file(
+                        f,
+                        format=AnnotationFileFormat.JSONL,
+                        style=AnnotationFileStyle.SEPARATE,
+                    )
+                )
+            read_seconds = time.perf_counter() - start
+            assert list(map(dataclasses.asdict, loaded)) == expected
+
+            name = (
+                compression.value
+                if compression == Compression.NONE
+                else f"{compression.value} -{level} x{threads}"
+            )
+            print(
+                f"{name:<20} {path.stat().st_size:12,} "
+                f"{write_seconds:8.3f} s {read_seconds:8.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,124 @@
+"""
+Throughput of the JSONL reader and writer
+against the implementation before the dedicated codec.
+
+Usage: python benchmarks/bench_jsonl.py [NUMBER_OF_RECORDS]
+"""
+
+import dataclasses
+import io
+import json
+import random
+import sys
+import time
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative import jsonl
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+    write_file,
+)
+
+
+def make_records(n: int, seed: int = 0) -> list[aoc.CompRecord]:
+    rand = random.Random(seed)
+    records = []
+    for i in range(n):
+        tokens = [
+            "".join(rand.choices("あいうえおかきくけこ比較的高い", k=rand.randint(1, 4)))
+            for _ in range(rand.randint(5, 30))
+        ]
+        start = rand.randrange(len(tokens))
+        records.append(
+            aoc.CompRecord(
+                ID=f"{i}_BCCWJ_LBa0_{i // 100:05d}_{i * 10}",
+                tokens=tokens,
+                comp=[
+                    aoc.CompSpan(
+                        start=start,
+                        end=rand.randint(start + 1, len(tokens)),
+                        label="deg",
+                    )
+                ],
+                comments=[],
+                ID_v1=None,
+            )
+        )
+    return records
+
+
+def write_baseline(records, buffer) -> None:
+    for rec in records:
+        json.dump(
+            dataclasses.asdict(rec),
+            buffer,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        buffer.write("\n")
+
+
+def load_baseline(fp):
+    return [
+        aoc.CompRecord(
+            ID=record["ID"],
+            tokens=record["tokens"],
+            comp=[
+                aoc.CompSpan(start=span["start"], end=span["end"], label=span["label"])
+                for span in record["comp"]
+            ],
+            comments=record.get("comments", list()),
+            ID_v1=record.get("ID_v1"),
+        )
+        for line in fp
+        for record in (json.loads(line),)
+    ]
+
+
+def measure(name: str, n: int, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f} s {n / elapsed:12.0f} records/s")
+    return elapsed
+
+
+def main(n: int) -> None:
+    records = make_records(n)
+    print(f"{n} records, JSON backend: {'orjson' if jsonl.orjson else 'json'}")
+
+    buffer_baseline = io.StringIO()
+    measure("write (baseline)", n, lambda: write_baseline(records, buffer_baseline))
+    buffer_codec = io.StringIO()
+    measure(
+        "write (codec)",
+        n,
+        lambda: write_file(
+            records,
+            buffer_codec,
+            format=AnnotationFileFormat.JSONL,
+            style=AnnotationFileStyle.SEPARATE,
+        ),
+    )
+    assert buffer_baseline.getvalue() == buffer_codec.getvalue()
+
+    text = buffer_codec.getvalue()
+    measure("read (baseline)", n, lambda: load_baseline(io.StringIO(text)))
+    measure(
+        "read (codec)",
+        n,
+        lambda: list(
+            load_file(
+                io.StringIO(text),
+                format=AnnotationFileFormat.JSONL,
+                style=AnnotationFileStyle.SEPARATE,
+            )
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,79 @@
+"""
+Loading many small files one by one against `load_many`,
+with a delay added to every read to imitate a network file system.
+
+Usage: python -m benchmarks.bench_load_many [NUMBER_OF_FILES] [LATENCY_SECONDS]
+"""
+
+import dataclasses
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from abctk.utils.comparative import load_many as lm
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+    write_file,
+)
+
+from benchmarks.bench_jsonl import make_records
+
+RECORDS_PER_FILE = 500
+
+
+def main(n_files: int, latency: float) -> None:
+    read = lm._read
+
+    def _read_slowly(path: Path):
+        time.sleep(latency)
+        return read(path)
+
+    lm._read = _read_slowly
+
+    with tempfile.TemporaryDirectory() as folder:
+        specs = []
+        for i in range(n_files):
+            path = Path(folder) / f"{i:04}.jsonl"
+            with open(path, "w") as f:
+                write_file(
+                    make_records(RECORDS_PER_FILE),
+                    f,
+                    format=AnnotationFileFormat.JSONL,
+                    style=AnnotationFileStyle.SEPARATE,
+                )
+            specs.append(
+                lm.FileSpec(
+                    path, AnnotationFileFormat.JSONL, AnnotationFileStyle.SEPARATE
+                )
+            )
+        print(f"{n_files} files of {RECORDS_PER_FILE} records, {latency}s latency")
+
+        start = time.perf_counter()
+        records_seq = []
+        for spec in specs:
+            time.sleep(latency)
+            with open(spec.path) as f:
+                records_seq.extend(load_file(f, spec.format, spec.style))
+        print(f"{'one by one':<20} {time.perf_counter() - start:8.3f} s")
+
+        for prefetch in (1, 4, 16):
+            start = time.perf_counter()
+            records = [
+                rec
+                for loaded in lm.load_many(specs, prefetch=prefetch)
+                for rec in loaded.records
+            ]
+            print(f"{f'prefetch {prefetch}':<20} {time.perf_counter() - start:8.3f} s")
+            assert list(map(dataclasses.asdict, records)) == list(
+                map(dataclasses.asdict, records_seq)
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.05,
+    )
@@ -0,0 +1,97 @@
+"""
+Memory footprint and lookup speed of `BCCWJSentences`
+against the dict that `load_BCCWJ` used to return.
+
+Usage: python -m benchmarks.bench_sentences [NUMBER_OF_SAMPLES] [SENTENCES_PER_SAMPLE]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from typing import Iterator
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.BCCWJ.sentences import BCCWJSentences
+
+from benchmarks.synthetic import _CHARS, _sample_ID
+
+LOOKUPS = 200_000
+
+
+def iter_sentences(
+    samples: int,
+    sentences_per_sample: int,
+    seed: int = 0,
+) -> Iterator[tuple[BCCWJSentIndex, str]]:
+    """
+    Make sentences, each with a sampleID string of its own
+    as the ones unpickled from the worker processes of `load_BCCWJ`.
+    They are made anew each time so that only the memory kept is measured.
+    """
+    rand = random.Random(seed)
+    for i in range(samples):
+        pos = 10
+        for _ in range(sentences_per_sample):
+            text = "".join(rand.choices(_CHARS, k=rand.randint(10, 80)))
+            yield BCCWJSentIndex(_sample_ID(i), pos), text
+            pos += len(text) * 10
+
+
+def footprint(build) -> tuple[object, int, int]:
+    """
+    Build an object and return it
+    with the memory it keeps and the peak memory while building it, in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size, peak
+
+
+def main(samples: int, sentences_per_sample: int) -> None:
+    print(f"{samples * sentences_per_sample} sentences in {samples} samples")
+
+    rand = random.Random(1)
+    keys = [
+        BCCWJSentIndex(idx.sampleID, idx.sent_start_pos + rand.choice((0, 0, 0, 1)))
+        for idx, _ in iter_sentences(samples, sentences_per_sample)
+        if rand.random() < LOOKUPS / (samples * sentences_per_sample)
+    ]
+    rand.shuffle(keys)
+
+    sentences = list(iter_sentences(samples, sentences_per_sample))
+
+    results = []
+    for name, cls in (("dict", dict), ("BCCWJSentences", BCCWJSentences)):
+        _, size, peak = footprint(
+            lambda: cls(iter_sentences(samples, sentences_per_sample))
+        )
+
+        start = time.perf_counter()
+        mapping = cls(iter(sentences))
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = [mapping.get(key) for key in keys]
+        lookup_seconds = time.perf_counter() - start
+        results.append(found)
+
+        print(
+            f"{name:<16} {size / 2**20:8.1f} MiB kept {peak / 2**20:8.1f} MiB at peak "
+            f"{build_seconds:6.2f} s to build {len(keys) / lookup_seconds:10.0f} lookups/s"
+        )
+        del mapping
+
+    assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
@@ -0,0 +1,157 @@
+"""
+The time of a decryption by a new process of the CLI each time
+against the same one sent to `serve`, by the `client` command,
+by `python -m abctk.utils.comparative.client`
+and by `Client` from a running Python process,
+checking that all of them give the same output.
+
+Usage: python -m benchmarks.bench_serve [NUMBER_OF_CALLS] [RECORDS_PER_CALL]
+"""
+
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+
+from abctk.utils.comparative.BCCWJ.store import write_store
+from abctk.utils.comparative.client import Client
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    write_file,
+)
+
+from benchmarks.synthetic import make_corpus, make_records
+
+_CLI = (sys.executable, "-m", "abctk.utils.comparative")
+
+
+def _time_calls(name: str, calls: int, call) -> list[bytes]:
+    outputs = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        outputs.append(call())
+    seconds = time.perf_counter() - start
+    print(f"{name:<20} {seconds / calls * 1000:8.1f} ms/call")
+    return outputs
+
+
+def main(calls: int, records_per_call: int) -> None:
+    with tempfile.TemporaryDirectory() as folder_str:
+        folder = Path(folder_str)
+        sentences = make_corpus(folder / "corpus", 100, 200)
+        store_path = folder / "cache.bin"
+        with open(store_path, "wb") as f:
+            write_store(sentences, f)
+
+        annot_path = folder / "annot.jsonl"
+        with open(annot_path, "w") as f:
+            write_file(
+                make_records(sentences, records_per_call),
+                f,
+                format=AnnotationFileFormat.JSONL,
+                style=AnnotationFileStyle.SEPARATE,
+            )
+        print(f"{calls} calls of {records_per_call} records")
+
+        cold = _time_calls(
+            "new process",
+            calls,
+            lambda: subprocess.run(
+                [
+                    *_CLI,
+                    "annot",
+                    "load",
+                    "-e",
+                    "jsonl",
+                    "-s",
+                    "separate",
+                    str(annot_path),
+                    "incorp-text",
+                    "BCCWJ",
+                    str(store_path),
+                    "decrypt",
+                    "write",
+                    "-e",
+                    "jsonl",
+                    "-s",
+                    "separate",
+                    "-",
+                ],
+                capture_output=True,
+                check=True,
+            ).stdout,
+        )
+
+        socket_path = folder / "serve.sock"
+        server = subprocess.Popen(
+            [*_CLI, "serve", "--real-texts", str(store_path), str(socket_path)]
+        )
+        try:
+            while not socket_path.exists():
+                time.sleep(0.05)
+
+            warm_cli = _time_calls(
+                "client command",
+                calls,
+                lambda: subprocess.run(
+                    [
+                        *_CLI,
+                        "client",
+                        str(socket_path),
+                        "decrypt",
+                        "-e",
+                        "jsonl",
+                        "-s",
+                        "separate",
+                        str(annot_path),
+                    ],
+                    capture_output=True,
+                    check=True,
+                ).stdout,
+            )
+
+            warm_module = _time_calls(
+                "client module",
+                calls,
+                lambda: subprocess.run(
+                    [
+                        sys.executable,
+                        "-m",
+                        "abctk.utils.comparative.client",
+                        str(socket_path),
+                        "decrypt",
+                        "-e",
+                        "jsonl",
+                        "-s",
+                        "separate",
+                        str(annot_path),
+                    ],
+                    capture_output=True,
+                    check=True,
+                ).stdout,
+            )
+
+            body = annot_path.read_bytes()
+            with Client(socket_path) as client:
+                warm = _time_calls(
+                    "Client",
+                    calls,
+                    lambda: client.request(
+                        "decrypt", body, format="jsonl", style="separate"
+                    )[1],
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+        assert cold == warm_cli == warm_module == warm
+        assert not socket_path.exists()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+    )
@@ -0,0 +1,205 @@
+"""
+Run the benchmark suite on synthetic data and save the results as JSON.
+
+    python -m benchmarks.run run [--records N] [--samples N] [--output FILE]
+    python -m benchmarks.run compare OLD.json NEW.json
+"""
+
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Annotated, Any, Optional
+
+import typer
+
+from abctk.utils.comparative.BCCWJ.store import write_store
+from abctk.utils.comparative.io import AnnotationFileFormat, AnnotationFileStyle
+
+from benchmarks import synthetic
+
+app = typer.Typer()
+
+
+def run_stage(name: str, *params: str) -> dict[str, Any]:
+    """
+    Run a stage in a new process and collect its measurement.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.stages", name, *params],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"The stage {name} {' '.join(params)} failed:\n{proc.stderr}"
+        )
+
+    result: dict[str, Any] = json.loads(proc.stdout.splitlines()[-1])
+    result["records_per_sec"] = result["records"] / result["seconds"]
+    result["MB_per_sec"] = result["bytes"] / 1e6 / result["seconds"]
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@app.command("run")
+def cmd_run(
+    records: Annotated[
+        int,
+        typer.Option(help="The number of annotation records."),
+    ] = 20_000,
+    samples: Annotated[
+        int,
+        typer.Option(help="The number of samples in the synthetic LB.zip."),
+    ] = 200,
+    sentences_per_sample: Annotated[
+        int,
+        typer.Option(help="The number of sentences in each sample."),
+    ] = 200,
+    jobs: Annotated[
+        int,
+        typer.Option(help="The number of processes for the parallel stages."),
+    ] = 4,
+    seed: Annotated[int, typer.Option()] = 0,
+    output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--output",
+            "-o",
+            help="Where to save the results. Defaults to STDOUT.",
+        ),
+    ] = None,
+):
+    """
+    Generate synthetic data and measure each stage on it.
+    """
+    results: list[dict[str, Any]] = []
+
+    def _run(name: str, *params: str, **labels: Any) -> None:
+        typer.echo(f"Running {name} {labels or ''}", err=True)
+        result = run_stage(name, *params)
+        results.append({"stage": name, "params": labels, **result})
+        typer.echo(
+            f"  {result['seconds']:8.3f} s "
+            f"{result['records_per_sec']:12.0f} records/s "
+            f"{result['MB_per_sec']:8.2f} MB/s "
+            f"{result['peak_rss_MiB']:8.1f} MiB",
+            err=True,
+        )
+
+    with tempfile.TemporaryDirectory() as folder_str:
+        folder = Path(folder_str)
+        typer.echo("Generating synthetic data", err=True)
+        sentences = synthetic.make_corpus(
+            folder / "BCCWJ",
+            samples=samples,
+            sentences_per_sample=sentences_per_sample,
+            seed=seed,
+        )
+        with open(folder / "cache.bin", "wb") as f:
+            write_store(sentences, f)
+        paths = synthetic.write_annotations(
+            list(synthetic.make_records(sentences, records, seed=seed)),
+            folder / "annot",
+        )
+        path_jsonl = paths[AnnotationFileFormat.JSONL, AnnotationFileStyle.SEPARATE]
+
+        for j in (1, jobs):
+            _run("BCCWJ-load", str(folder / "BCCWJ"), str(j), jobs=j)
+        _run("BCCWJ-store-write", str(folder / "BCCWJ"))
+        _run("BCCWJ-store-lookup", str(folder / "cache.bin"), str(path_jsonl))
+
+        for (format, style), path in paths.items():
+            labels = {"format": format.value, "style": style.value}
+            _run("annot-read", str(path), format.value, style.value, "1", **labels)
+            if style == AnnotationFileStyle.BRACKETED and format in (
+                AnnotationFileFormat.YAML,
+                AnnotationFileFormat.JSONL,
+            ):
+                _run(
+                    "annot-read",
+                    str(path),
+                    format.value,
+                    style.value,
+                    str(jobs),
+                    jobs=jobs,
+                    **labels,
+                )
+            _run("annot-write", str(path_jsonl), format.value, style.value, **labels)
+
+        for options in ((), ("--stream",), ("--jobs", str(jobs))):
+            _run(
+                "annot-decrypt",
+                str(path_jsonl),
+                str(folder / "cache.bin"),
+                *options,
+                options=" ".join(options),
+            )
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "records": records,
+            "samples": samples,
+            "sentences_per_sample": sentences_per_sample,
+            "seed": seed,
+        },
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+@app.command("compare")
+def cmd_compare(
+    old: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    new: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+):
+    """
+    Compare two results of `run` stage by stage.
+    """
+
+    def _key(result: dict[str, Any]) -> str:
+        return " ".join(
+            [result["stage"], *(f"{k}={v}" for k, v in result["params"].items())]
+        )
+
+    with open(old) as f:
+        results_old = {_key(r): r for r in json.load(f)["results"]}
+    with open(new) as f:
+        results_new = {_key(r): r for r in json.load(f)["results"]}
+
+    typer.echo(f"{'stage':<48} {'speed':>8} {'peak RSS':>9}")
+    for key, r_new in results_new.items():
+        if r_old := results_old.get(key):
+            typer.echo(
+                f"{key:<48} "
+                f"{r_new['records_per_sec'] / r_old['records_per_sec']:7.2f}x "
+                f"{r_new['peak_rss_MiB'] / r_old['peak_rss_MiB']:8.2f}x"
+            )
+        else:
+            typer.echo(f"{key:<48} {'(new)':>8}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,235 @@
+"""
+The stages measured by the benchmark suite.
+
+Each stage is run in its own process by `benchmarks.run`
+so that its peak memory can be told apart from the others:
+
+    python -m benchmarks.stages STAGE [ARGS...]
+
+prints the measurement as a JSON object on STDOUT.
+"""
+
+import io
+import json
+import os
+from pathlib import Path
+import resource
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import typer
+
+import abctk.obj.comparative as aoc
+
+import abctk.utils.comparative.BCCWJ.loader as gs
+from abctk.utils.comparative.BCCWJ.store import BCCWJSentStore, write_store
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+    write_file,
+)
+
+Stage = Callable[..., dict[str, float | int]]
+"""
+A stage prepares its input and then passes its work to `_measure`,
+which is given the number of the processed records and bytes by the work.
+Only the work is timed.
+"""
+
+STAGES: dict[str, Stage] = {}
+
+
+def stage(name: str):
+    def _register(func: Stage) -> Stage:
+        STAGES[name] = func
+        return func
+
+    return _register
+
+
+def _MiB(ru_maxrss: int) -> float:
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return ru_maxrss / 2**20 if sys.platform == "darwin" else ru_maxrss / 2**10
+
+
+def _peak_rss_MiB() -> float:
+    # ru_maxrss of a new process starts from the RSS of the process it is forked from.
+    # VmHWM is not affected by it, but only Linux has it.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return _MiB(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _measure(func: Callable[[], tuple[int, int]]) -> dict[str, float | int]:
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    records, size = func()
+    return {
+        "records": records,
+        "bytes": size,
+        "seconds": time.perf_counter() - wall_start,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "peak_rss_MiB": _peak_rss_MiB(),
+        # The largest of the worker processes, if any
+        "peak_rss_workers_MiB": _MiB(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        ),
+    }
+
+
+@stage("BCCWJ-load")
+def stage_BCCWJ_load(corpus_folder: str, jobs: str = "1"):
+    path_zip = Path(corpus_folder) / "M-XML_OT" / "LB.zip"
+
+    def _run():
+        sentences = gs.load_BCCWJ(
+            corpus_folder,
+            tqdm_buffer=io.StringIO(),
+            jobs=int(jobs),
+        )
+        return len(sentences), path_zip.stat().st_size
+
+    return _measure(_run)
+
+
+@stage("BCCWJ-store-write")
+def stage_BCCWJ_store_write(corpus_folder: str):
+    sentences = gs.load_BCCWJ(corpus_folder, tqdm_buffer=io.StringIO())
+
+    def _run():
+        with tempfile.TemporaryFile() as f:
+            write_store(sentences, f)
+            return len(sentences), f.tell()
+
+    return _measure(_run)
+
+
+@stage("BCCWJ-store-lookup")
+def stage_BCCWJ_store_lookup(store_path: str, annotation_path: str):
+    with open(annotation_path) as f:
+        IDs = [
+            rec.ID
+            for rec in load_file(
+                f,
+                format=AnnotationFileFormat.JSONL,
+                style=AnnotationFileStyle.SEPARATE,
+            )
+        ]
+
+    def _run():
+        with BCCWJSentStore(store_path) as store:
+            size = 0
+            for ID in IDs:
+                if ID_parsed := aoc.ABCTComp_BCCWJ_ID.from_string(ID):
+                    text = store.get(
+                        gs.BCCWJSentIndex(ID_parsed.sampleID, ID_parsed.start_pos)
+                    )
+                    size += len(text.encode("utf-8")) if text else 0
+        return len(IDs), size
+
+    return _measure(_run)
+
+
+@stage("annot-read")
+def stage_annot_read(path: str, format: str, style: str, jobs: str = "1"):
+    def _run():
+        with open(path) as f:
+            records = sum(
+                1
+                for _ in load_file(
+                    f,
+                    format=AnnotationFileFormat(format),
+                    style=AnnotationFileStyle(style),
+                    jobs=int(jobs),
+                )
+            )
+        return records, os.path.getsize(path)
+
+    return _measure(_run)
+
+
+@stage("annot-write")
+def stage_annot_write(path: str, format: str, style: str):
+    # The records are read from the JSONL file in the separate style,
+    # which is the cheapest to load.
+    with open(path) as f:
+        records = list(
+            load_file(
+                f,
+                format=AnnotationFileFormat.JSONL,
+                style=AnnotationFileStyle.SEPARATE,
+            )
+        )
+
+    def _run():
+        with tempfile.TemporaryFile("w+") as f:
+            write_file(
+                records,
+                f,
+                format=AnnotationFileFormat(format),
+                style=AnnotationFileStyle(style),
+            )
+            f.flush()
+            return len(records), os.fstat(f.fileno()).st_size
+
+    return _measure(_run)
+
+
+@stage("annot-decrypt")
+def stage_annot_decrypt(path: str, store_path: str, *options: str):
+    """
+    Run `annot load … incorp-text … decrypt write …` on a JSONL file in the separate style.
+    `options` are given to the `annot` group, e.g. `--stream` or `--jobs 4`.
+    """
+    from abctk.utils.comparative.cli import app
+
+    command = typer.main.get_command(app)
+
+    def _run():
+        with tempfile.TemporaryDirectory() as folder:
+            command(
+                [
+                    "annot",
+                    *options,
+                    "load",
+                    "-e",
+                    "jsonl",
+                    "-s",
+                    "separate",
+                    path,
+                    "incorp-text",
+                    "BCCWJ",
+                    store_path,
+                    "decrypt",
+                    "count",
+                    "write",
+                    "-e",
+                    "jsonl",
+                    "-s",
+                    "separate",
+                    str(Path(folder) / "output.jsonl"),
+                ],
+                standalone_mode=False,
+            )
+        with open(path) as f:
+            records = sum(1 for _ in f)
+        return records, os.path.getsize(path)
+
+    return _measure(_run)
+
+
+def main(args: list[str]) -> None:
+    name, *params = args
+    print(json.dumps(STAGES[name](*params)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,61 @@
+"""
+How long the CLI takes to start.
+
+    python -m benchmarks.startup [--runs N]
+
+runs each command below in new processes and prints how long it takes.
+That the commands do not import what they do not need
+is checked by `tests/test_startup.py`.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from typing import Annotated
+
+import typer
+
+_SCRIPT = """
+import sys
+import typer
+from abctk.utils.comparative.cli import app
+
+typer.main.get_command(app)(sys.argv[1:], standalone_mode=False)
+"""
+
+COMMANDS: tuple[tuple[str, ...], ...] = (
+    ("version",),
+    ("annot", "--help"),
+    ("BCCWJ", "--help"),
+    ("client", "--help"),
+    ("serve", "--help"),
+)
+
+
+def run_command(args: tuple[str, ...]) -> float:
+    """
+    Run the CLI with `args` in a new process and return the time it took.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", _SCRIPT, *args],
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main(
+    runs: Annotated[
+        int,
+        typer.Option(min=1, help="The number of times each command is run."),
+    ] = 5,
+):
+    for args in COMMANDS:
+        seconds = [run_command(args) for _ in range(runs)]
+        typer.echo(f"{' '.join(args):<16} {statistics.median(seconds) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    typer.run(main)
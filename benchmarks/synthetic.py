@@ -0,0 +1,147 @@
+"""
+Synthetic data shaped like the BCCWJ corpus and the comparative annotations.
+"""
+
+import random
+from pathlib import Path
+from typing import Iterator
+from xml.sax.saxutils import escape
+import zipfile
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    write_file,
+)
+
+_CHARS = "あいうえおかきくけこさしすせそたちつてとなにぬねの比較的高低大小多少漢字。、"
+_LABELS = ("deg", "prej", "diff", "root")
+
+
+def _sample_ID(i: int) -> str:
+    return f"LB{'abcdefghijklmn'[i % 14]}{i % 10}_{i:05d}"
+
+
+def _M_XML(
+    sampleID: str,
+    rand: random.Random,
+    sentences: int,
+) -> tuple[str, list[tuple[BCCWJSentIndex, str]]]:
+    """
+    Make an M-XML file with `sentences` sentences,
+    returning it with the texts of the sentences.
+    """
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\r\n',
+        f'<mergedSample sampleID="{sampleID}" type="BK">\r\n<article>\r\n',
+    ]
+    texts: list[tuple[BCCWJSentIndex, str]] = []
+
+    pos = 10
+    for _ in range(sentences):
+        first_pos = pos
+        words = []
+        parts.append('<sentence type="quasi">\r\n')
+        for _ in range(rand.randint(3, 25)):
+            word = "".join(rand.choices(_CHARS, k=rand.randint(1, 4)))
+            words.append(word)
+            parts.append(
+                f'<LUW l_pos="名詞"><SUW start="{pos}" end="{pos + len(word) * 10}" '
+                f'pos="名詞-普通名詞-一般">\r\n{escape(word)}</SUW></LUW>\r\n'
+            )
+            pos += len(word) * 10
+        parts.append("</sentence>\r\n")
+        texts.append((BCCWJSentIndex(sampleID, first_pos), "".join(words)))
+
+    parts.append("</article>\r\n</mergedSample>\r\n")
+    return "".join(parts), texts
+
+
+def make_corpus(
+    folder: Path,
+    samples: int,
+    sentences_per_sample: int,
+    seed: int = 0,
+) -> dict[BCCWJSentIndex, str]:
+    """
+    Make `folder`/M-XML_OT/LB.zip, one M-XML file per sample,
+    and return the sentences that `load_BCCWJ` is expected to extract from it.
+    """
+    rand = random.Random(seed)
+    path_zip = folder / "M-XML_OT" / "LB.zip"
+    path_zip.parent.mkdir(parents=True, exist_ok=True)
+
+    sentences: dict[BCCWJSentIndex, str] = {}
+    with zipfile.ZipFile(path_zip, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr("LB/", "")
+        for i in range(samples):
+            sampleID = _sample_ID(i)
+            doc, texts = _M_XML(sampleID, rand, sentences_per_sample)
+            zipf.writestr(f"LB/{sampleID}.xml", doc)
+            sentences.update(texts)
+    return sentences
+
+
+def make_records(
+    sentences: dict[BCCWJSentIndex, str],
+    n: int,
+    seed: int = 0,
+) -> Iterator[aoc.CompRecord]:
+    """
+    Make `n` encrypted annotation records on sentences drawn from `sentences`.
+    """
+    rand = random.Random(seed)
+    indices = tuple(sentences)
+
+    for i in range(n):
+        idx = rand.choice(indices)
+        text = sentences[idx]
+
+        cuts = sorted(rand.sample(range(1, len(text)), min(len(text) - 1, 8)))
+        tokens = [
+            "⛔" * (end - start) for start, end in zip([0, *cuts], [*cuts, len(text)])
+        ]
+        comp = []
+        for _ in range(rand.randint(0, 3)):
+            start = rand.randrange(len(tokens))
+            comp.append(
+                aoc.CompSpan(
+                    start=start,
+                    end=rand.randint(start + 1, len(tokens)),
+                    label=rand.choice(_LABELS),
+                )
+            )
+
+        yield aoc.CompRecord(
+            ID=f"{i}_BCCWJ_{idx.sampleID}_{idx.sent_start_pos}",
+            tokens=tokens,
+            comp=comp,
+            comments=[],
+            ID_v1=None,
+        )
+
+
+def write_annotations(
+    records: list[aoc.CompRecord],
+    folder: Path,
+) -> dict[tuple[AnnotationFileFormat, AnnotationFileStyle], Path]:
+    """
+    Write `records` in every valid combination of the format and the style.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for format in AnnotationFileFormat:
+        for style in AnnotationFileStyle:
+            path = folder / f"annot.{style.value}.{format.value}"
+            try:
+                with open(path, "w") as f:
+                    write_file(records, f, format=format, style=style)
+            except ValueError:
+                # e.g. the text format has no separate style
+                path.unlink()
+                continue
+            paths[format, style] = path
+    return paths
@@ -0,0 +1,233 @@
+"""
+The records made by `brackets.from_bracketed_batch`
+against the ones abctk.obj makes from the same annotations, for every record.
+
+The annotation files of a real corpus, in JSONL or YAML with the bracketed style,
+are checked as well if their paths are given
+in the environment variable ABCTK_COMP_CORPUS, separated as in PATH, e.g.
+
+    ABCTK_COMP_CORPUS=annot.jsonl:annot.yaml python -m pytest tests
+"""
+
+import io
+import os
+from pathlib import Path
+import random
+from typing import Any, Callable
+
+import pytest
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative import brackets, jsonl
+from abctk.utils.comparative.compression import decompressing
+from abctk.utils.comparative.io import (
+    AnnotationFileFormat,
+    AnnotationFileStyle,
+    load_file,
+    write_file,
+)
+from abctk.utils.comparative.yaml_io import iter_sequence
+
+_LABELS = ("deg", "prej", "diff", "root", "nucleus")
+
+
+def _from_brackets(item: dict[str, Any]) -> aoc.CompRecord | Exception:
+    try:
+        return aoc.CompRecord.from_brackets(
+            line=item["annot"],
+            ID=item["ID"],
+            comments=item.get("comments"),
+            ID_v1=item.get("ID_v1"),
+        )
+    except Exception as e:
+        return e
+
+
+def _from_bracketed_batch(item: dict[str, Any]) -> aoc.CompRecord | Exception:
+    try:
+        return brackets.from_bracketed_batch([item])[0]
+    except Exception as e:
+        return e
+
+
+def _assert_same(items: list[dict[str, Any]]) -> None:
+    expected = [_from_brackets(item) for item in items]
+    if not any(isinstance(record, Exception) for record in expected):
+        assert brackets.from_bracketed_batch(items) == expected
+        return
+
+    # One at a time, so that a record abctk.obj fails on fails on its own.
+    for item, record in zip(items, expected):
+        actual = _from_bracketed_batch(item)
+        if isinstance(record, Exception):
+            assert type(actual) is type(record), item
+        else:
+            assert actual == record, item
+
+
+def _synthetic_records(n: int, seed: int = 0) -> list[aoc.CompRecord]:
+    rand = random.Random(seed)
+    records = []
+    for i in range(n):
+        tokens = [
+            "".join(rand.choices("あいうえおかきくけこ比較的高い", k=rand.randint(1, 4)))
+            for _ in range(rand.randint(1, 20))
+        ]
+        comp = []
+        for _ in range(rand.randint(0, 3)):
+            start = rand.randrange(len(tokens))
+            comp.append(
+                aoc.CompSpan(
+                    start=start,
+                    end=rand.randint(start + 1, len(tokens)),
+                    label=rand.choice(_LABELS),
+                )
+            )
+        records.append(
+            aoc.CompRecord(
+                ID=f"{i}_BCCWJ_LBa0_{i // 100:05d}_{i * 10}",
+                tokens=tokens,
+                comp=comp,
+                comments=[f"comment {i}"] if i % 7 == 0 else [],
+                ID_v1=f"v1-{i}" if i % 11 == 0 else None,
+            )
+        )
+    return records
+
+
+def test_synthetic() -> None:
+    items = [
+        {
+            "ID": record.ID,
+            "annot": record.to_brackets(),
+            "comments": record.comments,
+            "ID_v1": record.ID_v1,
+        }
+        for record in _synthetic_records(20_000)
+    ]
+    _assert_same(items)
+
+
+@pytest.mark.parametrize(
+    "annot",
+    [
+        "背 が 高い",
+        "[太郎 より]prej 背 が 高い",
+        "[[太郎 より]prej 背 が]deg 高い",
+        "[[[太郎]root より]prej]deg",
+        "[太郎]prej]deg より",
+        "[[太郎 より]prej 背",
+        "太郎 [より] 高い",
+        "太郎 [より]] 高い",
+        "太郎 ]deg 高い",
+        "[ 太郎 ]deg",
+        "太[郎 より]prej",
+        "太郎]prej[ より",
+        "太郎  より",
+        " 太郎 より",
+        "太郎 より ",
+        "太郎\tより",
+        "太郎　より",
+        "太郎​より 高い",
+        "",
+        "[]deg",
+        "[太郎]DEG より",
+        "[太郎]deg-1 より",
+        "[太郎]d_e.g より",
+        "[太郎]度 より",
+    ],
+)
+def test_irregular(annot: str) -> None:
+    _assert_same(
+        [
+            {"ID": "ID", "annot": annot, "comments": [], "ID_v1": None},
+            {"ID": "ID", "annot": annot},
+            {"ID": "ID", "annot": annot, "comments": None, "ID_v1": "v1"},
+        ]
+    )
+
+
+def test_load_file() -> None:
+    records = _synthetic_records(5_000, seed=1)
+    for format in (AnnotationFileFormat.JSONL, AnnotationFileFormat.YAML):
+        buffer = io.StringIO()
+        write_file(records, buffer, format=format, style=AnnotationFileStyle.BRACKETED)
+        expected = [
+            aoc.CompRecord.from_brackets(
+                line=record.to_brackets(),
+                ID=record.ID,
+                comments=record.comments,
+                ID_v1=record.ID_v1,
+            )
+            for record in records
+        ]
+        for jobs in (1, 2):
+            buffer.seek(0)
+            assert (
+                list(
+                    load_file(
+                        buffer,
+                        format=format,
+                        style=AnnotationFileStyle.BRACKETED,
+                        jobs=jobs,
+                    )
+                )
+                == expected
+            )
+
+
+def test_span_orders_distinct() -> None:
+    parsed = brackets.parse(brackets._PROBE)
+    assert parsed is not None
+    orders = [order(list(parsed[1])) for order in brackets._SPAN_ORDERS]
+    assert all(a != b for i, a in enumerate(orders) for b in orders[i + 1 :])
+
+
+@pytest.mark.parametrize(
+    ("key", "fast"),
+    [
+        pytest.param(lambda s: (s.end, s.start), True, id="by end"),
+        pytest.param(lambda s: (s.label, s.start, s.end), True, id="by label"),
+        pytest.param(lambda s: (-s.start, -s.end), False, id="unknown"),
+    ],
+)
+def test_span_order(
+    monkeypatch: pytest.MonkeyPatch, key: Callable[[aoc.CompSpan], Any], fast: bool
+) -> None:
+    from_brackets = aoc.CompRecord.from_brackets
+
+    def from_brackets_sorted(cls, *args, **kwargs):
+        record = from_brackets(*args, **kwargs)
+        record.comp = sorted(record.comp, key=key)
+        return record
+
+    monkeypatch.setattr(
+        aoc.CompRecord, "from_brackets", classmethod(from_brackets_sorted)
+    )
+    brackets.span_order.cache_clear()
+    try:
+        assert (brackets.span_order() is not None) == fast
+        test_synthetic()
+    finally:
+        brackets.span_order.cache_clear()
+
+
+_CORPUS = [
+    Path(path)
+    for path in os.environ.get("ABCTK_COMP_CORPUS", "").split(os.pathsep)
+    if path
+]
+
+
+@pytest.mark.skipif(not _CORPUS, reason="ABCTK_COMP_CORPUS is not given")
+@pytest.mark.parametrize("path", _CORPUS, ids=str)
+def test_corpus(path: Path) -> None:
+    with open(path) as f:
+        fp = decompressing(f)
+        if ".jsonl" in path.suffixes:
+            items = list(jsonl.read_lines(fp))
+        else:
+            items = list(iter_sequence(fp))
+    assert items
+    _assert_same(items)
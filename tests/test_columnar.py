@@ -0,0 +1,145 @@
+"""
+The bulk operations of `CompCorpus` against the ones on `CompRecord`s.
+"""
+
+import copy
+import random
+
+import abctk.obj.comparative as aoc
+
+from abctk.utils.comparative.BCCWJ.loader import BCCWJSentIndex
+from abctk.utils.comparative.columnar import CompCorpus, SpanStat
+from abctk.utils.comparative.decrypt import (
+    MismatchKind,
+    decrypt_records_BCCWJ,
+    encrypt_record,
+)
+
+
+def _records(n: int, seed: int = 0) -> list[aoc.CompRecord]:
+    rand = random.Random(seed)
+    records = []
+    for i in range(n):
+        tokens = [
+            "".join(rand.choices("あいうえお比較", k=rand.randint(0, 4)))
+            for _ in range(rand.randint(0, 12))
+        ]
+        comp = []
+        if tokens:
+            for _ in range(rand.randint(0, 3)):
+                start = rand.randrange(len(tokens))
+                comp.append(
+                    aoc.CompSpan(
+                        start=start,
+                        end=rand.randint(start + 1, len(tokens)),
+                        label=rand.choice(("deg", "prej", "diff")),
+                    )
+                )
+        records.append(
+            aoc.CompRecord(
+                ID=f"{i}_BCCWJ_LBa0_{i:05d}_{i * 10}",
+                tokens=tokens,
+                comp=comp,
+                comments=[f"comment {i}"] if i % 5 == 0 else [],
+                ID_v1=f"v1-{i}" if i % 7 == 0 else None,
+            )
+        )
+    return records
+
+
+def _real_texts(records: list[aoc.CompRecord], seed: int = 0) -> list[str | None]:
+    """
+    Real texts of the same lengths as the records, longer, shorter or missing.
+    """
+    rand = random.Random(seed)
+    real_texts: list[str | None] = []
+    for record in records:
+        text = "".join(rand.choices("かきくけこ", k=sum(map(len, record.tokens))))
+        match rand.randrange(4):
+            case 0:
+                real_texts.append(None)
+            case 1:
+                real_texts.append(text + "さし")
+            case 2:
+                # An empty real text is not found by `get_real_texts`.
+                real_texts.append(text[: rand.randint(0, len(text))] or None)
+            case _:
+                real_texts.append(text or None)
+    return real_texts
+
+
+def test_iter_records() -> None:
+    records = _records(2000)
+    assert list(CompCorpus.from_records(records).iter_records()) == records
+
+
+def test_encrypt() -> None:
+    records = _records(2000)
+    corpus = CompCorpus.from_records(records)
+    corpus.encrypt()
+
+    for record in records:
+        encrypt_record(record)
+        record.tokens = list(record.tokens)
+    assert list(corpus.iter_records()) == records
+
+
+def test_decrypt() -> None:
+    records = _records(2000)
+    real_texts = _real_texts(records)
+    corpus = CompCorpus.from_records(records)
+    mismatches = corpus.decrypt(real_texts)
+
+    records_decrypted = copy.deepcopy(records)
+    results = decrypt_records_BCCWJ(
+        records_decrypted,
+        {
+            BCCWJSentIndex(f"LBa0_{i:05d}", i * 10): real_text
+            for i, real_text in enumerate(real_texts)
+            if real_text is not None
+        },
+    )
+    assert list(corpus.iter_records()) == [
+        aoc.CompRecord(
+            ID=record.ID,
+            tokens=list(record.tokens),
+            comp=record.comp,
+            comments=record.comments,
+            ID_v1=record.ID_v1,
+        )
+        for record in records_decrypted
+    ]
+    assert mismatches == [
+        mismatch
+        for _, mismatch in results
+        if mismatch and mismatch.kind in (MismatchKind.LONGER, MismatchKind.SHORTER)
+    ]
+
+
+def test_span_stats_out_of_bounds() -> None:
+    records = [
+        aoc.CompRecord(
+            ID="a",
+            tokens=["a", "bb"],
+            comp=[
+                aoc.CompSpan(start=0, end=5, label="deg"),
+                aoc.CompSpan(start=0, end=2, label="deg"),
+            ],
+            comments=[],
+            ID_v1=None,
+        ),
+        aoc.CompRecord(
+            ID="b",
+            tokens=["ccc", "d", "ee"],
+            comp=[
+                aoc.CompSpan(start=-1, end=2, label="prej"),
+                aoc.CompSpan(start=1, end=3, label="prej"),
+            ],
+            comments=[],
+            ID_v1=None,
+        ),
+    ]
+    assert CompCorpus.from_records(records).span_stats() == {
+        "deg": SpanStat(count=1, tokens=2, chars=3),
+        "prej": SpanStat(count=1, tokens=2, chars=3),
+    }
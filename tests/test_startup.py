@@ -0,0 +1,53 @@
+"""
+The CLI starts without loading the dependencies it does not need.
+
+Each command is run in a new process,
+which must not have imported any of the modules listed for it.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+_SCRIPT = """
+import json, sys
+import typer
+from abctk.utils.comparative.cli import app
+
+typer.main.get_command(app)(sys.argv[1:], standalone_mode=False)
+print()
+print(json.dumps(sorted(sys.modules)))
+"""
+
+_HEAVY = ("lxml", "ruamel", "tqdm", "zstandard", "multiprocessing")
+
+CHECKS: tuple[tuple[tuple[str, ...], tuple[str, ...]], ...] = (
+    (("version",), (*_HEAVY, "abctk.obj")),
+    (("annot", "--help"), _HEAVY),
+    (("BCCWJ", "--help"), _HEAVY),
+    (("client", "--help"), (*_HEAVY, "abctk.obj")),
+    (("serve", "--help"), (*_HEAVY, "abctk.obj")),
+)
+"""
+The commands and the modules they must not import.
+"""
+
+
+@pytest.mark.parametrize(
+    ("args", "forbidden"),
+    [pytest.param(args, forbidden, id=" ".join(args)) for args, forbidden in CHECKS],
+)
+def test_no_heavy_imports(args: tuple[str, ...], forbidden: tuple[str, ...]) -> None:
+    proc = subprocess.run(
+        [sys.executable, "-c", _SCRIPT, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = json.loads(proc.stdout.splitlines()[-1])
+    loaded = [
+        f for f in forbidden if any(m == f or m.startswith(f"{f}.") for m in modules)
+    ]
+    assert not loaded